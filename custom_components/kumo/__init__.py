@@ -1,27 +1,68 @@
 """Support for Mitsubishi KumoCloud devices."""
+from __future__ import annotations
+
+import asyncio
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import homeassistant.helpers.config_validation as cv
-import pykumo
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, EVENT_HOMEASSISTANT_STOP
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.typing import HomeAssistantType
 from homeassistant.util.json import load_json, save_json
 
 from .coordinator import KumoDataUpdateCoordinator
+from .executor import KumoExecutor
+from .poller import KumoAccountPoller
+from .registry import KumoUnitRegistry
+from .services import async_setup_services, async_unload_services
+from .state_store import KumoStateStore
+from .trace import TRACE_FLUSH_INTERVAL, KumoRecordingTransport, KumoReplayTransport, load_trace
+from .transport import KumoLocalTransport
 from .const import (
+    CONF_ASYNC_TRANSPORT,
+    CONF_COMMAND_SETTLE_TIME,
     CONF_CONNECT_TIMEOUT,
+    CONF_MAX_CONCURRENT_POLLS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
     CONF_PREFER_CACHE,
     CONF_RESPONSE_TIMEOUT,
+    CONF_STALE_WHILE_REVALIDATE,
+    CONF_TRACE_MODE,
+    CONF_TRACE_SPEED,
+    DEFAULT_COMMAND_SETTLE_TIME,
+    DEFAULT_MAX_CONCURRENT_POLLS,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_TRACE_SPEED,
     DOMAIN,
     KUMO_CONFIG_CACHE,
     KUMO_DATA,
     KUMO_DATA_COORDINATORS,
+    KUMO_DATA_EXECUTOR,
+    KUMO_DATA_POLLER,
+    KUMO_DATA_REGISTRY,
+    KUMO_DATA_REVALIDATION,
+    KUMO_DATA_STATE_STORE,
+    KUMO_DATA_TRANSPORT,
+    KUMO_TRACE_FILE,
     PLATFORMS,
+    SIGNAL_UNITS_ADDED,
+    SIGNAL_UNITS_REMOVED,
+    TRACE_MODE_OFF,
+    TRACE_MODE_RECORD,
+    TRACE_MODE_REPLAY,
 )
 
+if TYPE_CHECKING:
+    from pykumo import KumoCloudAccount
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -74,56 +115,261 @@ async def async_setup_entry(hass: HomeAssistantType, entry: ConfigEntry):
     username = entry.data.get(CONF_USERNAME)
     password = entry.data.get(CONF_PASSWORD)
     prefer_cache = entry.data.get(CONF_PREFER_CACHE)
+    max_concurrent_polls = int(
+        entry.options.get(CONF_MAX_CONCURRENT_POLLS, DEFAULT_MAX_CONCURRENT_POLLS)
+    )
+
+    # Blocking Kumo I/O runs on the integration's own threads; a single one
+    # suffices until the account tells us how many units there are
+    executor = KumoExecutor(hass)
+    hass.data[DOMAIN][entry.entry_id][KUMO_DATA_EXECUTOR] = executor
 
-    account = await async_kumo_setup(hass, prefer_cache, username, password)
+    account = None
+    revalidate = False
+    if entry.options.get(CONF_STALE_WHILE_REVALIDATE, False):
+        # Start from the cache right away and refresh from KumoCloud in the background
+        account = await async_kumo_setup(hass, True, username, password, executor)
+        revalidate = account is not None
+
+    if not account:
+        account = await async_kumo_setup(hass, prefer_cache, username, password, executor)
 
     if not account:
         # Attempt setup again, but flip the prefer_cache flag
-        account = await async_kumo_setup(hass, not prefer_cache, username, password)
+        account = await async_kumo_setup(hass, not prefer_cache, username, password, executor)
 
     if account:
         hass.data[DOMAIN][entry.entry_id][KUMO_DATA] = KumoCloudSettings(account, entry.data, entry.options)
-
-        # Create a data coordinator for each Kumo device
         hass.data[DOMAIN][entry.entry_id].setdefault(KUMO_DATA_COORDINATORS, {})
-        coordinators = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]
-        connect_timeout = float(
-            entry.options.get(CONF_CONNECT_TIMEOUT, "1.2")
+
+        # The async transport keeps connections alive in Home Assistant's shared
+        # session; otherwise fall back to pykumo's blocking requests in the executor
+        transport = None
+        if entry.options.get(CONF_ASYNC_TRANSPORT, True):
+            try:
+                transport = await _async_create_transport(hass, entry, executor)
+            except ConfigEntryNotReady:
+                executor.shutdown()
+                hass.data[DOMAIN].pop(entry.entry_id)
+                raise
+        hass.data[DOMAIN][entry.entry_id][KUMO_DATA_TRANSPORT] = transport
+
+        # Parse the account tree once; platforms look units up in the registry
+        registry = KumoUnitRegistry(account.get_raw_json())
+        hass.data[DOMAIN][entry.entry_id][KUMO_DATA_REGISTRY] = registry
+        _resize_executor(executor, registry, max_concurrent_polls)
+        state_store = KumoStateStore(
+            hass, entry.entry_id, hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]
         )
-        response_timeout = float(
-            entry.options.get(CONF_RESPONSE_TIMEOUT, "8")
+        hass.data[DOMAIN][entry.entry_id][KUMO_DATA_STATE_STORE] = state_store
+        # All units are polled together by one account-wide scheduler
+        poller = KumoAccountPoller(
+            hass,
+            hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS],
+            max_concurrent_polls,
         )
-        timeouts = (connect_timeout, response_timeout)
-        pykumos = await hass.async_add_executor_job(account.make_pykumos, timeouts, True)
-        for device in pykumos.values():
-            if device.get_serial() not in coordinators:
-                coordinators[device.get_serial()] = KumoDataUpdateCoordinator(hass, device)
+        hass.data[DOMAIN][entry.entry_id][KUMO_DATA_POLLER] = poller
+        coordinators = _create_coordinators(hass, entry, registry.make_pykumos(_get_timeouts(entry)))
+        restored = await state_store.async_restore()
+        # Setup only waits for one poll of the units that have nothing to show
+        # yet, max_concurrent_polls at a time; units seeded from their last
+        # known state are polled in the background, spread over the startup ramp
+        unpolled = [serial for serial in coordinators if serial not in restored]
+        await poller.async_poll(unpolled)
+        # They were all polled at once; spread their later polls by serial
+        poller.async_offset_next_polls(unpolled)
+        poller.async_start_ramp(restored)
+        poller.async_start()
 
         for platform in PLATFORMS:
             hass.async_create_task(
                 hass.config_entries.async_forward_entry_setup(entry, platform))
+
+        if revalidate:
+            hass.data[DOMAIN][entry.entry_id][KUMO_DATA_REVALIDATION] = hass.async_create_task(
+                async_revalidate_account(hass, entry, username, password)
+            )
+        async_setup_services(hass)
         return True
 
+    executor.shutdown()
     _LOGGER.warning("Could not load config from KumoCloud server or cache")
     return False
 
-async def async_kumo_setup(hass: HomeAssistantType, prefer_cache: bool, username: str, password: str) -> Optional[pykumo.KumoCloudAccount]:
-    """Attempt to load data from cache or Kumo Cloud"""
+async def _async_create_transport(hass: HomeAssistantType, entry: ConfigEntry, executor: KumoExecutor):
+    """Create the async local transport, recording or replaying traffic if configured."""
+    trace_mode = entry.options.get(CONF_TRACE_MODE, TRACE_MODE_OFF)
+    trace_path = hass.config.path(KUMO_TRACE_FILE)
+    if trace_mode == TRACE_MODE_REPLAY:
+        # A replay must never fall back to the real adapters
+        try:
+            records = await executor.async_run(load_trace, trace_path)
+        except (OSError, ValueError) as err:
+            raise ConfigEntryNotReady(f"Could not load Kumo trace {trace_path}: {err}") from err
+        _LOGGER.info("Replaying %d recorded Kumo requests from %s", len(records), trace_path)
+        return KumoReplayTransport(
+            records, float(entry.options.get(CONF_TRACE_SPEED, DEFAULT_TRACE_SPEED))
+        )
+
+    session = async_get_clientsession(hass)
+    if trace_mode == TRACE_MODE_RECORD:
+        _LOGGER.info("Recording Kumo adapter traffic to %s", trace_path)
+        transport = KumoRecordingTransport(
+            session, _get_timeouts(entry), trace_path, executor.async_run
+        )
+
+        async def _async_flush_trace(*_):
+            await transport.async_flush()
+
+        # Unloading writes out the rest, but stopping Home Assistant does not unload
+        entry.async_on_unload(
+            async_track_time_interval(hass, _async_flush_trace, TRACE_FLUSH_INTERVAL)
+        )
+        entry.async_on_unload(hass.bus.async_listen(EVENT_HOMEASSISTANT_STOP, _async_flush_trace))
+        return transport
+    return KumoLocalTransport(session, _get_timeouts(entry))
+
+def _get_timeouts(entry: ConfigEntry):
+    """Return the (connect, response) timeouts configured for the units."""
+    connect_timeout = float(
+        entry.options.get(CONF_CONNECT_TIMEOUT, "1.2")
+    )
+    response_timeout = float(
+        entry.options.get(CONF_RESPONSE_TIMEOUT, "8")
+    )
+    return (connect_timeout, response_timeout)
+
+def _resize_executor(executor: KumoExecutor, registry: KumoUnitRegistry, max_concurrent_polls: int):
+    """Size the executor for the account's units."""
+    # One thread per unit polled at once, plus one so writes never queue behind polls
+    executor.resize(min(len(registry.units), max_concurrent_polls) + 1)
+
+def _create_coordinators(hass: HomeAssistantType, entry: ConfigEntry, pykumos) -> list:
+    """Create a data coordinator for each new Kumo device and return their serials."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    coordinators = entry_data[KUMO_DATA_COORDINATORS]
+    min_interval = float(
+        entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)
+    )
+    max_interval = float(
+        entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+    )
+    settle_time = float(
+        entry.options.get(CONF_COMMAND_SETTLE_TIME, DEFAULT_COMMAND_SETTLE_TIME)
+    )
+
+    created = []
+    for device in pykumos.values():
+        serial = device.get_serial()
+        if serial not in coordinators:
+            coordinators[serial] = KumoDataUpdateCoordinator(
+                hass,
+                device,
+                entry_data[KUMO_DATA_TRANSPORT],
+                min_interval,
+                max_interval,
+                settle_time,
+                entry_data.get(KUMO_DATA_STATE_STORE),
+                entry_data.get(KUMO_DATA_EXECUTOR),
+                entry_data[KUMO_DATA_POLLER].async_poll,
+            )
+            created.append(serial)
+    return created
+
+async def async_revalidate_account(hass: HomeAssistantType, entry: ConfigEntry, username: str, password: str):
+    """Refresh the account from KumoCloud and apply unit changes in place."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if not entry_data:
+        return
+    account = await async_kumo_setup(
+        hass, False, username, password, entry_data.get(KUMO_DATA_EXECUTOR),
+        entry_data.get(KUMO_DATA_REGISTRY),
+    )
+    poller = entry_data.get(KUMO_DATA_POLLER)
+    if hass.data.get(DOMAIN, {}).get(entry.entry_id) is not entry_data or poller is None or poller.stopped:
+        # The entry was unloaded while KumoCloud was being asked
+        return
+    if not account:
+        _LOGGER.info("Keeping cached Kumo config; KumoCloud refresh did not complete")
+        return
+
+    registry = KumoUnitRegistry(account.get_raw_json())
+    added, removed, changed = entry_data[KUMO_DATA_REGISTRY].diff(registry)
+    entry_data[KUMO_DATA] = KumoCloudSettings(account, entry.data, entry.options)
+    entry_data[KUMO_DATA_REGISTRY] = registry
+    _resize_executor(
+        entry_data[KUMO_DATA_EXECUTOR],
+        registry,
+        int(entry.options.get(CONF_MAX_CONCURRENT_POLLS, DEFAULT_MAX_CONCURRENT_POLLS)),
+    )
+    if not (added or removed or changed):
+        return
+    _LOGGER.info(
+        "KumoCloud refresh: %d units added, %d removed, %d changed",
+        len(added), len(removed), len(changed),
+    )
+
+    coordinators = entry_data[KUMO_DATA_COORDINATORS]
+    pykumos = registry.make_pykumos(_get_timeouts(entry))
+    for serial in changed:
+        if serial in coordinators and serial in pykumos:
+            coordinators[serial].update_device_config(pykumos[serial])
+
+    if removed:
+        for serial in removed:
+            coordinator = coordinators.pop(serial, None)
+            if coordinator is not None:
+                await coordinator.async_shutdown()
+        async_dispatcher_send(hass, SIGNAL_UNITS_REMOVED.format(entry.entry_id), removed)
+
+    created = _create_coordinators(
+        hass, entry, {serial: pykumos[serial] for serial in added if serial in pykumos}
+    )
+    if created:
+        await poller.async_poll(created, stagger=True)
+        async_dispatcher_send(hass, SIGNAL_UNITS_ADDED.format(entry.entry_id), created)
+
+def _create_account(username: str, password: str, kumo_dict=None) -> KumoCloudAccount:
+    """Create the KumoCloud account; pykumo and requests are first imported here, off the event loop."""
+    # pylint: disable=import-outside-toplevel
+    from pykumo import KumoCloudAccount
+
+    return KumoCloudAccount(username, password, kumo_dict=kumo_dict)
+
+async def async_kumo_setup(
+    hass: HomeAssistantType,
+    prefer_cache: bool,
+    username: str,
+    password: str,
+    executor: Optional[KumoExecutor] = None,
+    cached_registry: Optional[KumoUnitRegistry] = None,
+) -> Optional[KumoCloudAccount]:
+    """Attempt to load data from cache or Kumo Cloud
+
+    Units KumoCloud returns without an address keep the one in cached_registry.
+    """
+    if executor is not None:
+        run_blocking = executor.async_run
+    else:
+        run_blocking = hass.async_add_executor_job
+
     if prefer_cache:
-        cached_json = await hass.async_add_executor_job(
+        cached_json = await run_blocking(
             load_json, hass.config.path(KUMO_CONFIG_CACHE)
         ) or {"fetched": False}
-        account = pykumo.KumoCloudAccount(username, password, kumo_dict=cached_json)
+        account = await run_blocking(_create_account, username, password, cached_json)
     else:
-        account = pykumo.KumoCloudAccount(username, password)
+        account = await run_blocking(_create_account, username, password)
 
-    setup_success = await hass.async_add_executor_job(account.try_setup)
+    setup_success = await run_blocking(account.try_setup)
 
     if setup_success:
         if prefer_cache:
             _LOGGER.info("Loaded config from local cache")
         else:
-            await hass.async_add_executor_job(
+            if cached_registry is not None:
+                KumoUnitRegistry(account.get_raw_json()).keep_addresses(cached_registry)
+            await run_blocking(
                 save_json, hass.config.path(KUMO_CONFIG_CACHE), account.get_raw_json()
             )
             _LOGGER.info("Loaded config from KumoCloud server")
@@ -132,10 +378,36 @@ async def async_kumo_setup(hass: HomeAssistantType, prefer_cache: bool, username
 
 async def async_unload_entry(hass: HomeAssistantType, entry: ConfigEntry):
     """Unload Entry"""
+    revalidation = hass.data[DOMAIN][entry.entry_id].get(KUMO_DATA_REVALIDATION)
+    if revalidation is not None:
+        revalidation.cancel()
+    poller = hass.data[DOMAIN][entry.entry_id].get(KUMO_DATA_POLLER)
+    if poller is not None:
+        poller.async_stop()
+    coordinators = hass.data[DOMAIN][entry.entry_id].get(KUMO_DATA_COORDINATORS, {})
+    await asyncio.gather(*(coordinator.async_shutdown() for coordinator in coordinators.values()))
+    state_store = hass.data[DOMAIN][entry.entry_id].get(KUMO_DATA_STATE_STORE)
+    if state_store is not None:
+        await state_store.async_save()
 
+    all_ok = True
     for platform in PLATFORMS:
-        all_ok = True
         unload_ok = await hass.config_entries.async_forward_entry_unload(entry, platform)
         if not unload_ok:
             all_ok = False
+
+    transport = hass.data[DOMAIN][entry.entry_id].get(KUMO_DATA_TRANSPORT)
+    if transport is not None:
+        await transport.async_close()
+    executor = hass.data[DOMAIN][entry.entry_id].get(KUMO_DATA_EXECUTOR)
+    if executor is not None:
+        executor.shutdown()
+
+    if all_ok:
+        hass.data[DOMAIN].pop(entry.entry_id)
+        async_unload_services(hass)
     return all_ok
+
+async def async_remove_entry(hass: HomeAssistantType, entry: ConfigEntry):
+    """Remove the persisted unit state along with the entry"""
+    await KumoStateStore(hass, entry.entry_id, {}).async_remove()
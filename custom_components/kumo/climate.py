@@ -1,6 +1,7 @@
 """HomeAssistant climate component for KumoCloud connected HVAC units."""
 import logging
-import pprint
+from collections import namedtuple
+from operator import itemgetter
 
 import voluptuous as vol
 from homeassistant.components.climate import PLATFORM_SCHEMA
@@ -9,6 +10,7 @@ from homeassistant.exceptions import ConfigEntryNotReady
 from .const import DOMAIN
 from .coordinator import KumoDataUpdateCoordinator
 from .entity import CoordinatedKumoEntity
+from .snapshot import KumoSnapshot, status_fields
 
 try:
     from homeassistant.components.climate import ClimateEntity
@@ -24,13 +26,16 @@ from homeassistant.components.climate.const import (
     SUPPORT_FAN_MODE, SUPPORT_SWING_MODE, SUPPORT_TARGET_TEMPERATURE,
     SUPPORT_TARGET_TEMPERATURE_RANGE)
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
 from homeassistant.const import (ATTR_BATTERY_LEVEL, ATTR_TEMPERATURE,
                                  TEMP_CELSIUS)
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.typing import HomeAssistantType
 
 from .const import (
-    KUMO_DATA,
-    KUMO_DATA_COORDINATORS
+    KUMO_DATA_COORDINATORS,
+    KUMO_DATA_REGISTRY,
+    SIGNAL_UNITS_ADDED,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -44,6 +49,7 @@ ATTR_DEFROST = "defrost"
 ATTR_RSSI = "rssi"
 ATTR_SENSOR_RSSI = "sensor_rssi"
 ATTR_RUNSTATE = "runstate"
+ATTR_RESTORED = "restored"
 
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
@@ -93,87 +99,107 @@ KUMO_STATE_TO_HA_ACTION = {
 
 async def async_setup_entry(hass: HomeAssistantType, entry: ConfigEntry, async_add_entities):
     """Set up the Kumo thermostats."""
-    account = hass.data[DOMAIN][entry.entry_id][KUMO_DATA].get_account()
-    coordinators = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]
-
-    entities = []
-    indor_unit_serials = await hass.async_add_executor_job(account.get_indoor_units)
-    for serial in indor_unit_serials:
-        coordinator = coordinators[serial]
-        thermostat = KumoThermostat(coordinator)
-        entities.append(thermostat)
-        _LOGGER.debug("Adding entity: %s", coordinator.get_device().get_name())
-    if not entities:
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def _async_add_units(serials):
+        registry = entry_data[KUMO_DATA_REGISTRY]
+        coordinators = entry_data[KUMO_DATA_COORDINATORS]
+        indoor_unit_serials = set(registry.indoor_unit_serials())
+        entities = []
+        for serial in serials:
+            coordinator = coordinators.get(serial)
+            if coordinator is None or serial not in indoor_unit_serials:
+                continue
+            thermostat = KumoThermostat(coordinator)
+            entities.append(thermostat)
+            _LOGGER.debug("Adding entity: %s", coordinator.get_device().get_name())
+        if entities:
+            async_add_entities(entities)
+        return entities
+
+    if not _async_add_units(entry_data[KUMO_DATA_REGISTRY].indoor_unit_serials()):
         raise ConfigEntryNotReady("Kumo integration found no indoor units")
-    async_add_entities(entities, True)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_UNITS_ADDED.format(entry.entry_id), _async_add_units)
+    )
+
+def _derive_hvac_action(raw):
+    if raw["standby"]:
+        return CURRENT_HVAC_IDLE
+    return KUMO_STATE_TO_HA_ACTION.get(raw["mode"])
+
+
+def _derive_target_temperature(raw):
+    if raw["hvac_mode"] == HVAC_MODE_HEAT:
+        return raw["spHeat"]
+    if raw["hvac_mode"] == HVAC_MODE_COOL:
+        return raw["spCool"]
+    return None
+
+
+def _derive_target_temperature_high(raw):
+    if raw["hvac_mode"] == HVAC_MODE_HEAT_COOL:
+        return raw["spCool"]
+    return None
+
+
+def _derive_target_temperature_low(raw):
+    if raw["hvac_mode"] == HVAC_MODE_HEAT_COOL:
+        return raw["spHeat"]
+    return None
+
+
+# Thermostat property and how it is derived from the raw fields. Derived values are
+# added to the raw fields under the property name, so later entries can use them.
+_PROPERTY_TABLE = (
+    ("current_humidity", itemgetter("humidity")),
+    ("hvac_mode", lambda raw: KUMO_STATE_TO_HA.get(raw["mode"])),
+    ("hvac_action", _derive_hvac_action),
+    ("fan_mode", itemgetter("fanSpeed")),
+    ("swing_mode", itemgetter("vaneDir")),
+    ("current_temperature", itemgetter("roomTemp")),
+    ("target_temperature", _derive_target_temperature),
+    ("target_temperature_high", _derive_target_temperature_high),
+    ("target_temperature_low", _derive_target_temperature_low),
+    ("battery_percent", itemgetter("battery")),
+    ("filter_dirty", itemgetter("filterDirty")),
+    ("defrost", itemgetter("defrost")),
+    ("rssi", itemgetter("rssi")),
+    ("sensor_rssi", itemgetter("sensorRssi")),
+    ("runstate", itemgetter("runState")),
+)
+_ThermostatProperties = namedtuple(
+    "_ThermostatProperties", [name for name, _ in _PROPERTY_TABLE]
+)
 
 class KumoThermostat(CoordinatedKumoEntity, ClimateEntity):
     """Representation of a Kumo Thermostat device."""
 
-    _update_properties = [
-        "current_humidity",
-        "hvac_mode",
-        "hvac_action",
-        "fan_mode",
-        "swing_mode",
-        "current_temperature",
-        "target_temperature",
-        "target_temperature_high",
-        "target_temperature_low",
-        "battery_percent",
-        "filter_dirty",
-        "defrost",
-        "rssi",
-        "sensor_rssi",
-        "runstate",
-    ]
-
     def __init__(self, coordinator: KumoDataUpdateCoordinator):
         """Initialize the thermostat."""
 
         super().__init__(coordinator)
-        coordinator.add_update_method(self.update)
         self._name = self._pykumo.get_name()
-        self._target_temperature = None
-        self._target_temperature_low = None
-        self._target_temperature_high = None
-        self._current_humidity = None
-        self._hvac_mode = None
-        self._hvac_action = None
-        self._fan_mode = None
-        self._swing_mode = None
-        self._current_temperature = None
-        self._battery_percent = None
-        self._filter_dirty = None
-        self._defrost = None
-        self._rssi = None
-        self._sensor_rssi = None
-        self._runstate = None
-        self._fan_modes = self._pykumo.get_fan_speeds()
-        self._swing_modes = self._pykumo.get_vane_directions()
+        self._props = _ThermostatProperties(*(None,) * len(_PROPERTY_TABLE))
+        data = coordinator.data or KumoSnapshot()
+        self._fan_modes = list(data.fan_speeds)
+        self._swing_modes = list(data.vane_directions)
         self._hvac_modes = [HVAC_MODE_OFF, HVAC_MODE_COOL]
         self._supported_features = SUPPORT_TARGET_TEMPERATURE | SUPPORT_FAN_MODE
-        if self._pykumo.has_dry_mode():
+        if data.has_dry_mode:
             self._hvac_modes.append(HVAC_MODE_DRY)
-        if self._pykumo.has_heat_mode():
+        if data.has_heat_mode:
             self._hvac_modes.append(HVAC_MODE_HEAT)
-        if self._pykumo.has_vent_mode():
+        if data.has_vent_mode:
             self._hvac_modes.append(HVAC_MODE_FAN_ONLY)
-        if self._pykumo.has_auto_mode():
+        if data.has_auto_mode:
             self._hvac_modes.append(HVAC_MODE_HEAT_COOL)
             self._supported_features |= SUPPORT_TARGET_TEMPERATURE_RANGE
-        if self._pykumo.has_vane_direction():
+        if data.has_vane_direction:
             self._supported_features |= SUPPORT_SWING_MODE
-        for prop in KumoThermostat._update_properties:
-            try:
-                setattr(self, f"_{prop}", None)
-            except AttributeError as err:
-                _LOGGER.debug(
-                    "Kumo %s: Initializing attr %s error: %s",
-                    self._name,
-                    prop,
-                    str(err),
-                )
+        # The account poller has already fetched this unit's status
+        self._refresh_properties()
 
     @property
     def unique_id(self):
@@ -181,24 +207,24 @@ class KumoThermostat(CoordinatedKumoEntity, ClimateEntity):
         # For backwards compatibility, this ID is considered the primary
         return self._identifier
 
-    async def update(self):
-        """Call from HA to trigger a refresh of cached state."""
-        for prop in KumoThermostat._update_properties:
-            self._update_property(prop)
-            if not self.available:
-                # Get out early if it's failing
-                break
-
-    def _update_property(self, prop):
-        """Call to refresh the value of a property -- may block on I/O."""
-        try:
-            do_update = getattr(self, f"_update_{prop}")
-        except AttributeError:
-            _LOGGER.debug(
-                "Kumo %s: %s property updater not implemented", self._name, prop
-            )
-            return
-        do_update()
+    def _refresh_properties(self):
+        """Recompute every property from the coordinator's snapshot.
+
+        Returns whether any property changed.
+        """
+        raw = status_fields(self._coordinator.data)
+        # Queued setpoints are shown until the write is confirmed
+        raw.update(self._coordinator.pending_status)
+        values = []
+        for name, derive in _PROPERTY_TABLE:
+            value = derive(raw)
+            raw[name] = value
+            values.append(value)
+        props = _ThermostatProperties._make(values)
+        if props == self._props:
+            return False
+        self._props = props
+        return True
 
     @property
     def supported_features(self):
@@ -213,43 +239,20 @@ class KumoThermostat(CoordinatedKumoEntity, ClimateEntity):
     @property
     def current_humidity(self):
         """Return the current humidity, if known."""
-        return self._current_humidity
+        return self._props.current_humidity
 
-    def _update_current_humidity(self):
-        """Refresh cached current humidity."""
-        self._current_humidity = self._pykumo.get_current_humidity()
 
     @property
     def hvac_mode(self):
         """Return current hvac operation state."""
-        return self._hvac_mode
+        return self._props.hvac_mode
 
-    def _update_hvac_mode(self):
-        """Refresh cached hvac mode."""
-        mode = self._pykumo.get_mode()
-        try:
-            result = KUMO_STATE_TO_HA[mode]
-        except KeyError:
-            result = None
-        self._hvac_mode = result
 
     @property
     def hvac_action(self):
         """Return current hvac operation in action."""
-        return self._hvac_action
-
-    def _update_hvac_action(self):
-        """Refresh cached hvac action."""
-        standby = self._pykumo.get_standby()
-        if standby:
-            result = CURRENT_HVAC_IDLE
-        else:
-            mode = self._pykumo.get_mode()
-            try:
-                result = KUMO_STATE_TO_HA_ACTION[mode]
-            except KeyError:
-                result = None
-        self._hvac_action = result
+        return self._props.hvac_action
+
 
     @property
     def hvac_modes(self):
@@ -259,11 +262,8 @@ class KumoThermostat(CoordinatedKumoEntity, ClimateEntity):
     @property
     def fan_mode(self):
         """Return current fan setting."""
-        return self._fan_mode
+        return self._props.fan_mode
 
-    def _update_fan_mode(self):
-        """Refresh cached fan mode."""
-        self._fan_mode = self._pykumo.get_fan_speed()
 
     @property
     def fan_modes(self):
@@ -273,11 +273,8 @@ class KumoThermostat(CoordinatedKumoEntity, ClimateEntity):
     @property
     def swing_mode(self):
         """Return current swing setting."""
-        return self._swing_mode
+        return self._props.swing_mode
 
-    def _update_swing_mode(self):
-        """Refresh cached swing mode."""
-        self._swing_mode = self._pykumo.get_vane_direction()
 
     @property
     def swing_modes(self):
@@ -287,135 +284,82 @@ class KumoThermostat(CoordinatedKumoEntity, ClimateEntity):
     @property
     def current_temperature(self):
         """Return the current temperature."""
-        return self._current_temperature
+        return self._props.current_temperature
 
-    def _update_current_temperature(self):
-        """Refresh cached current temperature."""
-        self._current_temperature = self._pykumo.get_current_temperature()
 
     @property
     def target_temperature(self):
         """Return the temperature we try to reach."""
-        return self._target_temperature
-
-    def _update_target_temperature(self):
-        """Refresh the cached target temperature."""
-        temp = None
-        idumode = self.hvac_mode
-        if idumode == HVAC_MODE_HEAT:
-            temp = self._pykumo.get_heat_setpoint()
-        elif idumode == HVAC_MODE_COOL:
-            temp = self._pykumo.get_cool_setpoint()
-        else:
-            temp = None
-        self._target_temperature = temp
+        return self._props.target_temperature
+
 
     @property
     def target_temperature_high(self):
         """Return the high dual setpoint temperature."""
-        return self._target_temperature_high
-
-    def _update_target_temperature_high(self):
-        """Refresh the cached target cooling setpoint."""
-        temp = None
-        idumode = self.hvac_mode
-        if idumode == HVAC_MODE_HEAT_COOL:
-            temp = self._pykumo.get_cool_setpoint()
-        else:
-            temp = None
-        self._target_temperature_high = temp
+        return self._props.target_temperature_high
+
 
     @property
     def target_temperature_low(self):
         """Return the low dual setpoint temperature."""
-        return self._target_temperature_low
-
-    def _update_target_temperature_low(self):
-        """Refresh the cached target heating setpoint."""
-        temp = None
-        idumode = self.hvac_mode
-        if idumode == HVAC_MODE_HEAT_COOL:
-            temp = self._pykumo.get_heat_setpoint()
-        else:
-            temp = None
-        self._target_temperature_low = temp
+        return self._props.target_temperature_low
+
 
     @property
     def battery_percent(self):
         """Return the battery percentage of the attached sensor (if any)."""
-        return self._battery_percent
+        return self._props.battery_percent
 
-    def _update_battery_percent(self):
-        """Refresh the cached battery percentage."""
-        percent = self._pykumo.get_sensor_battery()
-        self._battery_percent = percent
 
     @property
     def filter_dirty(self):
         """Return whether filter is dirty."""
-        return self._filter_dirty
+        return self._props.filter_dirty
 
-    def _update_filter_dirty(self):
-        """Refresh the cached filter_dirty attribute."""
-        dirty = self._pykumo.get_filter_dirty()
-        self._filter_dirty = dirty
 
     @property
     def rssi(self):
         """Return WiFi RSSI, if any."""
-        return self._rssi
+        return self._props.rssi
 
-    def _update_rssi(self):
-        """Refresh the cached rssi attribute."""
-        rssi = self._pykumo.get_wifi_rssi()
-        self._rssi = rssi
 
     @property
     def sensor_rssi(self):
         """Return sensor RSSI, if any."""
-        return self._sensor_rssi
+        return self._props.sensor_rssi
 
-    def _update_sensor_rssi(self):
-        """Refresh the cached sensor_rssi attribute."""
-        rssi = self._pykumo.get_sensor_rssi()
-        self._sensor_rssi = rssi
 
     @property
     def runstate(self):
         """Return unit's current runstate."""
-        return self._runstate
+        return self._props.runstate
 
-    def _update_runstate(self):
-        """Refresh the cached runstate attribute."""
-        runstate = self._pykumo.get_runstate()
-        self._runstate = runstate
 
     @property
     def defrost(self):
         """Return whether in defrost mode."""
-        return self._defrost
+        return self._props.defrost
 
-    def _update_defrost(self):
-        """Refresh the cached defrost attribute."""
-        defrost = self._pykumo.get_defrost()
-        self._defrost = defrost
 
     @property
     def extra_state_attributes(self):
         """Return the state attributes of the device."""
         attr = {}
-        if self._battery_percent is not None:
-            attr[ATTR_BATTERY_LEVEL] = self._battery_percent
-        if self._filter_dirty is not None:
-            attr[ATTR_FILTER_DIRTY] = self._filter_dirty
-        if self._defrost is not None:
-            attr[ATTR_DEFROST] = self._defrost
-        if self._rssi is not None:
-            attr[ATTR_RSSI] = self._rssi
-        if self._sensor_rssi is not None:
-            attr[ATTR_SENSOR_RSSI] = self._sensor_rssi
-        if self._runstate is not None:
-            attr[ATTR_RUNSTATE] = self._runstate
+        if self._props.battery_percent is not None:
+            attr[ATTR_BATTERY_LEVEL] = self._props.battery_percent
+        if self._props.filter_dirty is not None:
+            attr[ATTR_FILTER_DIRTY] = self._props.filter_dirty
+        if self._props.defrost is not None:
+            attr[ATTR_DEFROST] = self._props.defrost
+        if self._props.rssi is not None:
+            attr[ATTR_RSSI] = self._props.rssi
+        if self._props.sensor_rssi is not None:
+            attr[ATTR_SENSOR_RSSI] = self._props.sensor_rssi
+        if self._props.runstate is not None:
+            attr[ATTR_RUNSTATE] = self._props.runstate
+        if self._coordinator.restored:
+            attr[ATTR_RESTORED] = True
+        attr.update(self._coordinator.breaker_attributes())
 
         return attr
 
@@ -428,13 +372,13 @@ class KumoThermostat(CoordinatedKumoEntity, ClimateEntity):
             "manufacturer": "Mitsubishi",
         }
 
-    def async_set_temperature(self, **kwargs):
+    async def async_set_temperature(self, **kwargs):
         """Set new target temperature."""
         _LOGGER.debug(
             "Kumo %s set temp: %s, current mode %s",
             self._name,
-            pprint.pformat(kwargs),
-            self._hvac_mode,
+            kwargs,
+            self._props.hvac_mode,
         )
 
         if not self.available:
@@ -442,7 +386,7 @@ class KumoThermostat(CoordinatedKumoEntity, ClimateEntity):
             return
 
         # Validate arguments
-        current_mode = self._hvac_mode
+        current_mode = self._props.hvac_mode
         proposed_mode = kwargs.get(ATTR_HVAC_MODE)
         target_mode = proposed_mode or current_mode
 
@@ -477,50 +421,29 @@ class KumoThermostat(CoordinatedKumoEntity, ClimateEntity):
             )
             return
 
+        changes = {}
         if current_mode != target_mode:
-            self.async_set_hvac_mode(target_mode)
-
+            changes["mode"] = HA_STATE_TO_KUMO[target_mode]
         if "cool" in target:
-            response = self._pykumo.set_cool_setpoint(target["cool"])
-            _LOGGER.debug(
-                "Kumo %s set %s temp response: %s", self._name, "cool", str(response)
-            )
+            changes["spCool"] = target["cool"]
         if "heat" in target:
-            response = self._pykumo.set_heat_setpoint(target["heat"])
-            _LOGGER.debug(
-                "Kumo %s set %s temp response: %s", self._name, "cool", str(response)
-            )
+            changes["spHeat"] = target["heat"]
+        await self._async_send_changes(changes)
 
-    def async_set_hvac_mode(self, hvac_mode):
+    async def async_set_hvac_mode(self, hvac_mode):
         """Set new target operation mode."""
         try:
             mode = HA_STATE_TO_KUMO[hvac_mode]
         except KeyError:
             mode = "off"
 
-        if not self.available:
-            _LOGGER.warning("Kumo %s is not available", self._name)
-            return
-
-        response = self._pykumo.set_mode(mode)
-        _LOGGER.debug(
-            "Kumo %s set mode %s response: %s", self._name, hvac_mode, response
-        )
+        await self._async_send_changes({"mode": mode})
 
-    def async_set_swing_mode(self, swing_mode):
+    async def async_set_swing_mode(self, swing_mode):
         """Set new vane swing mode."""
-        if not self.available:
-            _LOGGER.warning("Kumo %s is not available", self._name)
-            return
-
-        response = self._pykumo.set_vane_direction(swing_mode)
-        _LOGGER.debug("Kumo %s set swing mode response: %s", self._name, response)
+        await self._async_send_changes({"vaneDir": swing_mode})
 
-    def async_set_fan_mode(self, fan_mode):
+    async def async_set_fan_mode(self, fan_mode):
         """Set new fan speed mode."""
-        if not self.available:
-            _LOGGER.warning("Kumo %s is not available", self._name)
-            return
+        await self._async_send_changes({"fanSpeed": fan_mode})
 
-        response = self._pykumo.set_fan_speed(fan_mode)
-        _LOGGER.debug("Kumo %s set fan speed response: %s", self._name, response)
@@ -5,16 +5,35 @@ import voluptuous as vol
 from homeassistant import config_entries, core, exceptions
 from homeassistant.core import callback
 from homeassistant.util.json import load_json, save_json
-from pykumo import KumoCloudAccount
-from requests.exceptions import ConnectionError
 
-from .const import DOMAIN, KUMO_CONFIG_CACHE
+from .const import (
+    CONF_ASYNC_TRANSPORT,
+    CONF_COMMAND_SETTLE_TIME,
+    CONF_MAX_CONCURRENT_POLLS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_STALE_WHILE_REVALIDATE,
+    CONF_TRACE_MODE,
+    CONF_TRACE_SPEED,
+    DEFAULT_COMMAND_SETTLE_TIME,
+    DEFAULT_MAX_CONCURRENT_POLLS,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_TRACE_SPEED,
+    DOMAIN,
+    KUMO_CONFIG_CACHE,
+    TRACE_MODE_OFF,
+    TRACE_MODE_RECORD,
+    TRACE_MODE_REPLAY,
+)
+from .registry import EMPTY_ADDRESS, KumoUnitRegistry
 
 DEFAULT_PREFER_CACHE = False
 _LOGGER = logging.getLogger(__name__)
 EDIT_KEY = "edit_selection"
 EDIT_TIMEOUT = "Timeouts"
 EDIT_UNITS = "Unit Settings"
+EDIT_POLLING = "Polling Settings"
 
 
 class PlaceholderAccount:
@@ -29,20 +48,37 @@ class PlaceholderAccount:
         self.password = password
 
 
+def _setup_account(username, password):
+    """Log in to KumoCloud and return the account, or None if the login failed.
+
+    pykumo and requests are only needed here, so they are imported on the
+    executor thread rather than when the config flow module is loaded.
+    """
+    # pylint: disable=import-outside-toplevel
+    from pykumo import KumoCloudAccount
+    from requests.exceptions import ConnectionError as RequestsConnectionError
+
+    account = KumoCloudAccount(username, password)
+    try:
+        if not account.try_setup():
+            return None
+    except RequestsConnectionError as err:
+        raise CannotConnect from err
+    return account
+
+
 async def validate_input(hass: core.HomeAssistant, data):
     """Validate the user input allows us to connect.
 
     Data has the keys from DATA_SCHEMA with values provided by the user.
     """
-    account = KumoCloudAccount(data["username"], data["password"])
-    try:
-        result = await hass.async_add_executor_job(account.try_setup)
-    except ConnectionError:
-        raise CannotConnect
-    if not result:
+    account = await hass.async_add_executor_job(
+        _setup_account, data["username"], data["password"]
+    )
+    if account is None:
         raise InvalidAuth
     else:
-        return {"title": data["username"]}
+        return {"title": data["username"], "account": account}
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -63,39 +99,22 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             try:
                 info = await validate_input(self.hass, user_input)
 
-                account = KumoCloudAccount(
-                    user_input["username"], user_input["password"]
-                )
-                await self.hass.async_add_executor_job(account.try_setup)
                 self.kumo_cache = await self.hass.async_add_executor_job(
-                    account.get_raw_json
+                    info["account"].get_raw_json
                 )
                 self.user_account_setup = user_input
                 self.title = info["title"]
-                self.units = []
-                for child in self.kumo_cache[2]["children"]:
-                    for raw_unit in child["zoneTable"].values():
-                        self.units.append(
-                            {
-                                "label": raw_unit["label"],
-                                "ip_address": raw_unit.get("address", "empty"),
-                                "mac": raw_unit["mac"],
-                            }
-                        )
-                    if "children" in child:
-                        for grandchild in child["children"]:
-                            for raw_unit in grandchild["zoneTable"].values():
-                                self.units.append(
-                                    {
-                                        "label": raw_unit["label"],
-                                        "ip_address": raw_unit.get("address", "empty"),
-                                        "mac": raw_unit["mac"],
-                                    }
-                                )
-                ip_addresses = []
-                for x in self.units:
-                    ip_addresses.append(x["ip_address"])
-                if "empty" in ip_addresses:
+                self.registry = KumoUnitRegistry(self.kumo_cache)
+                self.units = [
+                    {
+                        "label": raw_unit["label"],
+                        "ip_address": raw_unit.get("address", EMPTY_ADDRESS),
+                        "mac": raw_unit["mac"],
+                    }
+                    for raw_unit in self.registry.units
+                ]
+                ip_addresses = [x["ip_address"] for x in self.units]
+                if EMPTY_ADDRESS in ip_addresses:
                     return await self.async_step_request_ips()
 
                 else:
@@ -128,22 +147,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_request_ips(self, user_input=None):
         data_schema = {}
         for x in self.units:
-            if x["ip_address"] == "empty":
+            if x["ip_address"] == EMPTY_ADDRESS:
                 data_schema[
                     vol.Required(x["label"], default=x["label"] + " " + x["mac"])
                 ] = str
 
         if user_input is not None:
-            for x in user_input.keys():
-                for child in self.kumo_cache[2]["children"]:
-                    for raw_unit in child["zoneTable"].values():
-                        if x == raw_unit["label"]:
-                            raw_unit["address"] = user_input[x]
-                    if "children" in child:
-                        for grandchild in child["children"]:
-                            for raw_unit in grandchild["zoneTable"].values():
-                                if x == raw_unit["label"]:
-                                    raw_unit["address"] = user_input[x]
+            for label, address in user_input.items():
+                self.registry.set_address(label, address)
             await self.hass.async_add_executor_job(
                 save_json, self.hass.config.path(KUMO_CONFIG_CACHE), self.kumo_cache
             )
@@ -184,13 +195,15 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 return await self.async_step_timeout_settings()
             if user_input[EDIT_KEY] == EDIT_UNITS:
                 return await self.async_step_unit_select()
+            if user_input[EDIT_KEY] == EDIT_POLLING:
+                return await self.async_step_polling_settings()
 
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(
                 {
                     vol.Required(EDIT_KEY, default=EDIT_TIMEOUT): vol.In(
-                        [EDIT_TIMEOUT, EDIT_UNITS]
+                        [EDIT_TIMEOUT, EDIT_UNITS, EDIT_POLLING]
                     )
                 },
             ),
@@ -199,7 +212,9 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_timeout_settings(self, user_input=None):
 
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            return self.async_create_entry(
+                title="", data={**self.config_entry.options, **user_input}
+            )
 
         data_schema = vol.Schema(
             {
@@ -210,39 +225,77 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
         return self.async_show_form(step_id="timeout_settings", data_schema=data_schema)
 
+    async def async_step_polling_settings(self, user_input=None):
+        """Manage how the units are polled."""
+        errors = {}
+        if user_input is not None:
+            if user_input[CONF_MIN_SCAN_INTERVAL] > user_input[CONF_MAX_SCAN_INTERVAL]:
+                errors["base"] = "invalid_scan_interval"
+            else:
+                return self.async_create_entry(
+                    title="", data={**self.config_entry.options, **user_input}
+                )
+
+        options = self.config_entry.options
+        data_schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_ASYNC_TRANSPORT,
+                    default=options.get(CONF_ASYNC_TRANSPORT, True),
+                ): bool,
+                vol.Required(
+                    CONF_MAX_CONCURRENT_POLLS,
+                    default=options.get(CONF_MAX_CONCURRENT_POLLS, DEFAULT_MAX_CONCURRENT_POLLS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Required(
+                    CONF_MIN_SCAN_INTERVAL,
+                    default=options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5)),
+                vol.Required(
+                    CONF_MAX_SCAN_INTERVAL,
+                    default=options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5)),
+                vol.Required(
+                    CONF_COMMAND_SETTLE_TIME,
+                    default=options.get(CONF_COMMAND_SETTLE_TIME, DEFAULT_COMMAND_SETTLE_TIME),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                vol.Required(
+                    CONF_STALE_WHILE_REVALIDATE,
+                    default=options.get(CONF_STALE_WHILE_REVALIDATE, False),
+                ): bool,
+                vol.Required(
+                    CONF_TRACE_MODE,
+                    default=options.get(CONF_TRACE_MODE, TRACE_MODE_OFF),
+                ): vol.In([TRACE_MODE_OFF, TRACE_MODE_RECORD, TRACE_MODE_REPLAY]),
+                vol.Required(
+                    CONF_TRACE_SPEED,
+                    default=options.get(CONF_TRACE_SPEED, DEFAULT_TRACE_SPEED),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            }
+        )
+
+        return self.async_show_form(
+            step_id="polling_settings", data_schema=data_schema, errors=errors
+        )
+
     async def async_step_unit_select(self, user_input=None):
         """Handle options flow."""
 
         kumo_cache = await self.hass.async_add_executor_job(
             load_json, self.hass.config.path(KUMO_CONFIG_CACHE)
         )
-        kumo_unit_list = {}
-        for child in kumo_cache[2]["children"]:
-            for raw_unit in child["zoneTable"].values():
-                kumo_unit_list[str(raw_unit["label"])] = (
-                    str(raw_unit.get("address", "empty")),
-                )
-            if "children" in child:
-                for grandchild in child["children"]:
-                    for raw_unit in grandchild["zoneTable"].values():
-                        kumo_unit_list[str(raw_unit["label"])] = (
-                            str(raw_unit.get("address", "empty")),
-                        )
+        registry = KumoUnitRegistry(kumo_cache)
+        kumo_unit_list = {
+            str(raw_unit["label"]): (str(raw_unit.get("address", EMPTY_ADDRESS)),)
+            for raw_unit in registry.units
+        }
 
         if user_input is not None:
-            for child in kumo_cache[2]["children"]:
-                for raw_unit in child["zoneTable"].values():
-                    if raw_unit["label"] == user_input["unit_label"]:
-                        raw_unit["address"] = user_input["ip_address"]
-                    if "children" in child:
-                        for grandchild in child["children"]:
-                            for raw_unit in grandchild["zoneTable"].values():
-                                if raw_unit["label"] == user_input["unit_label"]:
-                                    raw_unit["address"] = user_input["ip_address"]
+            registry.set_address(user_input["unit_label"], user_input["ip_address"])
             await self.hass.async_add_executor_job(
                 save_json, self.hass.config.path(KUMO_CONFIG_CACHE), kumo_cache
             )
-            return self.async_create_entry(title="", data=None)
+            return self.async_create_entry(title="", data=dict(self.config_entry.options))
 
         data_schema = vol.Schema(
             {
@@ -3,6 +3,8 @@
 from datetime import timedelta
 from typing import Final
 
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
+
 from ..heater_cooler.const import (
     DOMAIN as HEATER_COOLER_DOMAIN
 )
@@ -11,17 +13,60 @@ DEFAULT_NAME = "Kumo"
 DOMAIN = "kumo"
 KUMO_DATA = "data"
 KUMO_DATA_COORDINATORS = "coordinators"
+KUMO_DATA_POLLER = "poller"
+KUMO_DATA_REGISTRY = "registry"
+KUMO_DATA_STATE_STORE = "state_store"
+KUMO_DATA_EXECUTOR = "executor"
+KUMO_DATA_TRANSPORT = "transport"
+KUMO_DATA_REVALIDATION = "revalidation"
+SIGNAL_UNITS_ADDED = "kumo_units_added_{}"
+SIGNAL_UNITS_REMOVED = "kumo_units_removed_{}"
 KUMO_CONFIG_CACHE = "kumo_cache.json"
+STATE_STORAGE_KEY = "kumo.{}.state"
+STATE_STORAGE_VERSION = 1
 CONF_PREFER_CACHE = "prefer_cache"
 CONF_ENABLE_POWER_SWITCH = "enable_power_switch"
 CONF_CONNECT_TIMEOUT = "connect_timeout"
 CONF_RESPONSE_TIMEOUT = "response_timeout"
+CONF_ASYNC_TRANSPORT = "async_transport"
+CONF_STALE_WHILE_REVALIDATE = "stale_while_revalidate"
+CONF_MAX_CONCURRENT_POLLS = "max_concurrent_polls"
+DEFAULT_MAX_CONCURRENT_POLLS = 4
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+DEFAULT_MIN_SCAN_INTERVAL = 10
+DEFAULT_MAX_SCAN_INTERVAL = 300
+CONF_COMMAND_SETTLE_TIME = "command_settle_time"
+DEFAULT_COMMAND_SETTLE_TIME = 1.0
+CONF_TRACE_MODE = "trace_mode"
+TRACE_MODE_OFF = "off"
+TRACE_MODE_RECORD = "record"
+TRACE_MODE_REPLAY = "replay"
+CONF_TRACE_SPEED = "trace_speed"
+DEFAULT_TRACE_SPEED = 1.0
+KUMO_TRACE_FILE = "kumo_trace.jsonl.gz"
+SERVICE_PROFILE = "profile"
+DATA_PROFILING = "kumo_profiling"
 MAX_AVAILABILITY_TRIES = 3 # How many times we will attempt to update from a kumo before marking it unavailable
 
-PLATFORMS: Final = [HEATER_COOLER_DOMAIN]
+PLATFORMS: Final = [HEATER_COOLER_DOMAIN, SENSOR_DOMAIN]
 
 # This is the new way of important platforms, but isn't public yet
 # from homeassistant.const import Platform
 # PLATFORMS: Final = [Platform.CLIMATE, Platform.SENSOR, Platform.SWITCH]
 
 SCAN_INTERVAL = timedelta(seconds=60)
+POLL_TICK_INTERVAL = timedelta(seconds=5) # How often the account poller looks for units that are due
+FAST_POLL_WINDOW = timedelta(seconds=60) # How long a unit is polled at the minimum interval after a write
+SLOW_FIELDS_INTERVAL = timedelta(minutes=10) # How often sensors, profile and WiFi data are re-read
+WRITE_REFRESH_DELAY = timedelta(seconds=3) # How long after a write the unit is re-read to confirm it
+STATE_SAVE_DELAY = timedelta(minutes=1) # How long state changes are batched before the snapshot is written
+SCAN_INTERVAL_BACKOFF = 1.5 # Factor applied to a unit's interval each time its readings are unchanged
+SCAN_INTERVAL_JITTER = 0.1 # Fraction by which each unit's polling interval is randomly stretched or shrunk
+STARTUP_POLL_SPACING = timedelta(seconds=0.5) # Spacing between units in the initial refresh
+STARTUP_POLL_RAMP = timedelta(seconds=30) # Longest the initial refresh is spread over
+BREAKER_MIN_BACKOFF = timedelta(minutes=2) # How long an unreachable unit is left alone after its circuit opens
+BREAKER_MAX_BACKOFF = timedelta(minutes=30) # Upper bound for the doubling backoff of an unreachable unit
+POLL_STATS_WINDOW = 100 # How many recent polls per unit latency percentiles are computed over
+POLL_HISTORY_SIZE = 20 # How many recent polls per unit are kept for diagnostics
+PROFILE_TIMEOUT = timedelta(minutes=2) # Longest the profile service waits for the requested poll cycles
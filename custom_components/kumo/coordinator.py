@@ -1,21 +1,66 @@
 """Coordinator to gather data for the Kumo integration"""
+from __future__ import annotations
 
+import json
 import logging
+import random
 from collections.abc import Awaitable, Callable
-from typing import TypeVar
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import TYPE_CHECKING, Any, List, Optional, TypeVar
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import (DataUpdateCoordinator,
                                                       UpdateFailed)
-from pykumo import PyKumoBase
+from homeassistant.util import dt as dt_util
 
-from .const import SCAN_INTERVAL
+from .const import (
+    BREAKER_MAX_BACKOFF,
+    BREAKER_MIN_BACKOFF,
+    DEFAULT_COMMAND_SETTLE_TIME,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    FAST_POLL_WINDOW,
+    POLL_HISTORY_SIZE,
+    POLL_STATS_WINDOW,
+    SCAN_INTERVAL,
+    SCAN_INTERVAL_BACKOFF,
+    SCAN_INTERVAL_JITTER,
+    SLOW_FIELDS_INTERVAL,
+    WRITE_REFRESH_DELAY,
+)
+from .executor import KumoExecutor
+from .snapshot import KumoSnapshot, build_snapshot, invalid_status_fields
+from .stats import KumoPollStats
+from .transport import (
+    ALL_FIELD_GROUPS,
+    FIELD_GROUP_FAST,
+    KumoLocalTransport,
+    build_status_command,
+    command_succeeded,
+    normalize_status_fields,
+)
+
+if TYPE_CHECKING:
+    from pykumo import PyKumoBase
 
 _LOGGER = logging.getLogger(__name__)
 MAX_AVAILABILITY_TRIES = 3
 
+# Circuit breaker states. An open unit is not polled until its backoff has
+# passed; the next poll is then a single half-open probe.
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
 T = TypeVar("T")
 
+# Status fields whose writes are held back until a burst of changes settles
+SETTLED_STATUS_FIELDS = frozenset(("spCool", "spHeat"))
+
 
 class KumoDataUpdateCoordinator(DataUpdateCoordinator):
     """DataUpdateCoordinator to gather data for a specific Kumo device."""
@@ -24,17 +69,64 @@ class KumoDataUpdateCoordinator(DataUpdateCoordinator):
         self,
         hass: HomeAssistant,
         device: PyKumoBase,
+        transport: Optional[KumoLocalTransport] = None,
+        min_interval: float = DEFAULT_MIN_SCAN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_SCAN_INTERVAL,
+        settle_time: float = DEFAULT_COMMAND_SETTLE_TIME,
+        state_store=None,
+        executor: Optional[KumoExecutor] = None,
+        request_poll: Optional[Callable[[List[str]], Awaitable[None]]] = None,
     ) -> None:
-        """Initialize DataUpdateCoordinator to gather data for specific Kumo device."""
+        """Initialize DataUpdateCoordinator to gather data for specific Kumo device.
+
+        When no transport is given, pykumo's blocking update_status is run in the
+        integration's executor, or Home Assistant's if there is none.
+        The coordinator has no timer of its own; it is refreshed by the account poller
+        once next_poll has passed, and refreshes it requests itself are handed to
+        request_poll. When a state store is given, the last known state is saved to
+        it after every poll that changed it.
+        """
         self.device = device
+        self._transport = transport
+        self._state_store = state_store
+        self._executor = executor
+        self._request_poll = request_poll
+        self._has_state = False
+        self.restored = False
+        self._min_interval = min(min_interval, max_interval)
+        self._max_interval = max(min_interval, max_interval)
+        self._default_interval = self._clamp_interval(SCAN_INTERVAL.total_seconds())
+        self._poll_interval = self._default_interval
+        self._fast_poll_until = 0.0
+        self._last_status = None
+        self._last_action = None
+        self.next_poll = 0.0
+        self.write_request_count = 0
+        self._settle_time = settle_time
+        self._pending_status = {}
+        self._unsub_settle: Optional[CALLBACK_TYPE] = None
         self._available = False
         self._unavailable_count = 0
+        self.breaker_state = BREAKER_CLOSED
+        self.breaker_next_probe: Optional[datetime] = None
+        self._breaker_trips = 0
         self._additional_update_methods = []
-        super().__init__(
+        self.poll_stats = KumoPollStats(POLL_STATS_WINDOW, POLL_HISTORY_SIZE)
+        self._stats_listeners = []
+        self._slow_fields_due = 0.0
+        self._fingerprint = None
+        self._payload_changed = True
+        self.fingerprint_checks = 0
+        self.fingerprint_hits = 0
+        super().__init__(hass, _LOGGER, name=f"kumo_{device.get_serial()}")
+        # Writes request a refresh of just this unit, delayed so that
+        # several writes landing together share one read
+        self._write_refresh_debouncer = Debouncer(
             hass,
             _LOGGER,
-            name=f"kumo_{device.get_serial()}",
-            update_interval=SCAN_INTERVAL,
+            cooldown=WRITE_REFRESH_DELAY.total_seconds(),
+            immediate=False,
+            function=self._async_refresh_requested,
         )
 
     def get_device(self) -> PyKumoBase:
@@ -43,17 +135,265 @@ class KumoDataUpdateCoordinator(DataUpdateCoordinator):
     def get_available(self) -> bool:
         return self._available
 
+    def update_device_config(self, device: PyKumoBase) -> None:
+        """Take over the address and credentials of a freshly created device."""
+        # pylint: disable=protected-access
+        self.device._address = device._address
+        self.device._security = device._security
+
+    def restore_state(self, stored_state: dict) -> bool:
+        """Seed the device with a stored snapshot until the first poll succeeds."""
+        # pylint: disable=protected-access
+        try:
+            status = stored_state["status"]
+            sensors = stored_state["sensors"]
+            profile = stored_state["profile"]
+        except (KeyError, TypeError):
+            _LOGGER.warning("Ignoring malformed stored state for %s", self.device.get_name())
+            return False
+        self.device._status = status
+        self.device._sensors = sensors
+        self.device._profile = profile
+        self.data = build_snapshot(self.device)
+        self._available = True
+        self._has_state = True
+        self.restored = True
+        return True
+
+    def get_state_snapshot(self) -> Optional[dict]:
+        """Return the device state to persist, or None if nothing is known yet."""
+        # pylint: disable=protected-access
+        if not self._has_state:
+            return None
+        return {
+            "status": self.device._status,
+            "sensors": self.device._sensors,
+            "profile": self.device._profile,
+        }
+
+    def get_poll_interval(self) -> float:
+        """Return the current polling interval in seconds."""
+        return self._poll_interval
+
+    def record_write(self) -> None:
+        """Poll at the minimum interval for a while after a command was sent."""
+        now = monotonic()
+        self._fast_poll_until = now + FAST_POLL_WINDOW.total_seconds()
+        self._poll_interval = self._min_interval
+        self.next_poll = min(self.next_poll, now + self._min_interval)
+
+    @property
+    def pending_status(self) -> dict:
+        """Return status changes queued but not yet sent to the device."""
+        return self._pending_status
+
+    async def async_queue_status(self, fields: dict) -> None:
+        """Queue status changes, sending only the latest value of each field.
+
+        Setpoint-only changes wait for the settle window so a burst of them
+        becomes one write. Any other change is sent right away together with
+        whatever is still pending. Raises HomeAssistantError for values the
+        unit does not support, without queuing anything.
+        """
+        self._check_status_fields(fields)
+        self._pending_status.update(fields)
+        self._fingerprint = None
+        self._cancel_settle_timer()
+        if self._settle_time > 0 and fields.keys() <= SETTLED_STATUS_FIELDS:
+            # Each change restarts the window, so only the value a burst ends on is sent
+            self._unsub_settle = async_call_later(
+                self.hass, self._settle_time, self._async_settle_window_passed
+            )
+            return
+        await self._async_flush_pending_status()
+
+    @callback
+    def _cancel_settle_timer(self) -> None:
+        if self._unsub_settle is not None:
+            self._unsub_settle()
+            self._unsub_settle = None
+
+    async def _async_settle_window_passed(self, _now: datetime) -> None:
+        """Send the setpoints once no change has come in for the settle window."""
+        self._unsub_settle = None
+        try:
+            await self._async_flush_pending_status()
+        except HomeAssistantError as err:
+            # Nobody awaits the timer, so drop the optimistic values and re-read the unit
+            _LOGGER.warning("Could not send settled setpoints: %s", err)
+            await self.async_request_refresh()
+
+    async def async_shutdown(self) -> None:
+        """Send what is still queued and stop the follow-up refresh, before unloading.
+
+        Runs while the transport and executor are still up, so a setpoint
+        waiting for its settle window is not lost or sent to a closed executor.
+        """
+        self._cancel_settle_timer()
+        try:
+            await self._async_flush_pending_status()
+        except HomeAssistantError as err:
+            _LOGGER.warning("Could not send queued changes on shutdown: %s", err)
+        self._write_refresh_debouncer.async_cancel()
+
+    async def _async_flush_pending_status(self) -> None:
+        """Send all queued status changes in one write.
+
+        The queue is emptied first, so a failed write is not retried.
+        """
+        fields, self._pending_status = self._pending_status, {}
+        if fields:
+            await self.async_set_status(fields)
+
+    async def async_set_status(self, fields: dict) -> dict:
+        """Send indoor unit status changes to the device in a single request.
+
+        Raises HomeAssistantError when a value is not supported by the unit or
+        the device does not accept the command.
+        """
+        self._check_status_fields(fields)
+        self.write_request_count += 1
+        try:
+            if self._transport is not None:
+                response = await self._transport.async_set_status(self.device, fields)
+            else:
+                response = await self._async_run_blocking(self._set_status, fields)
+        finally:
+            # What is shown now comes from the write, not from the adapter, so the
+            # next poll must replace it even if its payload matches the last one
+            self._fingerprint = None
+        if not command_succeeded(response):
+            raise HomeAssistantError(
+                f"Kumo {self.device.get_name()} did not accept {fields}: {response}"
+            )
+        # The write is reflected in the device status right away
+        self.data = build_snapshot(self.device)
+        self.record_write()
+        await self.async_request_refresh()
+        return response
+
+    async def async_request_refresh(self) -> None:
+        """Request a refresh of this unit, debounced."""
+        await self._write_refresh_debouncer.async_call()
+
+    async def _async_refresh_requested(self) -> None:
+        """Refresh through the account poller so it never overlaps a scheduled poll."""
+        if self._request_poll is None:
+            await self.async_refresh()
+        else:
+            await self._request_poll([self.device.get_serial()])
+
+    def _check_status_fields(self, fields: dict) -> None:
+        """Reject mode, fan speed and vane values the unit's profile does not offer."""
+        invalid = invalid_status_fields(self.data, fields)
+        if invalid:
+            raise HomeAssistantError(
+                f"Kumo {self.device.get_name()} does not support "
+                + ", ".join(f"{field} {fields[field]}" for field in invalid)
+            )
+
+    async def _async_run_blocking(self, target: Callable[..., T], *args) -> T:
+        """Run a blocking pykumo call off the event loop."""
+        if self._executor is not None:
+            return await self._executor.async_run(target, *args)
+        return await self.hass.async_add_executor_job(target, *args)
+
+    def _set_status(self, fields: dict) -> dict:
+        """Send status changes through pykumo's blocking request."""
+        # pylint: disable=protected-access
+        fields = normalize_status_fields(fields)
+        response = self.device._request(build_status_command(fields))
+        if command_succeeded(response):
+            self.device._status.update(fields)
+        return response
+
+    @property
+    def fingerprint_hit_rate(self) -> float:
+        """Return the share of polls whose payload was unchanged."""
+        if not self.fingerprint_checks:
+            return 0.0
+        return self.fingerprint_hits / self.fingerprint_checks
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE, *args: Any) -> Callable[[], None]:
+        """Listen for data updates, skipping polls that returned an unchanged payload.
+
+        Newer Home Assistant versions pass a listener context as well; it is
+        handed on unchanged.
+        """
+
+        @callback
+        def _async_changed_update() -> None:
+            if self._payload_changed:
+                update_callback()
+
+        return super().async_add_listener(_async_changed_update, *args)
+
+    @callback
+    def async_add_stats_listener(self, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        """Listen for poll statistics, which change on every poll."""
+        self._stats_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._stats_listeners.remove(update_callback)
+
+        return remove_listener
+
     def add_update_method(self, update_method: Callable[[], Awaitable[T]]) -> None:
         """Register update methods that will be called after updating status"""
         self._additional_update_methods.append(update_method)
 
-    async def _async_update_data(self) -> None:
-        """Fetch data from Kumo device."""
-        success = await self.hass.async_add_executor_job(self.device.update_status)
+    async def _async_update_data(self) -> Optional[KumoSnapshot]:
+        """Fetch data from Kumo device and return a snapshot of it."""
+        if self.breaker_state == BREAKER_OPEN:
+            self.breaker_state = BREAKER_HALF_OPEN
+        start = monotonic()
+        if self._transport is not None:
+            serial = self.device.get_serial()
+            bytes_before, timeouts_before = self._transport.get_counters(serial)
+            self._transport.pop_last_error(serial)
+            # Rarely changing fields are only re-read every SLOW_FIELDS_INTERVAL
+            if start >= self._slow_fields_due:
+                groups = ALL_FIELD_GROUPS
+            else:
+                groups = {FIELD_GROUP_FAST}
+            success = await self._transport.async_update_status(self.device, groups)
+            if success and groups is ALL_FIELD_GROUPS:
+                self._slow_fields_due = start + SLOW_FIELDS_INTERVAL.total_seconds()
+            bytes_after, timeouts_after = self._transport.get_counters(serial)
+            error = self._transport.pop_last_error(serial)
+            self.poll_stats.record(
+                monotonic() - start,
+                success,
+                timeouts_after - timeouts_before,
+                bytes_after - bytes_before,
+                None if success else error or "unexpected response",
+            )
+        else:
+            success = await self._async_run_blocking(self.device.update_status)
+            # pykumo's blocking requests do not report timeouts, sizes or causes
+            self.poll_stats.record(
+                monotonic() - start, success, error=None if success else "update_status failed"
+            )
         self._update_availability(success)
+        self._adapt_poll_interval(success)
+        self._update_breaker(success)
+        for update_callback in list(self._stats_listeners):
+            update_callback()
+        if success:
+            self._has_state = True
+            self.restored = False
+        self._payload_changed = self._update_fingerprint(success)
         if success:
+            if not self._payload_changed:
+                return self.data
+            self.data = build_snapshot(self.device)
+            if self._state_store is not None:
+                self._state_store.async_schedule_save()
             for update_method in self._additional_update_methods:
                 await update_method()
+            return self.data
         else:
             raise UpdateFailed(f"Failed to update Kumo device: {self.device.get_name()}")
 
@@ -65,3 +405,98 @@ class KumoDataUpdateCoordinator(DataUpdateCoordinator):
             self._unavailable_count += 1
             if self._unavailable_count >= MAX_AVAILABILITY_TRIES:
                 self._available = False
+
+    def _update_breaker(self, success: bool) -> None:
+        """Open the circuit of an unreachable unit, backing off further after each failed probe."""
+        if success:
+            if self.breaker_state != BREAKER_CLOSED:
+                _LOGGER.info("Kumo %s is reachable again", self.device.get_name())
+            self.breaker_state = BREAKER_CLOSED
+            self.breaker_next_probe = None
+            self._breaker_trips = 0
+            return
+        if self.breaker_state == BREAKER_CLOSED and self._unavailable_count < MAX_AVAILABILITY_TRIES:
+            return
+        self._breaker_trips += 1
+        backoff = min(
+            BREAKER_MAX_BACKOFF.total_seconds(),
+            BREAKER_MIN_BACKOFF.total_seconds() * 2 ** (self._breaker_trips - 1),
+        )
+        self.breaker_state = BREAKER_OPEN
+        self.next_poll = monotonic() + backoff
+        self.breaker_next_probe = dt_util.utcnow() + timedelta(seconds=backoff)
+        _LOGGER.warning(
+            "Kumo %s is unreachable; not polling it for %d seconds",
+            self.device.get_name(),
+            backoff,
+        )
+
+    def get_diagnostics(self) -> dict:
+        """Return the unit's schedule, breaker state and recent polls."""
+        return {
+            "available": self._available,
+            "restored": self.restored,
+            "poll_interval": self._poll_interval,
+            "next_poll_in": round(self.next_poll - monotonic(), 1),
+            "slow_fields_due_in": round(self._slow_fields_due - monotonic(), 1),
+            "breaker": self.breaker_attributes(),
+            "fingerprint_hit_rate": self.fingerprint_hit_rate,
+            "write_request_count": self.write_request_count,
+            "pending_status": dict(self._pending_status),
+            "stats": self.poll_stats.as_dict(),
+            "recent_polls": self.poll_stats.as_history(),
+        }
+
+    def breaker_attributes(self) -> dict:
+        """Return the circuit breaker state for use as entity attributes."""
+        attr = {"circuit_breaker": self.breaker_state}
+        if self.breaker_next_probe is not None:
+            attr["next_probe"] = self.breaker_next_probe.isoformat()
+        return attr
+
+    def _update_fingerprint(self, success: bool) -> bool:
+        """Fingerprint the raw payload, availability and breaker state; return whether it changed."""
+        # pylint: disable=protected-access
+        payload = None
+        if success:
+            payload = json.dumps(
+                [self.device._status, self.device._sensors, self.device._profile],
+                sort_keys=True,
+                default=str,
+            )
+        fingerprint = hash((payload, self._available, self.breaker_state))
+        self.fingerprint_checks += 1
+        if fingerprint == self._fingerprint:
+            self.fingerprint_hits += 1
+            return False
+        self._fingerprint = fingerprint
+        return True
+
+    def _clamp_interval(self, interval: float) -> float:
+        return max(self._min_interval, min(self._max_interval, interval))
+
+    def _adapt_poll_interval(self, success: bool) -> None:
+        """Pick the next polling interval from how the unit's readings changed."""
+        now = monotonic()
+        if not success:
+            interval = self._default_interval
+        else:
+            status = dict(self.device.get_status())
+            action = (status.get("mode"), status.get("standby"))
+            if now < self._fast_poll_until or (
+                self._last_action is not None and action != self._last_action
+            ):
+                interval = self._min_interval
+            elif status.get("mode") == "off":
+                interval = self._max_interval
+            elif status == self._last_status:
+                interval = self._clamp_interval(self._poll_interval * SCAN_INTERVAL_BACKOFF)
+            else:
+                interval = self._default_interval
+            self._last_status = status
+            self._last_action = action
+        self._poll_interval = interval
+        # Jitter keeps units that happen to share an interval from polling in lockstep
+        self.next_poll = now + interval * random.uniform(
+            1 - SCAN_INTERVAL_JITTER, 1 + SCAN_INTERVAL_JITTER
+        )
@@ -0,0 +1,76 @@
+"""Diagnostics support for the Kumo integration"""
+from __future__ import annotations
+
+import os
+from time import time
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN,
+    KUMO_CONFIG_CACHE,
+    KUMO_DATA_COORDINATORS,
+    KUMO_DATA_EXECUTOR,
+    KUMO_DATA_POLLER,
+    KUMO_DATA_REGISTRY,
+    KUMO_DATA_TRANSPORT,
+)
+
+# Credentials and personal details in the config entry and the KumoCloud account tree
+TO_REDACT = {
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    "cryptoSerial",
+    "email",
+    "token",
+    "mac",
+    "address",
+    "latitude",
+    "longitude",
+}
+
+
+def _cache_age(path: str):
+    """Return the age of the KumoCloud cache file in seconds, or None if there is none."""
+    try:
+        return round(time() - os.path.getmtime(path))
+    except OSError:
+        return None
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    registry = entry_data.get(KUMO_DATA_REGISTRY)
+    poller = entry_data.get(KUMO_DATA_POLLER)
+    executor = entry_data.get(KUMO_DATA_EXECUTOR)
+    transport = entry_data.get(KUMO_DATA_TRANSPORT)
+    coordinators = entry_data.get(KUMO_DATA_COORDINATORS, {})
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "account": async_redact_data(registry.get_raw_json(), TO_REDACT) if registry else None,
+        "cache_age": await hass.async_add_executor_job(
+            _cache_age, hass.config.path(KUMO_CONFIG_CACHE)
+        ),
+        "poller": {
+            "last_cycle_duration": poller.last_cycle_duration,
+            "startup_schedule": poller.startup_schedule,
+            "phase_offsets": poller.phase_offsets,
+        } if poller else None,
+        "executor": executor.metrics() if executor else None,
+        "transport": {
+            "type": type(transport).__name__,
+            "request_count": transport.request_count,
+        } if transport else None,
+        "units": {
+            serial: coordinator.get_diagnostics()
+            for serial, coordinator in coordinators.items()
+        },
+    }
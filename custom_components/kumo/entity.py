@@ -1,11 +1,19 @@
 """Entities for The Internet Printing Protocol (IPP) integration."""
 from __future__ import annotations
 
+import logging
+
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import DOMAIN, SIGNAL_UNITS_REMOVED
 from .coordinator import KumoDataUpdateCoordinator
+from .snapshot import status_fields
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class CoordinatedKumoEntity(CoordinatorEntity):
@@ -20,6 +28,76 @@ class CoordinatedKumoEntity(CoordinatorEntity):
         self._coordinator = coordinator
         self._pykumo = coordinator.get_device()
         self._identifier = self._pykumo.get_serial()
+        self._last_written_flags = None
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to coordinator updates and to removal of units from the entry."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_UNITS_REMOVED.format(self.platform.config_entry.entry_id),
+                self._async_units_removed,
+            )
+        )
+
+    @callback
+    def _async_units_removed(self, serials) -> None:
+        """Remove this entity when its unit is gone from the KumoCloud account."""
+        if self._identifier not in serials:
+            return
+        registry = entity_registry.async_get(self.hass)
+        if self.registry_entry is not None and registry.async_get(self.entity_id):
+            registry.async_remove(self.entity_id)
+        else:
+            self.hass.async_create_task(self.async_remove(force_remove=True))
+
+    def _refresh_properties(self) -> bool:
+        """Recompute the state the entity caches from the coordinator's snapshot.
+
+        Returns whether any of it changed. Entities that read the snapshot on
+        demand cache nothing, so for them every update counts as a change.
+        """
+        return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when a visible property, availability, restored flag or breaker changed."""
+        props_changed = self._refresh_properties()
+        flags = (self.available, self._coordinator.restored, self._coordinator.breaker_state)
+        if not props_changed and flags == self._last_written_flags:
+            return
+        self._last_written_flags = flags
+        self.async_write_ha_state()
+
+    async def _async_send_changes(self, changes: dict) -> None:
+        """Queue the fields changed by one service call as a single status write."""
+        if not self.available:
+            _LOGGER.warning("Kumo %s is not available", self._name)
+            return
+        if not await self._async_queue_changes(changes):
+            return
+        # Show the written or queued values until the follow-up refresh confirms them
+        if self._refresh_properties():
+            self.async_write_ha_state()
+
+    async def _async_queue_changes(self, changes: dict) -> bool:
+        """Queue the status fields that differ from the unit's state as one write.
+
+        Returns whether anything was queued.
+        """
+        status = status_fields(self._coordinator.data)
+        pending = self._coordinator.pending_status
+        changes = {
+            field: value for field, value in changes.items()
+            if field in pending or status.get(field) != value
+        }
+        if not changes:
+            return False
+
+        _LOGGER.debug("Kumo %s queue %s", self._pykumo.get_name(), changes)
+        await self._coordinator.async_queue_status(changes)
+        return True
 
     @property
     def device_info(self) -> DeviceInfo | None:
@@ -33,11 +111,6 @@ class CoordinatedKumoEntity(CoordinatorEntity):
             name=self._pykumo.get_name(),
         )
 
-    @property
-    def should_poll(self):
-        """Return the polling state."""
-        return True
-
     @property
     def available(self):
         """Return whether Home Assistant is able to read the state and control the underlying device."""
@@ -0,0 +1,108 @@
+"""Bounded thread pool for the Kumo integration's blocking I/O"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from time import monotonic
+from typing import Callable, TypeVar
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class KumoExecutor:
+    """Run blocking pykumo and file calls on threads owned by the integration.
+
+    A hung adapter can then only tie up this pool, never Home Assistant's
+    shared executor. The pool tracks how many jobs wait for a thread and how
+    long they waited.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_workers: int = 1) -> None:
+        """Initialize the pool."""
+        self._hass = hass
+        self._lock = threading.Lock()
+        self.max_workers = max_workers
+        self._pool = self._create_pool(max_workers)
+        self.queue_depth = 0
+        self.active = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @staticmethod
+    def _create_pool(max_workers: int) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kumo")
+
+    @property
+    def average_wait(self) -> float:
+        """Return the mean time jobs waited for a thread, in seconds."""
+        if not self.completed:
+            return 0.0
+        return self.total_wait / self.completed
+
+    def resize(self, max_workers: int) -> None:
+        """Replace the pool with one of the given size.
+
+        Jobs already submitted finish on the old pool's threads.
+        """
+        if max_workers == self.max_workers:
+            return
+        old_pool, self._pool = self._pool, self._create_pool(max_workers)
+        self.max_workers = max_workers
+        old_pool.shutdown(wait=False)
+        _LOGGER.debug("Kumo executor resized to %d threads", max_workers)
+
+    async def async_run(self, target: Callable[..., T], *args) -> T:
+        """Run target(*args) on the pool and return its result."""
+        job = {"started": False}
+        with self._lock:
+            self.queue_depth += 1
+        future = self._pool.submit(self._run, job, monotonic(), target, args)
+        future.add_done_callback(partial(self._job_done, job))
+        return await asyncio.wrap_future(future)
+
+    def _job_done(self, job: dict, _future: Future) -> None:
+        # Jobs dropped by shutdown never start, but still leave the queue
+        with self._lock:
+            if not job["started"]:
+                self.queue_depth -= 1
+
+    def _run(self, job: dict, submitted: float, target: Callable[..., T], args) -> T:
+        wait = monotonic() - submitted
+        with self._lock:
+            job["started"] = True
+            self.queue_depth -= 1
+            self.active += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        try:
+            return target(*args)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    def metrics(self) -> dict:
+        """Return the pool's size, queue depth and wait times."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self.queue_depth,
+                "active": self.active,
+                "completed": self.completed,
+                "average_wait": self.average_wait,
+                "max_wait": self.max_wait,
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs and drop the ones not started yet.
+
+        Threads stuck on an adapter are not waited for.
+        """
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,5 +1,7 @@
 """HomeAssistant climate component for KumoCloud connected HVAC units."""
 import logging
+from collections import namedtuple
+from operator import attrgetter
 
 import voluptuous as vol
 from homeassistant.components.climate import PLATFORM_SCHEMA
@@ -8,6 +10,7 @@ from homeassistant.exceptions import ConfigEntryNotReady
 from .const import DOMAIN
 from .coordinator import KumoDataUpdateCoordinator
 from .entity import CoordinatedKumoEntity
+from .snapshot import SNAPSHOT_FIELD_BY_STATUS_FIELD, KumoSnapshot
 
 from ..heater_cooler import (
     HeaterCoolerEntity
@@ -15,17 +18,20 @@ from ..heater_cooler import (
 
 import homeassistant.helpers.config_validation as cv
 from homeassistant.components.climate.const import (
-    CURRENT_HVAC_COOL, CURRENT_HVAC_DRY, CURRENT_HVAC_FAN, CURRENT_HVAC_HEAT,
+    ATTR_TARGET_TEMP_HIGH, ATTR_TARGET_TEMP_LOW, CURRENT_HVAC_COOL, CURRENT_HVAC_DRY, CURRENT_HVAC_FAN, CURRENT_HVAC_HEAT,
     CURRENT_HVAC_IDLE, CURRENT_HVAC_OFF, HVAC_MODE_COOL, HVAC_MODE_DRY,
     HVAC_MODE_FAN_ONLY, HVAC_MODE_HEAT, HVAC_MODE_HEAT_COOL, HVAC_MODE_OFF)
 from homeassistant.config_entries import ConfigEntry
-
+from homeassistant.const import ATTR_TEMPERATURE, TEMP_CELSIUS
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.typing import HomeAssistantType
 
 from .const import (
     CONF_ENABLE_POWER_SWITCH,
-    KUMO_DATA,
-    KUMO_DATA_COORDINATORS
+    KUMO_DATA_COORDINATORS,
+    KUMO_DATA_REGISTRY,
+    SIGNAL_UNITS_ADDED,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -83,29 +89,81 @@ KUMO_STATE_TO_HA_ACTION = {
 
 async def async_setup_entry(hass: HomeAssistantType, entry: ConfigEntry, async_add_entities):
     """Set up the Kumo thermostats."""
-    account = hass.data[DOMAIN][entry.entry_id][KUMO_DATA].get_account()
-    coordinators = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]
+    entry_data = hass.data[DOMAIN][entry.entry_id]
     enable_power_switch = entry.data.get(CONF_ENABLE_POWER_SWITCH)
 
-    if enable_power_switch:
+    @callback
+    def _async_add_units(serials):
+        registry = entry_data[KUMO_DATA_REGISTRY]
+        coordinators = entry_data[KUMO_DATA_COORDINATORS]
+        indoor_unit_serials = set(registry.indoor_unit_serials())
         entities = []
-        indoor_unit_serials = await hass.async_add_executor_job(account.get_indoor_units)
-        for serial in indoor_unit_serials:
-            coordinator = coordinators[serial]
+        for serial in serials:
+            coordinator = coordinators.get(serial)
+            if coordinator is None or serial not in indoor_unit_serials:
+                continue
             switch = KumoHeaterCooler(coordinator)
             entities.append(switch)
             _LOGGER.debug("Adding entity: %s", coordinator.get_device().get_name())
-        if not entities:
+        if entities:
+            async_add_entities(entities)
+        return entities
+
+    if enable_power_switch:
+        if not _async_add_units(entry_data[KUMO_DATA_REGISTRY].indoor_unit_serials()):
             raise ConfigEntryNotReady("Kumo integration found no indoor units")
-        async_add_entities(entities, True)
+        entry.async_on_unload(
+            async_dispatcher_connect(hass, SIGNAL_UNITS_ADDED.format(entry.entry_id), _async_add_units)
+        )
+
+def _derive_hvac_action(data):
+    if data.mode is None:
+        return None
+    if data.standby:
+        return CURRENT_HVAC_IDLE
+    return KUMO_STATE_TO_HA_ACTION.get(data.mode)
+
+
+# Heater-cooler property and how it is derived from the coordinator's snapshot
+_PROPERTY_TABLE = (
+    ("is_on", lambda data: None if data.mode is None else data.mode != KUMO_STATE_OFF),
+    ("hvac_mode", lambda data: KUMO_STATE_TO_HA.get(data.mode)),
+    ("hvac_action", _derive_hvac_action),
+    ("current_temperature", attrgetter("room_temp")),
+    ("target_temperature_high", attrgetter("sp_cool")),
+    ("target_temperature_low", attrgetter("sp_heat")),
+    ("current_humidity", attrgetter("humidity")),
+    ("fan_mode", attrgetter("fan_speed")),
+    ("swing_mode", attrgetter("vane_dir")),
+)
+_HeaterCoolerProperties = namedtuple(
+    "_HeaterCoolerProperties", [name for name, _ in _PROPERTY_TABLE]
+)
+
 
 class KumoHeaterCooler(CoordinatedKumoEntity, HeaterCoolerEntity):
+    """Power, mode, thresholds and fan of a Kumo indoor unit as a heater-cooler.
+
+    All state comes from the coordinator's snapshot, so the entity adds no
+    device traffic of its own.
+    """
 
     def __init__(self, coordinator: KumoDataUpdateCoordinator):
         """Initialize the switch."""
         super().__init__(coordinator)
-        coordinator.add_update_method(self.update)
         self._name = self._pykumo.get_name()
+        self._props = _HeaterCoolerProperties(*(None,) * len(_PROPERTY_TABLE))
+        data = coordinator.data or KumoSnapshot()
+        self._fan_modes = list(data.fan_speeds)
+        self._swing_modes = list(data.vane_directions)
+        self._hvac_modes = [HVAC_MODE_OFF, HVAC_MODE_COOL]
+        if data.has_heat_mode:
+            self._hvac_modes.append(HVAC_MODE_HEAT)
+        if data.has_auto_mode:
+            self._hvac_modes.append(HVAC_MODE_HEAT_COOL)
+        # Mode restored by turn_on; the unit's own mode once it is seen running
+        self._last_on_mode = HVAC_MODE_HEAT_COOL if data.has_auto_mode else HVAC_MODE_COOL
+        self._refresh_properties()
         _LOGGER.debug("[__init__] loaded Kumo switch %s;", self._name)
 
     @property
@@ -114,8 +172,133 @@ class KumoHeaterCooler(CoordinatedKumoEntity, HeaterCoolerEntity):
         # For backwards compatibility, this ID is considered the primary
         return self._identifier
 
-    async def update(self):
-        _LOGGER.error("[KumoHeaterCooler] update failed")
-        if not self.available:
-            # Get out early if it's failing
+    def _refresh_properties(self):
+        """Recompute every property from the coordinator's snapshot.
+
+        Returns whether any property changed.
+        """
+        data = (self._coordinator.data or KumoSnapshot())._replace(
+            **{
+                SNAPSHOT_FIELD_BY_STATUS_FIELD[field]: value
+                for field, value in self._coordinator.pending_status.items()
+                if field in SNAPSHOT_FIELD_BY_STATUS_FIELD
+            }
+        )
+        props = _HeaterCoolerProperties._make(derive(data) for _, derive in _PROPERTY_TABLE)
+        if props.is_on and props.hvac_mode in self._hvac_modes:
+            self._last_on_mode = props.hvac_mode
+        if props == self._props:
+            return False
+        self._props = props
+        return True
+
+    @property
+    def temperature_unit(self):
+        """Return the unit of measurement which this unit uses."""
+        return TEMP_CELSIUS
+
+    @property
+    def is_on(self):
+        """Return whether the unit is running in any mode."""
+        return self._props.is_on
+
+    @property
+    def hvac_mode(self):
+        """Return the target heater-cooler mode."""
+        return self._props.hvac_mode
+
+    @property
+    def hvac_modes(self):
+        """Return the supported heater-cooler modes."""
+        return self._hvac_modes
+
+    @property
+    def hvac_action(self):
+        """Return what the unit is currently doing."""
+        return self._props.hvac_action
+
+    @property
+    def current_temperature(self):
+        """Return the current room temperature."""
+        return self._props.current_temperature
+
+    @property
+    def current_humidity(self):
+        """Return the current humidity, if known."""
+        return self._props.current_humidity
+
+    @property
+    def target_temperature_high(self):
+        """Return the cooling threshold temperature."""
+        return self._props.target_temperature_high
+
+    @property
+    def target_temperature_low(self):
+        """Return the heating threshold temperature."""
+        return self._props.target_temperature_low
+
+    @property
+    def fan_mode(self):
+        """Return the fan setting."""
+        return self._props.fan_mode
+
+    @property
+    def fan_modes(self):
+        """Return the list of available fan modes."""
+        return self._fan_modes
+
+    @property
+    def swing_mode(self):
+        """Return the vane setting."""
+        return self._props.swing_mode
+
+    @property
+    def swing_modes(self):
+        """Return the list of available vane settings."""
+        return self._swing_modes
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes of the device."""
+        return self._coordinator.breaker_attributes()
+
+    async def async_turn_on(self, **kwargs):
+        """Turn the unit on in the mode it last ran in."""
+        await self.async_set_hvac_mode(self._last_on_mode)
+
+    async def async_turn_off(self, **kwargs):
+        """Turn the unit off."""
+        await self.async_set_hvac_mode(HVAC_MODE_OFF)
+
+    async def async_set_hvac_mode(self, hvac_mode):
+        """Set the heater-cooler mode."""
+        mode = HA_STATE_TO_KUMO.get(hvac_mode)
+        if mode is None:
+            _LOGGER.warning("Kumo %s unsupported mode %s", self._name, hvac_mode)
             return
+        await self._async_send_changes({"mode": mode})
+
+    async def async_set_temperature(self, **kwargs):
+        """Set the cooling and/or heating threshold temperatures."""
+        changes = {}
+        if kwargs.get(ATTR_TARGET_TEMP_HIGH) is not None:
+            changes["spCool"] = kwargs[ATTR_TARGET_TEMP_HIGH]
+        if kwargs.get(ATTR_TARGET_TEMP_LOW) is not None:
+            changes["spHeat"] = kwargs[ATTR_TARGET_TEMP_LOW]
+        if kwargs.get(ATTR_TEMPERATURE) is not None:
+            if self._props.hvac_mode == HVAC_MODE_HEAT:
+                changes["spHeat"] = kwargs[ATTR_TEMPERATURE]
+            else:
+                changes["spCool"] = kwargs[ATTR_TEMPERATURE]
+        if "spCool" in changes and "spHeat" in changes and changes["spCool"] < changes["spHeat"]:
+            _LOGGER.warning("Kumo %s thresholds are inverted", self._name)
+            changes["spCool"] = changes["spHeat"]
+        await self._async_send_changes(changes)
+
+    async def async_set_fan_mode(self, fan_mode):
+        """Set new fan speed mode."""
+        await self._async_send_changes({"fanSpeed": fan_mode})
+
+    async def async_set_swing_mode(self, swing_mode):
+        """Set new vane swing mode."""
+        await self._async_send_changes({"vaneDir": swing_mode})
@@ -0,0 +1,181 @@
+"""Account-wide poller driving the Kumo device coordinators"""
+
+import asyncio
+import logging
+import zlib
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import Dict, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import POLL_TICK_INTERVAL, STARTUP_POLL_RAMP, STARTUP_POLL_SPACING
+from .coordinator import KumoDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def serial_phase(serial: str) -> float:
+    """Return a stable offset in [0, 1) derived from a unit's serial number."""
+    return zlib.crc32(serial.encode("utf-8")) / 2 ** 32
+
+
+class KumoAccountPoller:
+    """Poll the units of a KumoCloud account in shared cycles with bounded concurrency.
+
+    Each tick polls every unit whose coordinator says it is due, so units with
+    short adaptive intervals are polled often while idle ones back off. Polls
+    started with stagger, like the startup ramp, are spread out by serial
+    number so the adapters are not all hit at once; the offsets used are kept
+    in startup_schedule. Units polled together without stagger, like those with
+    no stored state at setup, have their next poll shifted by the same serial
+    phase instead; those offsets are kept in phase_offsets.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinators: Dict[str, KumoDataUpdateCoordinator],
+        max_concurrency: int,
+        interval: timedelta = POLL_TICK_INTERVAL,
+    ) -> None:
+        """Initialize the poller for the given coordinators."""
+        self._hass = hass
+        self._coordinators = coordinators
+        self._interval = interval
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = set()
+        self._unsub_interval: Optional[CALLBACK_TYPE] = None
+        self._startup_task: Optional[asyncio.Task] = None
+        self.stopped = False
+        self.last_cycle_duration: Optional[float] = None
+        self.startup_schedule: Dict[str, float] = {}
+        self.phase_offsets: Dict[str, float] = {}
+        self.cycle_count = 0
+        self._cycle_waiters = []
+
+    @callback
+    def async_start(self) -> None:
+        """Start polling on the account-wide interval."""
+        if self._unsub_interval is None and not self.stopped:
+            self._unsub_interval = async_track_time_interval(
+                self._hass, self._handle_interval, self._interval
+            )
+
+    @callback
+    def async_start_ramp(self, serials) -> None:
+        """Poll the given units in the background, spread over the startup ramp."""
+        if serials and not self.stopped:
+            self._startup_task = self._hass.async_create_task(self.async_poll(serials, stagger=True))
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop polling; polls already waiting for their turn are dropped."""
+        self.stopped = True
+        # No cycles will follow; release whoever waits for them
+        for _target, waiter in self._cycle_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        if self._startup_task is not None:
+            self._startup_task.cancel()
+            self._startup_task = None
+        if self._unsub_interval is not None:
+            self._unsub_interval()
+            self._unsub_interval = None
+
+    async def _handle_interval(self, _now: datetime) -> None:
+        """Poll the units that are due."""
+        now = monotonic()
+        await self.async_poll(
+            [serial for serial, coordinator in self._coordinators.items()
+             if coordinator.next_poll <= now]
+        )
+
+    def get_schedule(self) -> Dict[str, float]:
+        """Return the monotonic time at which each unit is next due."""
+        return {serial: coordinator.next_poll for serial, coordinator in self._coordinators.items()}
+
+    def compute_startup_schedule(self, serials) -> Dict[str, float]:
+        """Spread the given units over the startup ramp; return their delays in seconds."""
+        span = min(
+            STARTUP_POLL_RAMP.total_seconds(),
+            STARTUP_POLL_SPACING.total_seconds() * len(serials),
+        )
+        schedule = {serial: span * serial_phase(serial) for serial in serials}
+        self.startup_schedule.update(schedule)
+        return schedule
+
+    @callback
+    def async_offset_next_polls(self, serials) -> Dict[str, float]:
+        """Shift the next poll of units that were polled together by their serial phase.
+
+        Returns the offsets in seconds, a share of each unit's poll interval.
+        """
+        offsets = {}
+        for serial in serials:
+            coordinator = self._coordinators.get(serial)
+            if coordinator is None:
+                continue
+            offsets[serial] = serial_phase(serial) * coordinator.get_poll_interval()
+            coordinator.next_poll += offsets[serial]
+        self.phase_offsets.update(offsets)
+        return offsets
+
+    async def async_poll(self, serials=None, stagger: bool = False) -> None:
+        """Poll the given units (all by default), at most max_concurrency at a time.
+
+        Units still being polled from an earlier cycle are skipped. With stagger,
+        each unit waits for its startup_schedule delay before it is polled.
+        """
+        if self.stopped:
+            return
+        if serials is None:
+            serials = list(self._coordinators)
+        serials = [serial for serial in serials if serial not in self._in_flight]
+        if not serials:
+            return
+        delays = self.compute_startup_schedule(serials) if stagger else {}
+        self._in_flight.update(serials)
+        start = monotonic()
+        await asyncio.gather(
+            *(self._async_poll_unit(serial, delays.get(serial, 0)) for serial in serials)
+        )
+        self.last_cycle_duration = monotonic() - start
+        self.cycle_count += 1
+        self._notify_cycle_waiters()
+        _LOGGER.debug(
+            "Polled %d Kumo units in %.3f seconds",
+            len(serials),
+            self.last_cycle_duration,
+        )
+
+    async def async_wait_cycles(self, cycles: int) -> None:
+        """Wait until the given number of further poll cycles have completed, or polling stops."""
+        waiter = self._hass.loop.create_future()
+        self._cycle_waiters.append((self.cycle_count + cycles, waiter))
+        try:
+            await waiter
+        finally:
+            self._cycle_waiters = [
+                (target, other) for target, other in self._cycle_waiters if other is not waiter
+            ]
+
+    def _notify_cycle_waiters(self) -> None:
+        for target, waiter in self._cycle_waiters:
+            if target <= self.cycle_count and not waiter.done():
+                waiter.set_result(None)
+
+    async def _async_poll_unit(self, serial: str, delay: float = 0) -> None:
+        """Refresh a single coordinator once a concurrency slot is free."""
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            coordinator = self._coordinators.get(serial)
+            if coordinator is None or self.stopped:
+                return
+            async with self._semaphore:
+                if not self.stopped:
+                    await coordinator.async_refresh()
+        finally:
+            self._in_flight.discard(serial)
@@ -0,0 +1,179 @@
+"""Indexed view of the units in a cached KumoCloud account tree"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from pykumo import PyKumoBase
+
+_LOGGER = logging.getLogger(__name__)
+
+UNIT_TYPE_HEADLESS = "headless"
+EMPTY_ADDRESS = "empty"
+# Unit fields that matter for talking to a unit; a change in any of them is applied in place
+UNIT_CONFIG_FIELDS = ("address", "password", "cryptoSerial", "unitType", "mac")
+
+
+class KumoUnitRegistry:
+    """Parse the KumoCloud account tree once and index its units.
+
+    The tree is walked iteratively, so zones nested at any depth are found.
+    Units are the raw zoneTable dicts of the tree, so changes made through the
+    registry are reflected when the tree is saved back to the cache.
+    """
+
+    def __init__(self, kumo_dict) -> None:
+        """Build the indexes for the given raw account tree."""
+        self._kumo_dict = kumo_dict
+        self._by_serial: Dict[str, dict] = {}
+        self._by_label: Dict[str, dict] = {}
+        self._by_mac: Dict[str, dict] = {}
+        self._by_address: Dict[str, dict] = {}
+
+        try:
+            stack = list(reversed(kumo_dict[2]["children"]))
+        except (IndexError, KeyError, TypeError):
+            _LOGGER.warning("KumoCloud account tree has no children")
+            stack = []
+        while stack:
+            node = stack.pop()
+            for raw_unit in node.get("zoneTable", {}).values():
+                self._add(raw_unit)
+            stack.extend(reversed(node.get("children", [])))
+
+    def _add(self, raw_unit: dict) -> None:
+        serial = raw_unit.get("serial")
+        if serial is not None:
+            self._by_serial[serial] = raw_unit
+        if "label" in raw_unit:
+            self._by_label[str(raw_unit["label"])] = raw_unit
+        if "mac" in raw_unit:
+            self._by_mac[raw_unit["mac"]] = raw_unit
+        if raw_unit.get("address"):
+            self._by_address[raw_unit["address"]] = raw_unit
+
+    def get_raw_json(self):
+        """Return the raw account tree."""
+        return self._kumo_dict
+
+    @property
+    def units(self) -> List[dict]:
+        """Return all units in tree order."""
+        return list(self._by_serial.values())
+
+    def serials(self) -> List[str]:
+        """Return the serial numbers of all units."""
+        return list(self._by_serial)
+
+    def indoor_unit_serials(self) -> List[str]:
+        """Return the serial numbers of indoor units."""
+        return [
+            serial for serial, unit in self._by_serial.items()
+            if unit.get("unitType") != UNIT_TYPE_HEADLESS
+        ]
+
+    def kumo_station_serials(self) -> List[str]:
+        """Return the serial numbers of Kumo Stations."""
+        return [
+            serial for serial, unit in self._by_serial.items()
+            if unit.get("unitType") == UNIT_TYPE_HEADLESS
+        ]
+
+    def get_by_serial(self, serial: str) -> Optional[dict]:
+        return self._by_serial.get(serial)
+
+    def get_by_label(self, label: str) -> Optional[dict]:
+        return self._by_label.get(str(label))
+
+    def get_by_mac(self, mac: str) -> Optional[dict]:
+        return self._by_mac.get(mac)
+
+    def get_by_address(self, address: str) -> Optional[dict]:
+        return self._by_address.get(address)
+
+    def set_address(self, label: str, address: str) -> bool:
+        """Set the local IP address of the unit with the given label."""
+        raw_unit = self.get_by_label(label)
+        if raw_unit is None:
+            return False
+        old_address = raw_unit.get("address")
+        if old_address and self._by_address.get(old_address) is raw_unit:
+            del self._by_address[old_address]
+        raw_unit["address"] = address
+        if address:
+            self._by_address[address] = raw_unit
+        return True
+
+    def keep_addresses(self, older: "KumoUnitRegistry") -> List[str]:
+        """Take over local addresses that KumoCloud left out from an older registry.
+
+        Addresses entered during configuration are only kept in the cache, so
+        a tree fresh from KumoCloud lacks them. Returns the serials filled in.
+        """
+        kept = []
+        for serial, raw_unit in self._by_serial.items():
+            if raw_unit.get("address") not in (None, "", EMPTY_ADDRESS):
+                continue
+            older_unit = older.get_by_serial(serial)
+            address = older_unit.get("address") if older_unit is not None else None
+            if address in (None, "", EMPTY_ADDRESS):
+                continue
+            raw_unit["address"] = address
+            self._by_address[address] = raw_unit
+            kept.append(serial)
+        return kept
+
+    def diff(self, other: "KumoUnitRegistry"):
+        """Compare with a newer registry.
+
+        Returns the serials that were added, removed and changed in `other`.
+        """
+        added = [serial for serial in other._by_serial if serial not in self._by_serial]
+        removed = [serial for serial in self._by_serial if serial not in other._by_serial]
+        changed = [
+            serial for serial, unit in other._by_serial.items()
+            if serial in self._by_serial and any(
+                unit.get(field) != self._by_serial[serial].get(field)
+                for field in UNIT_CONFIG_FIELDS
+            )
+        ]
+        return added, removed, changed
+
+    def make_pykumos(self, timeouts=None) -> Dict[str, PyKumoBase]:
+        """Create a pykumo object for every unit, keyed by serial.
+
+        Names are de-duplicated the same way pykumo's KumoCloudAccount does.
+        """
+        # pylint: disable=import-outside-toplevel
+        from pykumo import PyKumo
+        from pykumo.py_kumo_cloud_account import KUMO_UNIT_TYPE_TO_CLASS
+
+        kumos = {}
+        names = {}
+        for serial, unit in self._by_serial.items():
+            if "password" not in unit or "cryptoSerial" not in unit:
+                _LOGGER.warning("Kumo unit %s has no credentials; skipping it", serial)
+                continue
+            name = unit.get("label")
+            if name in names:
+                match = re.match(r"(.*) \(([0-9]*)\)", name)
+                if match:
+                    name = match.group(1) + " ({})".format(int(match.group(2)) + 1)
+                else:
+                    first = names.pop(name)
+                    # pylint: disable=protected-access
+                    first._name = name + " (1)"
+                    names[first._name] = first
+                    name = name + " (2)"
+            kumo_class = KUMO_UNIT_TYPE_TO_CLASS.get(unit.get("unitType"), PyKumo)
+            credentials = {
+                "password": unit["password"],
+                "crypto_serial": unit["cryptoSerial"],
+            }
+            kumos[serial] = names[name] = kumo_class(
+                name, unit.get("address"), credentials, timeouts, serial
+            )
+        return kumos
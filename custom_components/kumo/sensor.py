@@ -1,12 +1,18 @@
-"""HomeAssistant sensor component for Kumo Station Device."""
+"""HomeAssistant sensor component for Kumo devices."""
+from __future__ import annotations
+
 import logging
+from dataclasses import dataclass
+from typing import Callable
 
 import voluptuous as vol
 from homeassistant.components.sensor import PLATFORM_SCHEMA
 
-from .const import DOMAIN, KUMO_DATA_COORDINATORS
+from .const import DOMAIN, KUMO_DATA_COORDINATORS, KUMO_DATA_REGISTRY, SIGNAL_UNITS_ADDED
 from .coordinator import KumoDataUpdateCoordinator
 from .entity import CoordinatedKumoEntity
+from .snapshot import KumoSnapshot
+from .stats import KumoPollStats
 
 try:
     from homeassistant.components.sensor import SensorEntity
@@ -15,11 +21,22 @@ except ImportError:
 
 import homeassistant.helpers.config_validation as cv
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import SIGNAL_STRENGTH_DECIBELS, TEMP_CELSIUS
-from homeassistant.components.sensor import SensorDeviceClass
-from homeassistant.helpers.typing import HomeAssistantType
-
-from . import KUMO_DATA
+from homeassistant.const import (
+    DATA_BYTES,
+    PERCENTAGE,
+    SIGNAL_STRENGTH_DECIBELS,
+    TEMP_CELSIUS,
+    TIME_MILLISECONDS,
+)
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.typing import HomeAssistantType, StateType
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,83 +52,329 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     }
 )
 
+
+@dataclass
+class KumoSensorEntityDescriptionMixin:
+    """Mixin for required keys."""
+
+    value_fn: Callable[[KumoSnapshot], StateType]
+
+
+@dataclass
+class KumoSensorEntityDescription(SensorEntityDescription, KumoSensorEntityDescriptionMixin):
+    """Describes a Kumo sensor derived from the coordinator's snapshot."""
+
+    # Whether the unit reports this value at all, judged from its snapshot at setup
+    exists_fn: Callable[[KumoSnapshot], bool] = lambda data: True
+
+
+@dataclass
+class KumoPollStatsSensorEntityDescriptionMixin:
+    """Mixin for required keys."""
+
+    value_fn: Callable[[KumoPollStats], StateType]
+
+
+@dataclass
+class KumoPollStatsSensorEntityDescription(
+    SensorEntityDescription, KumoPollStatsSensorEntityDescriptionMixin
+):
+    """Describes a sensor reporting a unit's poll statistics."""
+
+
+def _to_milliseconds(seconds):
+    if seconds is None:
+        return None
+    return round(seconds * 1000)
+
+
+def _on_off(value, on_state, off_state):
+    if value is None:
+        return None
+    return on_state if value else off_state
+
+
+# The key is the unique id suffix and the name is appended to the unit's name
+ALL_UNIT_SENSORS: tuple[KumoSensorEntityDescription, ...] = (
+    KumoSensorEntityDescription(
+        key="signal-strength",
+        name="Signal Strength",
+        device_class=SensorDeviceClass.SIGNAL_STRENGTH,
+        native_unit_of_measurement=SIGNAL_STRENGTH_DECIBELS,
+        entity_registry_enabled_default=False,
+        value_fn=lambda data: data.rssi,
+    ),
+)
+
+INDOOR_UNIT_SENSORS: tuple[KumoSensorEntityDescription, ...] = (
+    KumoSensorEntityDescription(
+        key="humidity",
+        name="Humidity",
+        device_class=SensorDeviceClass.HUMIDITY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data.humidity,
+        exists_fn=lambda data: data.humidity is not None,
+    ),
+    KumoSensorEntityDescription(
+        key="filter",
+        name="Filter",
+        icon="mdi:air-filter",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda data: _on_off(data.filter_dirty, "dirty", "clean"),
+    ),
+    KumoSensorEntityDescription(
+        key="defrost",
+        name="Defrost",
+        icon="mdi:snowflake-melt",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda data: _on_off(data.defrost, "on", "off"),
+    ),
+    KumoSensorEntityDescription(
+        key="runstate",
+        name="Run State",
+        icon="mdi:hvac",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda data: data.run_state,
+    ),
+    KumoSensorEntityDescription(
+        key="sensor-battery",
+        name="Sensor Battery",
+        device_class=SensorDeviceClass.BATTERY,
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda data: data.battery,
+        exists_fn=lambda data: data.battery is not None,
+    ),
+    KumoSensorEntityDescription(
+        key="sensor-signal-strength",
+        name="Sensor Signal Strength",
+        device_class=SensorDeviceClass.SIGNAL_STRENGTH,
+        native_unit_of_measurement=SIGNAL_STRENGTH_DECIBELS,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda data: data.sensor_rssi,
+        exists_fn=lambda data: data.sensor_rssi is not None,
+    ),
+)
+
+KUMO_STATION_SENSORS: tuple[KumoSensorEntityDescription, ...] = (
+    KumoSensorEntityDescription(
+        key="outdoor-temperature",
+        name="Outdoor Temperature",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=TEMP_CELSIUS,
+        value_fn=lambda data: data.outdoor_temp,
+    ),
+)
+
+# Poll health of every unit; disabled by default as they change on every poll
+POLL_STATS_SENSORS: tuple[KumoPollStatsSensorEntityDescription, ...] = (
+    KumoPollStatsSensorEntityDescription(
+        key="latency-p50",
+        name="Poll Latency Median",
+        icon="mdi:timer-outline",
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda stats: _to_milliseconds(stats.latency_p50),
+    ),
+    KumoPollStatsSensorEntityDescription(
+        key="latency-p95",
+        name="Poll Latency 95th Percentile",
+        icon="mdi:timer-outline",
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda stats: _to_milliseconds(stats.latency_p95),
+    ),
+    KumoPollStatsSensorEntityDescription(
+        key="latency-max",
+        name="Poll Latency Max",
+        icon="mdi:timer-alert-outline",
+        native_unit_of_measurement=TIME_MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda stats: _to_milliseconds(stats.latency_max),
+    ),
+    KumoPollStatsSensorEntityDescription(
+        key="consecutive-failures",
+        name="Consecutive Poll Failures",
+        icon="mdi:alert-circle-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda stats: stats.consecutive_failures,
+    ),
+    KumoPollStatsSensorEntityDescription(
+        key="timeouts",
+        name="Poll Timeouts",
+        icon="mdi:timer-off-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda stats: stats.timeouts,
+    ),
+    KumoPollStatsSensorEntityDescription(
+        key="poll-bytes",
+        name="Poll Size",
+        icon="mdi:download-network-outline",
+        native_unit_of_measurement=DATA_BYTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda stats: stats.last_bytes,
+    ),
+)
+
 async def async_setup_entry(hass: HomeAssistantType, entry: ConfigEntry, async_add_entities):
-    """Set up the Kumo thermostats."""
-    account = hass.data[DOMAIN][entry.entry_id][KUMO_DATA].get_account()
-    coordinators = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]
-
-    entities = []
-    all_serials = await hass.async_add_executor_job(account.get_all_units)
-    for serial in all_serials:
-        coordinator = coordinators[serial]
-        entities.append(KumoWifiSignal(coordinator))
-        _LOGGER.debug("Adding entity: wifi_signal for %s", coordinator.get_device().get_name())
-
-    kumo_station_serials = await hass.async_add_executor_job(account.get_kumo_stations)
-    for serial in kumo_station_serials:
-        coordinator = coordinators[serial]
-        entities.append(KumoStationOutdoorTemperature(coordinator))
-        _LOGGER.debug("Adding entity: outdoor_temperature for %s", coordinator.get_device().get_name())
-
-    if entities:
-        async_add_entities(entities, True)
-
-class KumoStationOutdoorTemperature(CoordinatedKumoEntity, SensorEntity):
-    """Representation of a Kumo Station Outdoor Temperature Sensor."""
-
-    def __init__(self, coordinator: KumoDataUpdateCoordinator):
-        """Initialize the kumo station."""
+    """Set up the Kumo sensors."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    rechecks = {}
+
+    @callback
+    def _async_recheck_after_poll(serial, coordinator, descriptions):
+        """Add the skipped sensors that the unit's first live poll turns out to have."""
+        if serial in rechecks:
+            rechecks.pop(serial)()
+
+        @callback
+        def _async_recheck():
+            if not _has_live_data(coordinator):
+                return
+            rechecks.pop(serial)()
+            entities = [
+                KumoSensor(coordinator, description)
+                for description in descriptions
+                if description.exists_fn(coordinator.data)
+            ]
+            if entities:
+                async_add_entities(entities)
+
+        rechecks[serial] = coordinator.async_add_listener(_async_recheck)
+
+    @callback
+    def _async_cancel_rechecks():
+        for remove_listener in rechecks.values():
+            remove_listener()
+        rechecks.clear()
+
+    @callback
+    def _async_add_units(serials):
+        registry = entry_data[KUMO_DATA_REGISTRY]
+        coordinators = entry_data[KUMO_DATA_COORDINATORS]
+        station_serials = set(registry.kumo_station_serials())
+        entities = []
+        for serial in serials:
+            coordinator = coordinators.get(serial)
+            if coordinator is None:
+                continue
+            if serial in station_serials:
+                descriptions = ALL_UNIT_SENSORS + KUMO_STATION_SENSORS
+            else:
+                descriptions = ALL_UNIT_SENSORS + INDOOR_UNIT_SENSORS
+            data = coordinator.data or KumoSnapshot()
+            skipped = []
+            for description in descriptions:
+                if not description.exists_fn(data):
+                    skipped.append(description)
+                    continue
+                entities.append(KumoSensor(coordinator, description))
+                _LOGGER.debug(
+                    "Adding entity: %s for %s", description.key, coordinator.get_device().get_name()
+                )
+            entities.extend(
+                KumoPollStatsSensor(coordinator, description)
+                for description in POLL_STATS_SENSORS
+            )
+            # Without a live poll yet, a missing value may only be unknown so far
+            if skipped and not _has_live_data(coordinator):
+                _async_recheck_after_poll(serial, coordinator, skipped)
+        if entities:
+            async_add_entities(entities)
+
+    _async_add_units(entry_data[KUMO_DATA_REGISTRY].serials())
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, SIGNAL_UNITS_ADDED.format(entry.entry_id), _async_add_units)
+    )
+    entry.async_on_unload(_async_cancel_rechecks)
+
+
+def _has_live_data(coordinator: KumoDataUpdateCoordinator) -> bool:
+    """Return whether the coordinator's snapshot comes from a successful poll."""
+    return coordinator.data is not None and not coordinator.restored
+
+
+class KumoSensor(CoordinatedKumoEntity, SensorEntity):
+    """A value of a Kumo unit read from the coordinator's snapshot."""
+
+    entity_description: KumoSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: KumoDataUpdateCoordinator,
+        description: KumoSensorEntityDescription,
+    ):
+        """Initialize the sensor."""
         super().__init__(coordinator)
-        self._name = self._pykumo.get_name() + " Outdoor Temperature"
+        self.entity_description = description
+        self._name = f"{self._pykumo.get_name()} {description.name}"
 
     @property
     def unique_id(self):
         """Return unique id"""
-        return f"{self._identifier}-outdoor-temperature"
-
-    @property
-    def native_unit_of_measurement(self):
-        """Return the unit of measurement which this thermostat uses."""
-        return TEMP_CELSIUS
+        return f"{self._identifier}-{self.entity_description.key}"
 
     @property
     def native_value(self):
-        """Return the high dual setpoint temperature."""
-        return self._pykumo.get_outdoor_temperature()
+        """Return the sensor's value from the last poll."""
+        if self.coordinator.data is None:
+            return None
+        return self.entity_description.value_fn(self.coordinator.data)
 
-    @property
-    def device_class(self):
-        return SensorDeviceClass.TEMPERATURE
 
-class KumoWifiSignal(CoordinatedKumoEntity, SensorEntity):
-    """Representation of a Kumo's WiFi Signal Strength."""
+class KumoPollStatsSensor(CoordinatedKumoEntity, SensorEntity):
+    """A poll statistic of a Kumo unit, updated after every poll."""
+
+    entity_description: KumoPollStatsSensorEntityDescription
 
-    def __init__(self, coordinator: KumoDataUpdateCoordinator):
-        """Initialize the kumo station."""
+    def __init__(
+        self,
+        coordinator: KumoDataUpdateCoordinator,
+        description: KumoPollStatsSensorEntityDescription,
+    ):
+        """Initialize the sensor."""
         super().__init__(coordinator)
-        self._name = self._pykumo.get_name() + " Signal Strength"
+        self.entity_description = description
+        self._name = f"{self._pykumo.get_name()} {description.name}"
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the poll statistics as well."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._coordinator.async_add_stats_listener(self.async_write_ha_state)
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """State is written by the statistics listener, which also runs for this poll."""
 
     @property
     def unique_id(self):
         """Return unique id"""
-        return f"{self._identifier}-signal-strength"
+        return f"{self._identifier}-{self.entity_description.key}"
 
     @property
-    def native_unit_of_measurement(self):
-        """Return the unit of measurement which this thermostat uses."""
-        return SIGNAL_STRENGTH_DECIBELS
+    def available(self):
+        """Statistics are known even while the unit is unreachable."""
+        return True
 
     @property
     def native_value(self):
-        """Return the WiFi signal rssi."""
-        return self._pykumo.get_wifi_rssi()
-
-    @property
-    def device_class(self):
-        return SensorDeviceClass.SIGNAL_STRENGTH
-
-    @property
-    def entity_registry_enabled_default(self) -> bool:
-        """Disable entity by default."""
-        return False
-
+        """Return the statistic as of the last poll."""
+        return self.entity_description.value_fn(self._coordinator.poll_stats)
@@ -0,0 +1,107 @@
+"""Services for the Kumo integration"""
+
+import asyncio
+import io
+import logging
+
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from homeassistant.components import persistent_notification
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DATA_PROFILING,
+    DOMAIN,
+    KUMO_DATA_POLLER,
+    PROFILE_TIMEOUT,
+    SERVICE_PROFILE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_CYCLES = "cycles"
+ATTR_ENTRY_ID = "entry_id"
+PROFILE_SUMMARY_LINES = 20
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_CYCLES, default=5): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+    }
+)
+
+
+def _summarize_profile(profiler, path: str) -> str:
+    """Write the profile to a pstats file and return its top functions."""
+    # pylint: disable=import-outside-toplevel
+    import pstats
+
+    profiler.dump_stats(path)
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats("cumulative").print_stats(PROFILE_SUMMARY_LINES)
+    return stream.getvalue()
+
+
+async def _async_profile(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Profile the next poll cycles of a Kumo config entry."""
+    # pylint: disable=import-outside-toplevel
+    import cProfile
+
+    entry_data = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get(ATTR_ENTRY_ID) or next(iter(entry_data), None)
+    poller = entry_data.get(entry_id, {}).get(KUMO_DATA_POLLER)
+    if poller is None:
+        raise HomeAssistantError(f"No loaded Kumo config entry {entry_id}")
+    if hass.data.get(DATA_PROFILING):
+        raise HomeAssistantError("A Kumo profile is already running")
+
+    cycles = call.data[ATTR_CYCLES]
+    # The profiler sees everything on the event loop: polls, parsing and
+    # entity updates, but not work done on executor threads
+    profiler = cProfile.Profile()
+    hass.data[DATA_PROFILING] = True
+    first_cycle = poller.cycle_count
+    profiler.enable()
+    try:
+        await asyncio.wait_for(poller.async_wait_cycles(cycles), PROFILE_TIMEOUT.total_seconds())
+    except asyncio.TimeoutError:
+        _LOGGER.warning("Kumo profile stopped before %d poll cycles completed", cycles)
+    finally:
+        profiler.disable()
+        hass.data[DATA_PROFILING] = False
+    if poller.stopped:
+        _LOGGER.warning("Kumo profile stopped early; config entry %s was unloaded", entry_id)
+    cycles = min(cycles, poller.cycle_count - first_cycle)
+
+    path = hass.config.path(f"kumo_profile_{dt_util.utcnow().strftime('%Y%m%d_%H%M%S')}.prof")
+    summary = await hass.async_add_executor_job(_summarize_profile, profiler, path)
+    _LOGGER.info("Kumo profile of %d poll cycles written to %s\n%s", cycles, path, summary)
+    persistent_notification.async_create(
+        hass,
+        f"Profile of {cycles} poll cycles written to `{path}`.\n\n```\n{summary}\n```",
+        title="Kumo profile",
+        notification_id=f"{DOMAIN}_profile",
+    )
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Kumo services once."""
+    if hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        return
+
+    async def async_handle_profile(call: ServiceCall) -> None:
+        await _async_profile(hass, call)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, async_handle_profile, schema=PROFILE_SCHEMA
+    )
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the Kumo services once no config entry is loaded."""
+    if hass.data.get(DOMAIN):
+        return
+    hass.services.async_remove(DOMAIN, SERVICE_PROFILE)
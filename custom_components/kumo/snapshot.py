@@ -0,0 +1,132 @@
+"""Immutable per-poll view of a Kumo unit's state"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    from pykumo import PyKumoBase
+
+
+class KumoSnapshot(NamedTuple):
+    """State of one unit as of its last poll.
+
+    Built once per poll and shared by every entity of the unit, so reading
+    state never goes back to the pykumo object. Fields a unit type does not
+    report are None.
+    """
+
+    mode: Optional[str] = None
+    standby: Optional[bool] = None
+    sp_cool: Optional[float] = None
+    sp_heat: Optional[float] = None
+    room_temp: Optional[float] = None
+    fan_speed: Optional[str] = None
+    vane_dir: Optional[str] = None
+    filter_dirty: Optional[bool] = None
+    defrost: Optional[bool] = None
+    humidity: Optional[float] = None
+    battery: Optional[int] = None
+    rssi: Optional[float] = None
+    sensor_rssi: Optional[float] = None
+    run_state: Optional[str] = None
+    outdoor_temp: Optional[float] = None
+    fan_speeds: Tuple[str, ...] = ()
+    vane_directions: Tuple[str, ...] = ()
+    has_dry_mode: bool = False
+    has_heat_mode: bool = False
+    has_vent_mode: bool = False
+    has_auto_mode: bool = False
+    has_vane_direction: bool = False
+
+
+def build_snapshot(device: PyKumoBase) -> KumoSnapshot:
+    """Read every field the entities use from the pykumo object once."""
+    # pylint: disable=import-outside-toplevel
+    from pykumo import PyKumoStation
+
+    if isinstance(device, PyKumoStation):
+        return KumoSnapshot(
+            rssi=device.get_wifi_rssi(),
+            outdoor_temp=device.get_outdoor_temperature(),
+        )
+    return KumoSnapshot(
+        mode=device.get_mode(),
+        standby=device.get_standby(),
+        sp_cool=device.get_cool_setpoint(),
+        sp_heat=device.get_heat_setpoint(),
+        room_temp=device.get_current_temperature(),
+        fan_speed=device.get_fan_speed(),
+        vane_dir=device.get_vane_direction(),
+        filter_dirty=device.get_filter_dirty(),
+        defrost=device.get_defrost(),
+        humidity=device.get_current_humidity(),
+        battery=device.get_sensor_battery(),
+        rssi=device.get_wifi_rssi(),
+        sensor_rssi=device.get_sensor_rssi(),
+        run_state=device.get_runstate(),
+        fan_speeds=tuple(device.get_fan_speeds()),
+        vane_directions=tuple(device.get_vane_directions()),
+        has_dry_mode=device.has_dry_mode(),
+        has_heat_mode=device.has_heat_mode(),
+        has_vent_mode=device.has_vent_mode(),
+        has_auto_mode=device.has_auto_mode(),
+        has_vane_direction=device.has_vane_direction(),
+    )
+
+
+# Raw Kumo status field name of each snapshot field that can be written
+SNAPSHOT_FIELD_BY_STATUS_FIELD = {
+    "mode": "mode",
+    "spCool": "sp_cool",
+    "spHeat": "sp_heat",
+    "fanSpeed": "fan_speed",
+    "vaneDir": "vane_dir",
+}
+
+
+def invalid_status_fields(data: Optional[KumoSnapshot], fields: dict) -> list:
+    """Return the fields whose value the unit does not support.
+
+    Mode, fan speed and vane direction are checked against the unit's profile
+    the same way pykumo's setters check them.
+    """
+    data = data or KumoSnapshot()
+    modes = ["off", "cool"]
+    if data.has_dry_mode:
+        modes.append("dry")
+    if data.has_heat_mode:
+        modes.append("heat")
+    if data.has_vent_mode:
+        modes.append("vent")
+    if data.has_auto_mode:
+        modes.append("auto")
+    supported = {
+        "mode": modes,
+        "fanSpeed": data.fan_speeds,
+        "vaneDir": data.vane_directions,
+    }
+    return [
+        field for field, value in fields.items()
+        if field in supported and value not in supported[field]
+    ]
+
+
+def status_fields(data: Optional[KumoSnapshot]) -> dict:
+    """Map a snapshot to the raw Kumo status field names used in commands."""
+    data = data or KumoSnapshot()
+    return {
+        "mode": data.mode,
+        "standby": data.standby,
+        "spCool": data.sp_cool,
+        "spHeat": data.sp_heat,
+        "roomTemp": data.room_temp,
+        "fanSpeed": data.fan_speed,
+        "vaneDir": data.vane_dir,
+        "filterDirty": data.filter_dirty,
+        "defrost": data.defrost,
+        "humidity": data.humidity,
+        "battery": data.battery,
+        "rssi": data.rssi,
+        "sensorRssi": data.sensor_rssi,
+        "runState": data.run_state,
+    }
@@ -0,0 +1,71 @@
+"""Persisted last-known state of the Kumo units"""
+
+import logging
+from typing import Dict, List
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import STATE_SAVE_DELAY, STATE_STORAGE_KEY, STATE_STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class KumoStateStore:
+    """Keep a snapshot of each unit's last status in Home Assistant storage.
+
+    Snapshots are written STATE_SAVE_DELAY after the first change that is not
+    saved yet, however often units keep changing, and once more when Home
+    Assistant stops. On startup they seed the coordinators so entities have
+    state before the first poll of a unit succeeds.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, coordinators: Dict) -> None:
+        """Initialize the store for the coordinators of a config entry."""
+        self._store = Store(hass, STATE_STORAGE_VERSION, STATE_STORAGE_KEY.format(entry_id))
+        self._coordinators = coordinators
+        self._save_pending = False
+
+    async def async_restore(self) -> List[str]:
+        """Seed the coordinators from the stored snapshots; return the restored serials."""
+        data = await self._store.async_load()
+        if not isinstance(data, dict):
+            return []
+        restored = []
+        for serial, snapshot in data.get("units", {}).items():
+            coordinator = self._coordinators.get(serial)
+            if coordinator is not None and coordinator.restore_state(snapshot):
+                restored.append(serial)
+        _LOGGER.debug("Restored last known state of %d Kumo units", len(restored))
+        return restored
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Write the snapshots once the save delay has passed.
+
+        The store restarts its timer on every call, so while a save is pending
+        it is left alone; otherwise a busy fleet would never be written.
+        """
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._data_to_save, STATE_SAVE_DELAY.total_seconds())
+
+    async def async_save(self) -> None:
+        """Write the snapshots now."""
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self) -> dict:
+        # Called as the store writes; changes from here on need a new save
+        self._save_pending = False
+        units = {}
+        for serial, coordinator in self._coordinators.items():
+            snapshot = coordinator.get_state_snapshot()
+            if snapshot is not None:
+                units[serial] = snapshot
+        return {"units": units}
+
+    async def async_remove(self) -> None:
+        """Delete the stored snapshots."""
+        await self._store.async_remove()
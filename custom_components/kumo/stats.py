@@ -0,0 +1,94 @@
+"""Rolling poll statistics of a Kumo unit"""
+
+import math
+from collections import deque
+from time import time
+from typing import Optional
+
+
+class KumoPollStats:
+    """Latency, failure, timeout and payload size figures of a unit's recent polls.
+
+    Latencies are kept for the last `window` polls and per-poll records for
+    the last `history_size` polls only, so memory stays bounded however long
+    Home Assistant runs.
+    """
+
+    def __init__(self, window: int, history_size: int) -> None:
+        """Initialize empty statistics."""
+        self._latencies = deque(maxlen=window)
+        self.history = deque(maxlen=history_size)
+        self.polls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.timeouts = 0
+        self.last_bytes: Optional[int] = None
+
+    def record(
+        self,
+        latency: float,
+        success: bool,
+        timeouts: int = 0,
+        nbytes: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Add the outcome of one poll."""
+        self._latencies.append(latency)
+        # Tuples keep the ring buffer small; as_history() names the fields
+        self.history.append((time(), latency, success, timeouts, nbytes, error))
+        self.polls += 1
+        self.timeouts += timeouts
+        self.last_bytes = nbytes
+        if success:
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Return the latency below which the given fraction of recent polls fell."""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        # Nearest rank; round() would pick the lower sample at odd counts
+        index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+        return ordered[index]
+
+    @property
+    def latency_p50(self) -> Optional[float]:
+        return self.percentile(0.5)
+
+    @property
+    def latency_p95(self) -> Optional[float]:
+        return self.percentile(0.95)
+
+    @property
+    def latency_max(self) -> Optional[float]:
+        return max(self._latencies) if self._latencies else None
+
+    def as_history(self) -> list:
+        """Return the recorded polls, oldest first."""
+        return [
+            {
+                "time": timestamp,
+                "latency": latency,
+                "success": success,
+                "timeouts": timeouts,
+                "bytes": nbytes,
+                "error": error,
+            }
+            for timestamp, latency, success, timeouts, nbytes, error in self.history
+        ]
+
+    def as_dict(self) -> dict:
+        """Return the statistics as plain values."""
+        return {
+            "polls": self.polls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "timeouts": self.timeouts,
+            "last_bytes": self.last_bytes,
+            "latency_p50": self.latency_p50,
+            "latency_p95": self.latency_p95,
+            "latency_max": self.latency_max,
+        }
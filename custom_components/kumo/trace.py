@@ -0,0 +1,132 @@
+"""Record adapter traffic to a trace file and replay it without a network"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+import aiohttp
+
+from .transport import KumoLocalTransport
+
+if TYPE_CHECKING:
+    from pykumo import PyKumoBase
+
+_LOGGER = logging.getLogger(__name__)
+
+# Buffered records are written out once this many have been collected
+TRACE_FLUSH_RECORDS = 200
+# ...and at least this often, so a stopped or crashed instance loses little
+TRACE_FLUSH_INTERVAL = timedelta(minutes=1)
+
+
+def _append_records(path: str, records: list) -> None:
+    """Append JSON lines to a gzip trace file; each call adds one gzip member."""
+    with gzip.open(path, "at", encoding="utf-8") as trace_file:
+        for record in records:
+            trace_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def load_trace(path: str) -> list:
+    """Read all records of a trace file."""
+    records = []
+    with gzip.open(path, "rt", encoding="utf-8") as trace_file:
+        for line in trace_file:
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+
+class KumoRecordingTransport(KumoLocalTransport):
+    """Local transport that records every request, its response and its latency.
+
+    Records are JSON lines holding the time since recording started, the unit
+    serial, the request body, the response and the latency in seconds. They
+    are buffered and appended to a gzip file on the given blocking runner.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        timeouts,
+        trace_path: str,
+        run_blocking: Callable[..., Awaitable],
+        retries=3,
+    ):
+        """Initialize the recording transport."""
+        super().__init__(session, timeouts, retries)
+        self._trace_path = trace_path
+        self._run_blocking = run_blocking
+        self._records = []
+        self._started = time.monotonic()
+        self.recorded_count = 0
+
+    async def async_request(self, device: PyKumoBase, post_data: bytes) -> dict:
+        """Send a request to a unit and record the exchange."""
+        start = time.monotonic()
+        response = await super().async_request(device, post_data)
+        self._records.append({
+            "t": round(start - self._started, 4),
+            "serial": device.get_serial(),
+            "request": post_data.decode("utf-8"),
+            "response": response,
+            "latency": round(time.monotonic() - start, 4),
+        })
+        self.recorded_count += 1
+        if len(self._records) >= TRACE_FLUSH_RECORDS:
+            await self.async_flush()
+        return response
+
+    async def async_flush(self) -> None:
+        """Append the buffered records to the trace file."""
+        records, self._records = self._records, []
+        if records:
+            await self._run_blocking(_append_records, self._trace_path, records)
+
+    async def async_close(self) -> None:
+        """Write out what is still buffered."""
+        await self.async_flush()
+        await super().async_close()
+
+
+class KumoReplayTransport(KumoLocalTransport):
+    """Transport that answers requests from a recorded trace instead of the network.
+
+    Responses are matched by unit serial and request body and handed out in
+    recorded order, starting over once a unit's recording is used up. The
+    recorded latency is reproduced, divided by speed; a speed of 0 answers
+    immediately.
+    """
+
+    def __init__(self, records: list, speed: float = 1.0):
+        """Index the trace records for replay."""
+        # The replay never opens a connection, so there is no session or timeout
+        super().__init__(None, (None, None))
+        self._speed = speed
+        self._recorded = defaultdict(list)
+        for record in records:
+            key = (record["serial"], record["request"])
+            self._recorded[key].append((record["response"], record["latency"]))
+        self._queues = {}
+
+    async def async_request(self, device: PyKumoBase, post_data: bytes) -> dict:
+        """Return the next recorded response for this unit and request."""
+        self.request_count += 1
+        key = (device.get_serial(), post_data.decode("utf-8"))
+        recorded = self._recorded.get(key)
+        if not recorded:
+            _LOGGER.debug("No recorded response for %s %s", *key)
+            return {}
+        queue = self._queues.get(key)
+        if not queue:
+            queue = self._queues[key] = deque(recorded)
+        response, latency = queue.popleft()
+        if self._speed > 0:
+            await asyncio.sleep(latency / self._speed)
+        self._bytes_by_serial[key[0]] += len(json.dumps(response))
+        return response
@@ -0,0 +1,317 @@
+"""Async local transport for talking to Kumo adapters."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Tuple
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from pykumo import PyKumoBase
+
+_LOGGER = logging.getLogger(__name__)
+
+REQUEST_HEADERS = {
+    "Accept": "application/json, text/plain, */*",
+    "Content-Type": "application/json",
+}
+RETRY_DELAY_SECONDS = 1.0
+
+INDOOR_UNIT_STATUS_QUERY = ["indoorUnit", "status"]
+INDOOR_UNIT_STATUS_FIELDS = [
+    "mode", "standby", "spHeat", "spCool", "roomTemp",
+    "fanSpeed", "vaneDir", "filterDirty", "defrost",
+]
+SENSOR_FIELDS = ["uuid", "humidity", "temperature", "battery", "rssi", "txPower"]
+INDOOR_UNIT_PROFILE_QUERY = ["indoorUnit", "profile"]
+INDOOR_UNIT_PROFILE_FIELDS = [
+    "numberOfFanSpeeds", "hasFanSpeedAuto", "hasVaneSwing", "hasModeDry",
+    "hasModeHeat", "hasModeVent", "hasModeAuto", "hasVaneDir",
+]
+ADAPTER_STATUS_QUERY = ["adapter", "status"]
+ADAPTER_STATUS_FIELDS = [
+    "autoModePrevention", "userHasModeDry", "userHasModeHeat",
+    "localNetwork", "runState",
+]
+MHK2_STATUS_QUERY = b'{"c":{"mhk2":{"status":{}}}}'
+STATION_OAT_QUERY = b'{"c":{"eqc":{"oat":{}}}}'
+STATION_SENSORS_QUERY = b'{"c":{"sensors":{}}}'
+STATION_ADAPTER_QUERY = b'{"c":{"adapter":{"status":{}}}}'
+# Decimal places pykumo's setters round each setpoint to
+SETPOINT_DIGITS = {"spCool": 2, "spHeat": 1}
+
+# Field groups polled on separate cadences. The fast group (temperatures, mode,
+# setpoints, fan, vane) is covered by the single status query; the slow group
+# (sensors, profile, WiFi and run state) needs the remaining queries.
+FIELD_GROUP_FAST = "fast"
+FIELD_GROUP_SLOW = "slow"
+ALL_FIELD_GROUPS = frozenset((FIELD_GROUP_FAST, FIELD_GROUP_SLOW))
+
+
+def _build_query(query_path):
+    """Build the nested local API query for the given path."""
+    query = '{"c":{'
+    for item in query_path:
+        query += '"' + item + '":{'
+    query += "}" * (len(query_path) + 2)
+    return query
+
+
+def normalize_status_fields(fields):
+    """Round setpoints the way pykumo's setters do."""
+    return {
+        field: round(float(value), SETPOINT_DIGITS[field]) if field in SETPOINT_DIGITS else value
+        for field, value in fields.items()
+    }
+
+
+def build_status_command(fields):
+    """Build one local API command writing all given indoor unit status fields."""
+    return json.dumps(
+        {"c": {"indoorUnit": {"status": fields}}}, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def command_succeeded(response):
+    """Check whether the adapter accepted a command."""
+    return bool(response) and "_api_error" not in response
+
+
+def _retryable_response(response):
+    """Check whether the adapter asked us to try again."""
+    return (response.get("_api_error", "") in ("serializer_error", "device_authentication_error")
+            or "__no_memory" in str(response))
+
+
+class KumoLocalTransport:
+    """Talk to Kumo adapters over a shared aiohttp session.
+
+    This mirrors the requests issued by pykumo's update_status, but awaits them
+    on the event loop instead of holding an executor thread for each device.
+    Parsed results are stored on the pykumo object so its getters keep working.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, timeouts, retries=3):
+        """Initialize the transport."""
+        # pylint: disable=import-outside-toplevel
+        # pykumo is already loaded by account setup when the transport is created
+        from pykumo import PyKumoStation
+        from pykumo.const import POSSIBLE_SENSORS
+        from pykumo.py_kumo import merge
+
+        self._station_class = PyKumoStation
+        self._possible_sensors = POSSIBLE_SENSORS
+        self._merge = merge
+        connect_timeout, response_timeout = timeouts
+        self._session = session
+        self._timeout = aiohttp.ClientTimeout(
+            sock_connect=connect_timeout, sock_read=response_timeout
+        )
+        self._retries = retries
+        self.request_count = 0
+        self._bytes_by_serial = defaultdict(int)
+        self._timeouts_by_serial = defaultdict(int)
+        self._last_error_by_serial = {}
+
+    def pop_last_error(self, serial: str):
+        """Return and clear the last request error seen for a unit."""
+        return self._last_error_by_serial.pop(serial, None)
+
+    def get_counters(self, serial: str) -> Tuple[int, int]:
+        """Return the bytes received from and timeouts seen for a unit so far."""
+        return self._bytes_by_serial[serial], self._timeouts_by_serial[serial]
+
+    async def async_close(self) -> None:
+        """Release the transport when its entry is unloaded.
+
+        The session is Home Assistant's shared one and is left open.
+        """
+
+    async def async_request(self, device: PyKumoBase, post_data: bytes) -> dict:
+        """Send a request to a unit and return the response dict."""
+        # pylint: disable=protected-access
+        self.request_count += 1
+        url = "http://" + device._address + "/api"
+        params = {"m": device._token(post_data)}
+        try:
+            _LOGGER.debug("Issue request %s %s", url, post_data)
+            async with self._session.put(
+                url,
+                data=post_data,
+                params=params,
+                headers=REQUEST_HEADERS,
+                timeout=self._timeout,
+            ) as response:
+                body = await response.read()
+            self._bytes_by_serial[device.get_serial()] += len(body)
+            return json.loads(body)
+        except asyncio.TimeoutError:
+            self._timeouts_by_serial[device.get_serial()] += 1
+            self._last_error_by_serial[device.get_serial()] = "timeout"
+            _LOGGER.warning("Timeout issuing request %s", url)
+        except (aiohttp.ClientError, ValueError) as err:
+            self._last_error_by_serial[device.get_serial()] = f"{type(err).__name__}: {err}"
+            _LOGGER.warning("Error issuing request %s: %s", url, str(err))
+        return {}
+
+    async def async_set_status(self, device: PyKumoBase, fields: dict) -> dict:
+        """Write all given indoor unit status fields in a single request."""
+        # pylint: disable=protected-access
+        fields = normalize_status_fields(fields)
+        response = await self.async_request(device, build_status_command(fields))
+        if command_succeeded(response):
+            device._status.update(fields)
+            device._last_status_update = time.monotonic()
+        return response
+
+    async def _async_retrieve_attributes(self, device, query_path, needed) -> dict:
+        """Retrieve a query in one request, falling back to one per attribute."""
+        base_query = _build_query(query_path)
+        response = {}
+        for _ in range(self._retries):
+            response = await self.async_request(device, base_query.encode("utf-8"))
+            if not _retryable_response(response):
+                break
+            await asyncio.sleep(RETRY_DELAY_SECONDS)
+        if response and not _retryable_response(response):
+            return response
+
+        response = {"r": {}}
+        for attribute in needed:
+            attr_query = base_query.replace("{}", '{"' + attribute + '":{}}')
+            sub_response = await self.async_request(device, attr_query.encode("utf-8"))
+            if attribute in str(sub_response):
+                response = self._merge(response, sub_response)
+            else:
+                _LOGGER.warning(
+                    "%s: Did not get %s from %s: %s",
+                    device.get_name(), attribute, attr_query, sub_response,
+                )
+        return response
+
+    async def async_update_status(self, device: PyKumoBase, groups=ALL_FIELD_GROUPS) -> bool:
+        """Retrieve and cache the given field groups of a unit."""
+        if isinstance(device, self._station_class):
+            return await self._async_update_station(device, groups)
+        return await self._async_update_indoor_unit(device, groups)
+
+    async def _async_update_indoor_unit(self, device, groups) -> bool:
+        """Refresh status, sensors and profile of an indoor unit."""
+        # pylint: disable=protected-access
+        name = device.get_name()
+        if FIELD_GROUP_FAST in groups:
+            response = await self._async_retrieve_attributes(
+                device, INDOOR_UNIT_STATUS_QUERY, INDOOR_UNIT_STATUS_FIELDS
+            )
+            try:
+                device._status = response["r"]["indoorUnit"]["status"]
+                device._last_status_update = time.monotonic()
+            except KeyError as err:
+                _LOGGER.warning("%s: Error retrieving status from %s: %s", name, response, str(err))
+                return False
+        if FIELD_GROUP_SLOW not in groups:
+            return True
+
+        sensors = []
+        for index in range(self._possible_sensors):
+            index_str = str(index)
+            response = await self._async_retrieve_attributes(
+                device, ["sensors", index_str], SENSOR_FIELDS
+            )
+            try:
+                sensor = response["r"]["sensors"][index_str]
+            except KeyError as err:
+                _LOGGER.warning("%s: Error retrieving sensors from %s: %s", name, response, str(err))
+                return False
+            if not isinstance(sensor, dict) or not sensor.get("uuid"):
+                break
+            sensors.append(sensor)
+        device._sensors = sensors
+
+        response = await self._async_retrieve_attributes(
+            device, INDOOR_UNIT_PROFILE_QUERY, INDOOR_UNIT_PROFILE_FIELDS
+        )
+        try:
+            profile = response["r"]["indoorUnit"]["profile"]
+        except KeyError as err:
+            _LOGGER.warning("%s: Error retrieving profile from %s: %s", name, response, str(err))
+            return False
+
+        response = await self._async_retrieve_attributes(
+            device, ADAPTER_STATUS_QUERY, ADAPTER_STATUS_FIELDS
+        )
+        try:
+            status = response["r"]["adapter"]["status"]
+        except KeyError as err:
+            _LOGGER.warning("%s: Error retrieving adapter profile from %s: %s", name, response, str(err))
+            return False
+        profile["hasModeAuto"] = not status.get("autoModePrevention", False)
+        if not status.get("userHasModeDry", False):
+            profile["hasModeDry"] = False
+        if not status.get("userHasModeHeat", False):
+            profile["hasModeHeat"] = False
+        try:
+            profile["wifiRSSI"] = status["localNetwork"]["stationMode"]["RSSI"]
+        except (KeyError, TypeError):
+            profile["wifiRSSI"] = None
+        profile["runState"] = status.get("runState", "unknown")
+        device._profile = profile
+
+        # The MHK2 thermostat is optional, so failures here are not fatal
+        response = await self.async_request(device, MHK2_STATUS_QUERY)
+        try:
+            device._mhk2 = response["r"]["mhk2"]
+            if isinstance(device._mhk2, dict):
+                humidity = device._mhk2["status"]["indoorHumid"]
+                if humidity is not None:
+                    device._sensors.append({
+                        "battery": None,
+                        "humidity": humidity,
+                        "rssi": None,
+                        "temperature": None,
+                        "txPower": None,
+                        "uuid": None,
+                    })
+        except (KeyError, TypeError) as err:
+            _LOGGER.debug("%s: Error retrieving MHK2 status from %s: %s", name, response, err)
+        return True
+
+    async def _async_update_station(self, device, groups) -> bool:
+        """Refresh outdoor temperature, sensors and WiFi of a Kumo Station."""
+        # pylint: disable=protected-access
+        if FIELD_GROUP_FAST in groups:
+            response = await self.async_request(device, STATION_OAT_QUERY)
+            try:
+                device._status = {"outdoorTemp": response["r"]["eqc"]["oat"]}
+                device._last_status_update = time.monotonic()
+            except KeyError:
+                _LOGGER.warning("%s: Error retrieving status", device.get_name())
+                return False
+        if FIELD_GROUP_SLOW not in groups:
+            return True
+
+        response = await self.async_request(device, STATION_SENSORS_QUERY)
+        try:
+            device._sensors = [
+                sensor for sensor in response["r"]["sensors"].values()
+                if isinstance(sensor, dict) and sensor.get("uuid")
+            ]
+        except (KeyError, AttributeError):
+            _LOGGER.warning("%s: Error retrieving sensors", device.get_name())
+            return False
+
+        response = await self.async_request(device, STATION_ADAPTER_QUERY)
+        try:
+            status = response["r"]["adapter"]["status"]
+        except KeyError:
+            _LOGGER.warning("%s: Error retrieving adapter profile", device.get_name())
+            return False
+        try:
+            device._profile["wifiRSSI"] = status["localNetwork"]["stationMode"]["RSSI"]
+        except (KeyError, TypeError):
+            device._profile["wifiRSSI"] = None
+        return True
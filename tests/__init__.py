@@ -0,0 +1 @@
+"""Tests for the Kumo integration."""
@@ -0,0 +1 @@
+"""Offline benchmarks of the Kumo integration against simulated adapters."""
@@ -0,0 +1,40 @@
+"""Fixtures collecting the benchmark results into one report."""
+import pytest
+
+# Results of all benchmarks in this session, printed at the end
+_RESULTS = []
+
+
+@pytest.fixture
+def benchmark_report():
+    """Return a callable that records one result row of a benchmark."""
+
+    def _record(benchmark, **figures):
+        _RESULTS.append((benchmark, figures))
+
+    return _record
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Print the recorded results, one table per benchmark."""
+    if not _RESULTS:
+        return
+    terminalreporter.section("Kumo benchmarks")
+    benchmarks = []
+    for benchmark, _ in _RESULTS:
+        if benchmark not in benchmarks:
+            benchmarks.append(benchmark)
+    for benchmark in benchmarks:
+        rows = [figures for name, figures in _RESULTS if name == benchmark]
+        columns = list(rows[0])
+        widths = {
+            column: max(len(column), *(len(str(row.get(column))) for row in rows))
+            for column in columns
+        }
+        terminalreporter.write_line("")
+        terminalreporter.write_line(benchmark)
+        terminalreporter.write_line("  ".join(column.rjust(widths[column]) for column in columns))
+        for row in rows:
+            terminalreporter.write_line(
+                "  ".join(str(row.get(column)).rjust(widths[column]) for column in columns)
+            )
@@ -0,0 +1,75 @@
+"""Measurements shared by the benchmarks."""
+import asyncio
+import math
+import threading
+from time import monotonic
+
+# Unit counts every scaling benchmark is run at
+UNIT_COUNTS = (1, 10, 100, 500)
+# Round-trip time of each simulated adapter, in seconds
+ADAPTER_LATENCY = 0.005
+
+
+def percentile(values, fraction):
+    """Return the value below which the given fraction of values fall."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    # Nearest rank; round() would pick the lower sample at odd counts
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def milliseconds(seconds):
+    """Convert seconds to rounded milliseconds."""
+    if seconds is None:
+        return None
+    return round(seconds * 1000, 1)
+
+
+class LoopMonitor:
+    """Measure event loop blocking and thread usage while the block runs.
+
+    A probe task sleeps for `interval` over and over; any time it wakes up
+    late, the loop was kept busy. The number of threads is sampled on each
+    wake-up, relative to the count when the block was entered or to
+    `threads_before` when given.
+    """
+
+    def __init__(self, interval=0.005, threads_before=None):
+        """Initialize the monitor."""
+        self._interval = interval
+        self._task = None
+        self._threads_before = threads_before
+        self._start = 0.0
+        self.elapsed = 0.0
+        self.max_blocked = 0.0
+        self.total_blocked = 0.0
+        self.peak_threads = 0
+
+    async def __aenter__(self):
+        if self._threads_before is None:
+            self._threads_before = threading.active_count()
+        self._start = monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._async_probe())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.elapsed = monotonic() - self._start
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _async_probe(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            before = loop.time()
+            await asyncio.sleep(self._interval)
+            blocked = max(0.0, loop.time() - before - self._interval)
+            self.max_blocked = max(self.max_blocked, blocked)
+            self.total_blocked += blocked
+            self.peak_threads = max(
+                self.peak_threads, threading.active_count() - self._threads_before
+            )
@@ -0,0 +1,92 @@
+"""Benchmark of account-wide poll cycles through the coordinators."""
+import pytest
+
+from custom_components.kumo.const import DEFAULT_MAX_CONCURRENT_POLLS
+from custom_components.kumo.coordinator import KumoDataUpdateCoordinator
+from custom_components.kumo.poller import KumoAccountPoller
+from custom_components.kumo.transport import KumoLocalTransport
+
+from ..common import UNIT_TIMEOUTS, make_indoor_unit
+from .measure import (
+    ADAPTER_LATENCY,
+    UNIT_COUNTS,
+    LoopMonitor,
+    milliseconds,
+    percentile,
+)
+
+pytestmark = pytest.mark.benchmark
+
+# Cycles measured after the first one, which also reads the slow field groups
+CYCLES = 5
+
+
+async def _async_run_cycles(hass, fake_adapters, client_session):
+    """Poll every fake adapter's unit once in full, then CYCLES more times."""
+    await fake_adapters.async_start()
+    transport = KumoLocalTransport(client_session, UNIT_TIMEOUTS)
+    coordinators = {}
+    poller = KumoAccountPoller(hass, coordinators, DEFAULT_MAX_CONCURRENT_POLLS)
+    for serial, adapter in fake_adapters.adapters.items():
+        coordinators[serial] = KumoDataUpdateCoordinator(
+            hass,
+            make_indoor_unit(serial, f"Unit {serial}", adapter.address),
+            transport,
+            request_poll=poller.async_poll,
+        )
+
+    await poller.async_poll()
+    first_cycle = poller.last_cycle_duration
+    cycles = []
+    async with LoopMonitor() as monitor:
+        for _ in range(CYCLES):
+            await poller.async_poll()
+            cycles.append(poller.last_cycle_duration)
+
+    latencies = [
+        poll["latency"]
+        for coordinator in coordinators.values()
+        for poll in coordinator.poll_stats.as_history()[-CYCLES:]
+    ]
+    failures = sum(
+        not poll["success"]
+        for coordinator in coordinators.values()
+        for poll in coordinator.poll_stats.as_history()[-CYCLES:]
+    )
+    return {
+        "first_cycle_s": round(first_cycle, 3),
+        "cycle_s": round(sum(cycles) / len(cycles), 3),
+        "p50_ms": milliseconds(percentile(latencies, 0.5)),
+        "p99_ms": milliseconds(percentile(latencies, 0.99)),
+        "failed_polls": failures,
+        "threads": monitor.peak_threads,
+        "loop_blocked_max_ms": milliseconds(monitor.max_blocked),
+        "loop_blocked_total_ms": milliseconds(monitor.total_blocked),
+    }
+
+
+@pytest.mark.parametrize("units", UNIT_COUNTS)
+async def test_poll_cycle(hass, fake_adapters, client_session, benchmark_report, units):
+    """Poll cycle time and per-unit latency as the account grows."""
+    for index in range(units):
+        fake_adapters.add_unit(f"{index:04d}", latency=ADAPTER_LATENCY)
+
+    figures = await _async_run_cycles(hass, fake_adapters, client_session)
+
+    assert figures["failed_polls"] == 0
+    benchmark_report(
+        f"Poll cycle, {DEFAULT_MAX_CONCURRENT_POLLS} units at a time",
+        units=units,
+        **figures,
+    )
+
+
+@pytest.mark.parametrize("units", (10, 100))
+async def test_poll_cycle_lossy(hass, fake_adapters, client_session, benchmark_report, units):
+    """Poll cycles when one request in twenty loses its connection."""
+    for index in range(units):
+        fake_adapters.add_unit(f"{index:04d}", latency=ADAPTER_LATENCY, loss=0.05)
+
+    figures = await _async_run_cycles(hass, fake_adapters, client_session)
+
+    benchmark_report("Poll cycle, 5% of connections dropped", units=units, **figures)
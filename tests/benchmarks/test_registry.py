@@ -0,0 +1,78 @@
+"""Benchmark of the unit registry over large KumoCloud accounts."""
+import copy
+from time import perf_counter
+
+import pytest
+
+from custom_components.kumo.registry import KumoUnitRegistry
+
+from ..common import make_account_tree, make_raw_unit, make_zone
+
+pytestmark = pytest.mark.benchmark
+
+# Top-level zones in the synthetic account; each holds a unit and a child
+# zone with another unit, the depth the old nested loops could reach
+ZONE_COUNTS = (100, 1000, 5000)
+LOOKUPS = 200
+
+
+def _make_large_tree(zones):
+    """Return an account tree with two units under each of `zones` zones."""
+    return make_account_tree(*(
+        make_zone(
+            [make_raw_unit(f"{index:05d}a", address=f"10.0.{index // 250}.{index % 250}")],
+            [make_zone([make_raw_unit(f"{index:05d}b", address=None)])],
+        )
+        for index in range(zones)
+    ))
+
+
+def _scan_set_address(kumo_cache, label, address):
+    """Set a unit's address the way the config flow did before the registry."""
+    for child in kumo_cache[2]["children"]:
+        for raw_unit in child["zoneTable"].values():
+            if label == raw_unit["label"]:
+                raw_unit["address"] = address
+        if "children" in child:
+            for grandchild in child["children"]:
+                for raw_unit in grandchild["zoneTable"].values():
+                    if label == raw_unit["label"]:
+                        raw_unit["address"] = address
+
+
+def _timed(function, *args):
+    start = perf_counter()
+    result = function(*args)
+    return perf_counter() - start, result
+
+
+@pytest.mark.parametrize("zones", ZONE_COUNTS)
+def test_registry(benchmark_report, zones):
+    """Parse, lookup and diff cost as the account grows."""
+    tree = _make_large_tree(zones)
+    parse_time, registry = _timed(KumoUnitRegistry, tree)
+    units = len(registry.units)
+    labels = [unit["label"] for unit in registry.units[:: max(1, units // LOOKUPS)]]
+
+    scan_time, _ = _timed(lambda: [_scan_set_address(tree, label, "192.0.2.1") for label in labels])
+    indexed_time, _ = _timed(lambda: [registry.set_address(label, "192.0.2.1") for label in labels])
+
+    newer_tree = copy.deepcopy(tree)
+    for zone in newer_tree[2]["children"][::100]:
+        for raw_unit in zone["zoneTable"].values():
+            raw_unit["address"] = "192.0.2.200"
+    newer_tree[2]["children"].append(make_zone([make_raw_unit("new")]))
+    newer = KumoUnitRegistry(newer_tree)
+    diff_time, (added, removed, changed) = _timed(registry.diff, newer)
+
+    assert units == 2 * zones
+    assert added == ["new"] and not removed and len(changed) == len(newer_tree[2]["children"][:-1:100])
+    benchmark_report(
+        "Unit registry",
+        zones=2 * zones,
+        units=units,
+        parse_ms=round(parse_time * 1000, 2),
+        scan_lookup_us=round(scan_time / len(labels) * 1e6, 1),
+        indexed_lookup_us=round(indexed_time / len(labels) * 1e6, 2),
+        diff_ms=round(diff_time * 1000, 2),
+    )
@@ -0,0 +1,42 @@
+"""Benchmark of config entry setup."""
+from time import monotonic
+
+import pytest
+
+from custom_components.kumo.const import DOMAIN, KUMO_DATA_COORDINATORS
+
+from ..common import join_kumo_threads
+from .measure import ADAPTER_LATENCY, UNIT_COUNTS, LoopMonitor, milliseconds
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize("units", UNIT_COUNTS)
+async def test_setup_entry(hass, fake_adapters, setup_kumo, benchmark_report, units):
+    """Time until setup returns and until every unit has been polled."""
+    for index in range(units):
+        fake_adapters.add_unit(f"{index:04d}", latency=ADAPTER_LATENCY)
+    await fake_adapters.async_start()
+
+    async with LoopMonitor() as monitor:
+        start = monotonic()
+        entry = await setup_kumo()
+        setup_time = monotonic() - start
+        await hass.async_block_till_done()
+    coordinators = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]
+    polled = sum(coordinator.data is not None for coordinator in coordinators.values())
+    entities = len(hass.states.async_all())
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_add_executor_job(join_kumo_threads)
+    assert polled == units
+    benchmark_report(
+        "Config entry setup",
+        units=units,
+        setup_s=round(setup_time, 3),
+        all_polled_s=round(monitor.elapsed, 3),
+        entities=entities,
+        threads=monitor.peak_threads,
+        loop_blocked_max_ms=milliseconds(monitor.max_blocked),
+        loop_blocked_total_ms=milliseconds(monitor.total_blocked),
+    )
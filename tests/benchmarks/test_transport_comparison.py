@@ -0,0 +1,91 @@
+"""Benchmark of the async transport against pykumo's blocking requests."""
+import threading
+
+import pytest
+
+from custom_components.kumo.const import DEFAULT_MAX_CONCURRENT_POLLS
+from custom_components.kumo.coordinator import KumoDataUpdateCoordinator
+from custom_components.kumo.executor import KumoExecutor
+from custom_components.kumo.poller import KumoAccountPoller
+from custom_components.kumo.transport import KumoLocalTransport
+
+from ..common import UNIT_TIMEOUTS, join_kumo_threads, make_indoor_unit
+from .measure import (
+    ADAPTER_LATENCY,
+    UNIT_COUNTS,
+    LoopMonitor,
+    milliseconds,
+    percentile,
+)
+
+pytestmark = pytest.mark.benchmark
+
+CYCLES = 3
+PATHS = ("transport", "kumo_executor", "shared_executor")
+# pykumo 0.3.5 reads every field with a request of its own, some 35 per
+# poll, which makes 500 units take minutes per path
+COMPARED_UNIT_COUNTS = tuple(units for units in UNIT_COUNTS if units <= 100)
+
+
+@pytest.mark.parametrize("path", PATHS)
+@pytest.mark.parametrize("units", COMPARED_UNIT_COUNTS)
+async def test_poll_path(hass, fake_adapters, client_session, benchmark_report, units, path):
+    """Poll cycles through each way the coordinator can reach an adapter.
+
+    The pykumo paths read every field on every poll, so pykumo's own five
+    second cache is cleared before each cycle, as it would have expired
+    between real polls. Threads are counted from before the first poll,
+    which starts the executors' threads.
+    """
+    threads_before = threading.active_count()
+    for index in range(units):
+        fake_adapters.add_unit(f"{index:04d}", latency=ADAPTER_LATENCY)
+    await fake_adapters.async_start()
+    transport = executor = None
+    if path == "transport":
+        transport = KumoLocalTransport(client_session, UNIT_TIMEOUTS)
+    elif path == "kumo_executor":
+        executor = KumoExecutor(hass, min(units, DEFAULT_MAX_CONCURRENT_POLLS) + 1)
+    coordinators = {}
+    poller = KumoAccountPoller(hass, coordinators, DEFAULT_MAX_CONCURRENT_POLLS)
+    for serial, adapter in fake_adapters.adapters.items():
+        coordinators[serial] = KumoDataUpdateCoordinator(
+            hass,
+            make_indoor_unit(serial, f"Unit {serial}", adapter.address),
+            transport,
+            executor=executor,
+            request_poll=poller.async_poll,
+        )
+    await poller.async_poll()
+    requests_before = sum(adapter.request_count for adapter in fake_adapters.adapters.values())
+
+    cycles = []
+    async with LoopMonitor(threads_before=threads_before) as monitor:
+        for _ in range(CYCLES):
+            for coordinator in coordinators.values():
+                # pylint: disable=protected-access
+                coordinator.device._last_status_update = 0
+            await poller.async_poll()
+            cycles.append(poller.last_cycle_duration)
+    requests = sum(adapter.request_count for adapter in fake_adapters.adapters.values())
+
+    if executor is not None:
+        executor.shutdown()
+        await hass.async_add_executor_job(join_kumo_threads)
+    latencies = [
+        poll["latency"]
+        for coordinator in coordinators.values()
+        for poll in coordinator.poll_stats.as_history()[-CYCLES:]
+    ]
+    assert all(coordinator.last_update_success for coordinator in coordinators.values())
+    benchmark_report(
+        "Poll path comparison",
+        units=units,
+        path=path,
+        cycle_s=round(sum(cycles) / len(cycles), 3),
+        p50_ms=milliseconds(percentile(latencies, 0.5)),
+        p99_ms=milliseconds(percentile(latencies, 0.99)),
+        requests_per_unit=round((requests - requests_before) / (units * CYCLES), 1),
+        threads=monitor.peak_threads,
+        loop_blocked_max_ms=milliseconds(monitor.max_blocked),
+    )
@@ -0,0 +1,86 @@
+"""Benchmark of the entity write path."""
+import asyncio
+from time import monotonic
+
+import pytest
+from homeassistant.components.climate.const import ATTR_TARGET_TEMP_HIGH, HVAC_MODE_HEAT
+from homeassistant.helpers.entity_platform import async_get_platforms
+
+from custom_components.kumo.const import (
+    CONF_COMMAND_SETTLE_TIME,
+    CONF_ENABLE_POWER_SWITCH,
+    DOMAIN,
+)
+from custom_components.kumo.heater_cooler import KumoHeaterCooler
+
+from ..common import join_kumo_threads
+from .measure import (
+    ADAPTER_LATENCY,
+    UNIT_COUNTS,
+    LoopMonitor,
+    milliseconds,
+    percentile,
+)
+
+pytestmark = pytest.mark.benchmark
+
+SETTLE_TIME = 0.2
+# Setpoint changes per unit in one simulated slider drag
+DRAG_STEPS = 10
+
+
+@pytest.mark.parametrize("units", UNIT_COUNTS)
+async def test_writes(hass, fake_adapters, setup_kumo, benchmark_report, units):
+    """Latency of a mode change, and requests sent for a setpoint drag, per unit.
+
+    The climate platform is not loaded by this integration, so the
+    heater-cooler entities' write path is measured.
+    """
+    for index in range(units):
+        fake_adapters.add_unit(f"{index:04d}", latency=ADAPTER_LATENCY)
+    entry = await setup_kumo(
+        data={CONF_ENABLE_POWER_SWITCH: True},
+        options={CONF_COMMAND_SETTLE_TIME: SETTLE_TIME},
+    )
+    await hass.async_block_till_done()
+    entities = [
+        entity
+        for platform in async_get_platforms(hass, DOMAIN)
+        for entity in platform.entities.values()
+        if isinstance(entity, KumoHeaterCooler)
+    ]
+    assert len(entities) == units
+    requests_before = sum(adapter.request_count for adapter in fake_adapters.adapters.values())
+
+    latencies = []
+    async with LoopMonitor() as monitor:
+        for entity in entities:
+            start = monotonic()
+            await entity.async_set_hvac_mode(HVAC_MODE_HEAT)
+            latencies.append(monotonic() - start)
+        drag_start = monotonic()
+        for step in range(DRAG_STEPS):
+            for entity in entities:
+                await entity.async_set_temperature(**{ATTR_TARGET_TEMP_HIGH: 24 + step * 0.5})
+        # The settle window is a real timer; let it run out
+        await asyncio.sleep(SETTLE_TIME * 2)
+        await hass.async_block_till_done()
+        drag_time = monotonic() - drag_start
+    writes = sum(adapter.write_count for adapter in fake_adapters.adapters.values())
+    requests = sum(adapter.request_count for adapter in fake_adapters.adapters.values())
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_add_executor_job(join_kumo_threads)
+    assert writes == 2 * units
+    assert all(adapter.status["spCool"] == 24 + (DRAG_STEPS - 1) * 0.5 for adapter in fake_adapters.adapters.values())
+    benchmark_report(
+        "Writes",
+        units=units,
+        mode_p50_ms=milliseconds(percentile(latencies, 0.5)),
+        mode_p99_ms=milliseconds(percentile(latencies, 0.99)),
+        drag_s=round(drag_time, 3),
+        writes=writes,
+        requests=requests - requests_before,
+        threads=monitor.peak_threads,
+        loop_blocked_max_ms=milliseconds(monitor.max_blocked),
+    )
@@ -0,0 +1,170 @@
+"""Helpers shared by the Kumo integration tests."""
+import base64
+import copy
+import threading
+
+from pykumo import PyKumo, PyKumoStation
+
+from custom_components.kumo.transport import (
+    ALL_FIELD_GROUPS,
+    command_succeeded,
+    normalize_status_fields,
+)
+
+UNIT_CREDENTIALS = {
+    "password": base64.b64encode(b"kumo-test-password").decode("utf-8"),
+    "crypto_serial": "0123456789abcdef01",
+}
+UNIT_TIMEOUTS = (1.2, 8.0)
+
+INDOOR_UNIT_STATUS = {
+    "mode": "cool",
+    "standby": False,
+    "spHeat": 20.0,
+    "spCool": 24.0,
+    "roomTemp": 23.5,
+    "fanSpeed": "low",
+    "vaneDir": "auto",
+    "filterDirty": False,
+    "defrost": False,
+}
+INDOOR_UNIT_PROFILE = {
+    "numberOfFanSpeeds": 5,
+    "hasFanSpeedAuto": True,
+    "hasVaneSwing": True,
+    "hasModeDry": True,
+    "hasModeHeat": True,
+    "hasModeVent": True,
+    "hasModeAuto": True,
+    "hasVaneDir": True,
+    "wifiRSSI": -50,
+    "runState": "normal",
+}
+INDOOR_UNIT_SENSORS = [
+    {
+        "uuid": "sensor-uuid",
+        "humidity": 40,
+        "temperature": 23.0,
+        "battery": 90,
+        "rssi": -60,
+        "txPower": 4,
+    },
+]
+
+
+def make_raw_unit(serial, label=None, address=None, unit_type="ductless"):
+    """Return a unit as it appears in a zoneTable of the KumoCloud account tree."""
+    return {
+        "serial": serial,
+        "label": label or f"Unit {serial}",
+        "address": address or "192.0.2.1",
+        "password": UNIT_CREDENTIALS["password"],
+        "cryptoSerial": UNIT_CREDENTIALS["crypto_serial"],
+        "mac": f"mac-{serial}",
+        "unitType": unit_type,
+    }
+
+
+def make_zone(units, children=()):
+    """Return a zone of the account tree holding the given units and child zones."""
+    return {
+        "zoneTable": {unit["serial"]: unit for unit in units},
+        "children": list(children),
+    }
+
+
+def make_account_tree(*zones):
+    """Return a raw KumoCloud account tree with the given top-level zones."""
+    return [{"username": "kumo-test"}, {"fetched": True}, {"children": list(zones)}]
+
+
+def make_indoor_unit(serial="0001", name="Living Room", address="192.0.2.1"):
+    """Create a pykumo indoor unit holding the state of a cooling unit."""
+    device = PyKumo(name, address, UNIT_CREDENTIALS, UNIT_TIMEOUTS, serial)
+    # pylint: disable=protected-access
+    device._status = copy.deepcopy(INDOOR_UNIT_STATUS)
+    device._profile = copy.deepcopy(INDOOR_UNIT_PROFILE)
+    device._sensors = copy.deepcopy(INDOOR_UNIT_SENSORS)
+    return device
+
+
+def make_kumo_station(serial="0100", name="Station", address="192.0.2.100"):
+    """Create a pykumo Kumo Station reporting an outdoor temperature."""
+    device = PyKumoStation(name, address, UNIT_CREDENTIALS, UNIT_TIMEOUTS, serial)
+    # pylint: disable=protected-access
+    device._status = {"outdoorTemp": 5.0}
+    device._profile = {"wifiRSSI": -55}
+    return device
+
+
+class FakeTransport:
+    """Stand-in for the local transport that keeps each adapter's state in memory.
+
+    A poll copies the adapter's status onto the pykumo object, or fails for
+    units in unreachable. While poll_gate is set and not open, polls wait for
+    it; polls_in_flight and max_polls_in_flight count overlapping polls. Writes are recorded and answered with
+    write_response; accepted writes change the adapter's status unless
+    ignore_writes is set.
+    """
+
+    def __init__(self):
+        """Initialize the transport with no adapters known yet."""
+        self.adapter_status = {}
+        self.unreachable = set()
+        self.ignore_writes = False
+        self.write_response = {"r": {"indoorUnit": {"status": {}}}}
+        self.writes = []
+        self.poll_count = 0
+        self.poll_gate = None
+        self.polls_in_flight = 0
+        self.max_polls_in_flight = 0
+
+    def get_counters(self, serial):
+        """Return the bytes received and timeouts seen; the fake counts neither."""
+        return 0, 0
+
+    def pop_last_error(self, serial):
+        """Return the last request error; the fake never has one."""
+        return None
+
+    async def async_close(self):
+        """Nothing to close."""
+
+    async def async_update_status(self, device, groups=ALL_FIELD_GROUPS):
+        """Copy the adapter's status onto the unit."""
+        # pylint: disable=protected-access
+        self.poll_count += 1
+        self.polls_in_flight += 1
+        self.max_polls_in_flight = max(self.max_polls_in_flight, self.polls_in_flight)
+        try:
+            if self.poll_gate is not None:
+                await self.poll_gate.wait()
+            serial = device.get_serial()
+            if serial in self.unreachable:
+                return False
+            status = self.adapter_status.setdefault(serial, copy.deepcopy(device._status))
+            device._status = copy.deepcopy(status)
+            return True
+        finally:
+            self.polls_in_flight -= 1
+
+    async def async_set_status(self, device, fields):
+        """Record a write and apply it if the adapter accepts it."""
+        # pylint: disable=protected-access
+        serial = device.get_serial()
+        self.writes.append((serial, dict(fields)))
+        if not command_succeeded(self.write_response):
+            return self.write_response
+        fields = normalize_status_fields(fields)
+        self.adapter_status.setdefault(serial, copy.deepcopy(device._status))
+        if not self.ignore_writes:
+            self.adapter_status[serial].update(fields)
+        device._status.update(fields)
+        return self.write_response
+
+
+def join_kumo_threads():
+    """Wait for the threads of shut down Kumo executors to exit."""
+    for thread in threading.enumerate():
+        if thread.name.startswith("kumo"):
+            thread.join()
@@ -0,0 +1,90 @@
+"""Fixtures for the Kumo integration tests."""
+import aiohttp
+import pytest
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.util.json import save_json
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.kumo.const import CONF_PREFER_CACHE, DOMAIN, KUMO_CONFIG_CACHE
+
+from .common import make_account_tree, make_raw_unit, make_zone
+from .fake_adapter import FakeAdapterFleet
+
+
+def pytest_addoption(parser):
+    """Add the option that runs the benchmarks."""
+    parser.addoption(
+        "--benchmark", action="store_true", default=False, help="run the benchmarks"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip the benchmarks unless --benchmark is given."""
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Let Home Assistant load the integrations in custom_components."""
+    yield
+
+
+@pytest.fixture
+async def fake_adapters(socket_enabled):
+    """Return a fleet of fake adapters on localhost, stopped again after the test."""
+    fleet = FakeAdapterFleet()
+    yield fleet
+    await fleet.async_stop()
+
+
+@pytest.fixture
+async def client_session():
+    """Return an aiohttp session for transports under test, closed after the test."""
+    async with aiohttp.ClientSession() as session:
+        yield session
+
+
+@pytest.fixture
+def setup_kumo(hass, fake_adapters, tmp_path):
+    """Return a coroutine that sets up a config entry for the fake adapters.
+
+    The units are put in a cached account tree, so KumoCloud is never asked.
+    `cached` limits the tree to the given serials.
+    """
+    hass.config.config_dir = str(tmp_path)
+
+    async def _async_setup_kumo(data=None, options=None, cached=None):
+        if not fake_adapters.started:
+            await fake_adapters.async_start()
+        units = [
+            make_raw_unit(
+                serial,
+                address=adapter.address,
+                unit_type="headless" if adapter.station else "ductless",
+            )
+            for serial, adapter in fake_adapters.adapters.items()
+            if cached is None or serial in cached
+        ]
+        await hass.async_add_executor_job(
+            save_json, hass.config.path(KUMO_CONFIG_CACHE), make_account_tree(make_zone(units))
+        )
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={
+                CONF_USERNAME: "kumo-test",
+                CONF_PASSWORD: "kumo-test-password",
+                CONF_PREFER_CACHE: True,
+                **(data or {}),
+            },
+            options=options or {},
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        return entry
+
+    return _async_setup_kumo
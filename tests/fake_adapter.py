@@ -0,0 +1,188 @@
+"""Simulated fleet of Kumo adapters speaking the local API on localhost.
+
+Each adapter listens on its own port of 127.0.0.1 and answers the PUT /api
+requests pykumo and the async transport send, checking their token the way
+an adapter does. Latency, dropped connections and hangs can be set per
+adapter, so scheduling and timeouts can be measured without real units.
+"""
+import asyncio
+import copy
+import json
+import random
+import socket
+
+from aiohttp import web
+from pykumo import PyKumo
+
+from .common import (
+    INDOOR_UNIT_PROFILE,
+    INDOOR_UNIT_SENSORS,
+    INDOOR_UNIT_STATUS,
+    UNIT_CREDENTIALS,
+)
+
+# How long a hung adapter holds a request; far beyond any client timeout
+HANG_SECONDS = 3600
+
+
+def _indoor_unit_state():
+    """Return the local API tree of a cooling indoor unit with one sensor."""
+    return {
+        "indoorUnit": {
+            "status": copy.deepcopy(INDOOR_UNIT_STATUS),
+            "profile": {
+                field: value for field, value in INDOOR_UNIT_PROFILE.items()
+                if field not in ("wifiRSSI", "runState")
+            },
+        },
+        "sensors": {
+            str(index): copy.deepcopy(sensor) for index, sensor in enumerate(INDOOR_UNIT_SENSORS)
+        },
+        "adapter": {
+            "status": {
+                "autoModePrevention": False,
+                "userHasModeDry": True,
+                "userHasModeHeat": True,
+                "localNetwork": {"stationMode": {"RSSI": -50}},
+                "runState": "normal",
+            },
+        },
+        "mhk2": None,
+    }
+
+
+def _kumo_station_state():
+    """Return the local API tree of a Kumo Station."""
+    return {
+        "eqc": {"oat": 5.0},
+        "sensors": {},
+        "adapter": {"status": {"localNetwork": {"stationMode": {"RSSI": -55}}}},
+    }
+
+
+def _answer(query, state):
+    """Answer a local API command against an adapter's state tree.
+
+    An empty dict reads the subtree at that path; any other value is
+    written and echoed back.
+    """
+    result = {}
+    for key, value in query.items():
+        if isinstance(value, dict) and value:
+            if not isinstance(state.get(key), dict):
+                state[key] = {}
+            result[key] = _answer(value, state[key])
+        elif isinstance(value, dict):
+            result[key] = copy.deepcopy(state.get(key, {}))
+        else:
+            state[key] = value
+            result[key] = value
+    return result
+
+
+class FakeAdapter:
+    """One simulated adapter and the behaviour of its network link."""
+
+    def __init__(self, serial, station=False, latency=0.0, loss=0.0, hang=False):
+        """Initialize the adapter with the state of a cooling unit or a station."""
+        self.serial = serial
+        self.station = station
+        self.state = _kumo_station_state() if station else _indoor_unit_state()
+        self.latency = latency
+        self.loss = loss
+        self.hang = hang
+        self.address = None
+        self.request_count = 0
+        self.write_count = 0
+        # Computes the token a request must carry, as the adapter does
+        self._signer = PyKumo(serial, None, UNIT_CREDENTIALS, None, serial)
+
+    @property
+    def status(self):
+        """Return the indoor unit status the adapter currently reports."""
+        return self.state["indoorUnit"]["status"]
+
+
+class FakeAdapterFleet:
+    """Serve a set of fake adapters, each on its own localhost port."""
+
+    def __init__(self, seed=0):
+        """Initialize an empty fleet; seed makes dropped connections repeatable."""
+        self.adapters = {}
+        self._by_port = {}
+        self._random = random.Random(seed)
+        self._runner = None
+        self._hung = set()
+
+    def add_unit(self, serial, **behaviour):
+        """Add an indoor unit; see FakeAdapter for the behaviour settings."""
+        adapter = self.adapters[serial] = FakeAdapter(serial, **behaviour)
+        return adapter
+
+    def add_station(self, serial, **behaviour):
+        """Add a Kumo Station."""
+        return self.add_unit(serial, station=True, **behaviour)
+
+    @property
+    def started(self):
+        """Return whether the fleet is listening."""
+        return self._runner is not None
+
+    async def async_start(self):
+        """Start listening; every adapter's address is then set."""
+        app = web.Application()
+        app.router.add_put("/api", self._async_handle)
+        self._runner = web.AppRunner(app, handle_signals=False, access_log=None)
+        await self._runner.setup()
+        for adapter in self.adapters.values():
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+            await web.SockSite(self._runner, sock).start()
+            adapter.address = f"127.0.0.1:{port}"
+            self._by_port[port] = adapter
+
+    async def async_stop(self):
+        """Stop listening and release hung requests."""
+        for task in list(self._hung):
+            task.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _async_handle(self, request):
+        adapter = self._by_port[request.transport.get_extra_info("sockname")[1]]
+        adapter.request_count += 1
+        body = await request.read()
+        if adapter.hang:
+            await self._async_hang()
+        if adapter.latency:
+            await asyncio.sleep(adapter.latency)
+        if adapter.loss and self._random.random() < adapter.loss:
+            # The connection goes away without an answer
+            request.transport.close()
+            raise web.HTTPServiceUnavailable()
+        # pylint: disable=protected-access
+        if request.query.get("m") != adapter._signer._token(body):
+            return web.json_response({"_api_error": "device_authentication_error"})
+        query = json.loads(body)["c"]
+        if any(isinstance(value, (str, int, float)) for value in _leaves(query)):
+            adapter.write_count += 1
+        return web.json_response({"r": _answer(query, adapter.state)})
+
+    async def _async_hang(self):
+        task = asyncio.current_task()
+        self._hung.add(task)
+        try:
+            await asyncio.sleep(HANG_SECONDS)
+        finally:
+            self._hung.discard(task)
+
+
+def _leaves(query):
+    """Yield the non-dict values of a local API command."""
+    for value in query.values():
+        if isinstance(value, dict):
+            yield from _leaves(value)
+        else:
+            yield value
@@ -0,0 +1,259 @@
+"""Tests for the Kumo device coordinator."""
+import asyncio
+from datetime import timedelta
+from time import monotonic
+
+import pytest
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.kumo.const import BREAKER_MAX_BACKOFF, BREAKER_MIN_BACKOFF
+from custom_components.kumo.coordinator import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    MAX_AVAILABILITY_TRIES,
+    KumoDataUpdateCoordinator,
+)
+from custom_components.kumo.transport import normalize_status_fields
+
+from .common import FakeTransport, make_indoor_unit
+
+
+async def _async_make_coordinator(hass, transport, device=None, **kwargs):
+    """Create a coordinator for an indoor unit and poll it once."""
+    coordinator = KumoDataUpdateCoordinator(
+        hass, device or make_indoor_unit(), transport, **kwargs
+    )
+    await coordinator.async_refresh()
+    return coordinator
+
+
+async def test_service_call_is_one_write(hass):
+    """Mode, both setpoints, fan and vane of one call go out as one request."""
+    transport = FakeTransport()
+    coordinator = await _async_make_coordinator(hass, transport, settle_time=0)
+
+    await coordinator.async_queue_status(
+        {"mode": "auto", "spCool": 25, "spHeat": 19, "fanSpeed": "quiet", "vaneDir": "swing"}
+    )
+
+    assert coordinator.write_request_count == 1
+    assert transport.writes == [
+        ("0001", {"mode": "auto", "spCool": 25, "spHeat": 19, "fanSpeed": "quiet", "vaneDir": "swing"})
+    ]
+    assert coordinator.data.mode == "auto"
+    assert coordinator.data.sp_cool == 25
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [{"mode": "heat"}, {"fanSpeed": "auto"}, {"vaneDir": "swing"}, {"mode": "turbo"}],
+)
+async def test_unsupported_values_are_rejected(hass, fields):
+    """Values the unit's profile does not offer never reach the adapter."""
+    device = make_indoor_unit()
+    # pylint: disable=protected-access
+    device._profile.update(hasModeHeat=False, hasFanSpeedAuto=False, hasVaneSwing=False)
+    transport = FakeTransport()
+    coordinator = await _async_make_coordinator(hass, transport, device, settle_time=0)
+
+    with pytest.raises(HomeAssistantError):
+        await coordinator.async_queue_status({"spCool": 25, **fields})
+
+    assert transport.writes == []
+    assert coordinator.pending_status == {}
+
+
+def test_setpoints_are_rounded_like_pykumo():
+    """The heating setpoint is rounded to one decimal, the cooling setpoint to two."""
+    assert normalize_status_fields({"spHeat": "20.04", "spCool": 24.456, "mode": "cool"}) == {
+        "spHeat": 20.0,
+        "spCool": 24.46,
+        "mode": "cool",
+    }
+
+
+async def test_setpoint_burst_sends_only_final_value(hass):
+    """A drag longer than the settle window still sends one write, of its last value."""
+    transport = FakeTransport()
+    coordinator = await _async_make_coordinator(hass, transport, settle_time=0.2)
+
+    # Changes 0.05 seconds apart keep the drag going for twice the settle window
+    for setpoint in (22.0, 22.5, 23.0, 23.5, 24.0, 24.5, 25.0, 25.5):
+        await coordinator.async_queue_status({"spCool": setpoint})
+        await asyncio.sleep(0.05)
+        assert transport.writes == []
+
+    assert coordinator.pending_status == {"spCool": 25.5}
+    await asyncio.sleep(0.3)
+    await hass.async_block_till_done()
+
+    assert transport.writes == [("0001", {"spCool": 25.5})]
+    assert coordinator.pending_status == {}
+    assert coordinator.data.sp_cool == 25.5
+
+
+async def test_other_change_sends_pending_setpoints_at_once(hass):
+    """A mode change goes out immediately, together with setpoints still settling."""
+    transport = FakeTransport()
+    coordinator = await _async_make_coordinator(hass, transport, settle_time=1.0)
+
+    await coordinator.async_queue_status({"spHeat": 21.0})
+    await coordinator.async_queue_status({"mode": "heat"})
+
+    assert transport.writes == [("0001", {"spHeat": 21.0, "mode": "heat"})]
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=5))
+    await hass.async_block_till_done()
+    assert len(transport.writes) == 1
+
+
+async def test_failed_settled_write_drops_pending_values(hass):
+    """A rejected settled write clears the queued setpoint instead of showing it on."""
+    transport = FakeTransport()
+    transport.write_response = {"_api_error": "device_authentication_error"}
+    coordinator = await _async_make_coordinator(hass, transport, settle_time=1.0)
+
+    await coordinator.async_queue_status({"spCool": 26.0})
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+    await hass.async_block_till_done()
+
+    assert transport.writes == [("0001", {"spCool": 26.0})]
+    assert coordinator.pending_status == {}
+    assert coordinator.data.sp_cool == 24.0
+
+
+async def test_poll_after_failed_write_replaces_optimistic_state(hass):
+    """An identical poll after a failed settled write still reaches the entities."""
+    transport = FakeTransport()
+    coordinator = await _async_make_coordinator(hass, transport, settle_time=1.0)
+    updates = []
+    coordinator.async_add_listener(lambda: updates.append(coordinator.data))
+    await coordinator.async_refresh()
+    assert updates == []
+
+    transport.write_response = {"_api_error": "device_authentication_error"}
+    await coordinator.async_queue_status({"spCool": 26.0})
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+    await hass.async_block_till_done()
+    await coordinator.async_refresh()
+
+    assert len(updates) == 1
+    assert updates[0].sp_cool == 24.0
+
+
+async def test_poll_after_ignored_write_shows_adapter_state(hass):
+    """A write the adapter accepts but does not apply is undone by the next poll."""
+    transport = FakeTransport()
+    transport.ignore_writes = True
+    coordinator = await _async_make_coordinator(hass, transport, settle_time=0)
+
+    await coordinator.async_queue_status({"spCool": 26.0})
+    assert coordinator.data.sp_cool == 26.0
+    await coordinator.async_refresh()
+
+    assert coordinator.data.sp_cool == 24.0
+
+
+async def test_unchanged_poll_does_not_notify_entities(hass):
+    """Coordinator entities are only written when a poll changes the payload."""
+    transport = FakeTransport()
+    coordinator = await _async_make_coordinator(hass, transport)
+    entity = CoordinatorEntity(coordinator)
+    entity.hass = hass
+    entity.entity_id = "sensor.kumo_test"
+    await entity.async_added_to_hass()
+    updates = []
+    entity.async_write_ha_state = lambda: updates.append(coordinator.data)
+
+    await coordinator.async_refresh()
+    assert updates == []
+    transport.adapter_status["0001"]["spCool"] = 25.0
+    await coordinator.async_refresh()
+
+    assert [data.sp_cool for data in updates] == [25.0]
+
+
+async def _async_fail_polls(coordinator, transport, count):
+    """Make the unit unreachable for the given number of polls."""
+    transport.unreachable.add(coordinator.device.get_serial())
+    for _ in range(count):
+        await coordinator.async_refresh()
+
+
+async def test_breaker_opens_after_repeated_failures(hass):
+    """The circuit stays closed until the unit is marked unavailable, then opens."""
+    transport = FakeTransport()
+    coordinator = await _async_make_coordinator(hass, transport)
+
+    await _async_fail_polls(coordinator, transport, MAX_AVAILABILITY_TRIES - 1)
+    assert coordinator.breaker_state == BREAKER_CLOSED
+    assert coordinator.get_available()
+
+    await _async_fail_polls(coordinator, transport, 1)
+    assert coordinator.breaker_state == BREAKER_OPEN
+    assert not coordinator.get_available()
+    backoff = BREAKER_MIN_BACKOFF.total_seconds()
+    assert coordinator.next_poll == pytest.approx(monotonic() + backoff, abs=1)
+    assert coordinator.breaker_attributes()["next_probe"]
+
+
+async def test_breaker_probe_backs_off_up_to_limit(hass):
+    """Each failed half-open probe doubles the backoff, up to the maximum."""
+    transport = FakeTransport()
+    coordinator = await _async_make_coordinator(hass, transport)
+    await _async_fail_polls(coordinator, transport, MAX_AVAILABILITY_TRIES)
+
+    transport.poll_gate = asyncio.Event()
+    probe = hass.async_create_task(coordinator.async_refresh())
+    await asyncio.sleep(0)
+    assert coordinator.breaker_state == BREAKER_HALF_OPEN
+    transport.poll_gate.set()
+    await probe
+    assert coordinator.breaker_state == BREAKER_OPEN
+    assert coordinator.next_poll == pytest.approx(
+        monotonic() + 2 * BREAKER_MIN_BACKOFF.total_seconds(), abs=1
+    )
+
+    await _async_fail_polls(coordinator, transport, 10)
+    assert coordinator.next_poll == pytest.approx(
+        monotonic() + BREAKER_MAX_BACKOFF.total_seconds(), abs=1
+    )
+
+
+async def test_breaker_closes_when_probe_succeeds(hass):
+    """A successful probe closes the circuit and resets the backoff."""
+    transport = FakeTransport()
+    coordinator = await _async_make_coordinator(hass, transport)
+    await _async_fail_polls(coordinator, transport, MAX_AVAILABILITY_TRIES + 2)
+
+    transport.unreachable.clear()
+    await coordinator.async_refresh()
+    assert coordinator.breaker_state == BREAKER_CLOSED
+    assert coordinator.get_available()
+    assert "next_probe" not in coordinator.breaker_attributes()
+
+    await _async_fail_polls(coordinator, transport, MAX_AVAILABILITY_TRIES)
+    assert coordinator.next_poll == pytest.approx(
+        monotonic() + BREAKER_MIN_BACKOFF.total_seconds(), abs=1
+    )
+
+
+async def test_shutdown_sends_settling_setpoint(hass):
+    """A setpoint still in its settle window is sent on shutdown, and nothing fires later."""
+    transport = FakeTransport()
+    coordinator = await _async_make_coordinator(hass, transport, settle_time=60)
+
+    await coordinator.async_queue_status({"spCool": 26.0})
+    assert transport.writes == []
+    await coordinator.async_shutdown()
+
+    assert transport.writes == [("0001", {"spCool": 26.0})]
+    assert coordinator.pending_status == {}
+    poll_count = transport.poll_count
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=2))
+    await hass.async_block_till_done()
+    assert transport.writes == [("0001", {"spCool": 26.0})]
+    assert transport.poll_count == poll_count
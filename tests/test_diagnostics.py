@@ -0,0 +1,68 @@
+"""Tests for the Kumo diagnostics."""
+import json
+
+from homeassistant.components.diagnostics import REDACTED
+
+from custom_components.kumo.const import (
+    CONF_ENABLE_POWER_SWITCH,
+    DOMAIN,
+    KUMO_DATA_COORDINATORS,
+    KUMO_DATA_REGISTRY,
+    POLL_HISTORY_SIZE,
+)
+from custom_components.kumo.diagnostics import async_get_config_entry_diagnostics
+
+from .common import UNIT_CREDENTIALS, join_kumo_threads
+
+
+async def test_diagnostics_redact_credentials(hass, fake_adapters, setup_kumo):
+    """Account and unit credentials, addresses and MACs never appear in diagnostics."""
+    adapter = fake_adapters.add_unit("0001")
+    entry = await setup_kumo({CONF_ENABLE_POWER_SWITCH: True})
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["entry"]["data"]["username"] == REDACTED
+    assert diagnostics["entry"]["data"]["password"] == REDACTED
+    unit = diagnostics["account"][2]["children"][0]["zoneTable"]["0001"]
+    for field in ("password", "cryptoSerial", "address", "mac"):
+        assert unit[field] == REDACTED
+    text = json.dumps(diagnostics)
+    for secret in (
+        "kumo-test-password",
+        UNIT_CREDENTIALS["password"],
+        UNIT_CREDENTIALS["crypto_serial"],
+        adapter.address,
+        "mac-0001",
+    ):
+        assert secret not in text
+    # Only the copy is redacted
+    registry = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_REGISTRY]
+    assert registry.get_by_serial("0001")["address"] == adapter.address
+    assert entry.data["password"] == "kumo-test-password"
+
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_add_executor_job(join_kumo_threads)
+
+
+async def test_diagnostics_poll_history_is_capped(hass, fake_adapters, setup_kumo):
+    """Each unit reports at most POLL_HISTORY_SIZE recent polls, however many there were."""
+    fake_adapters.add_unit("0001")
+    entry = await setup_kumo({CONF_ENABLE_POWER_SWITCH: True})
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]["0001"]
+    for _ in range(POLL_HISTORY_SIZE + 5):
+        await coordinator.async_refresh()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    unit = diagnostics["units"]["0001"]
+    assert unit["stats"]["polls"] == POLL_HISTORY_SIZE + 6
+    assert len(unit["recent_polls"]) == POLL_HISTORY_SIZE
+    json.dumps(diagnostics)
+
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_add_executor_job(join_kumo_threads)
@@ -0,0 +1,47 @@
+"""Tests for the integration's bounded thread pool."""
+import asyncio
+import threading
+
+from custom_components.kumo.executor import KumoExecutor
+
+from .common import join_kumo_threads
+
+
+async def test_metrics_count_jobs(hass):
+    """Finished jobs leave the queue and are counted as completed."""
+    executor = KumoExecutor(hass, 2)
+
+    assert await asyncio.gather(*(executor.async_run(pow, 2, power) for power in range(4))) == [1, 2, 4, 8]
+
+    metrics = executor.metrics()
+    assert metrics["queue_depth"] == 0
+    assert metrics["active"] == 0
+    assert metrics["completed"] == 4
+    executor.shutdown()
+    await hass.async_add_executor_job(join_kumo_threads)
+
+
+async def test_shutdown_empties_queue(hass):
+    """Jobs dropped by a shutdown no longer count as queued."""
+    executor = KumoExecutor(hass)
+    release = threading.Event()
+    running = hass.async_create_task(executor.async_run(release.wait, 5))
+    while not executor.active:
+        await asyncio.sleep(0.01)
+    queued = [hass.async_create_task(executor.async_run(pow, 2, 2)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert executor.metrics()["queue_depth"] == 3
+
+    executor.shutdown()
+    release.set()
+    assert await running
+    for task in queued:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    metrics = executor.metrics()
+    assert metrics["queue_depth"] == 0
+    assert metrics["completed"] == 1
+    await hass.async_add_executor_job(join_kumo_threads)
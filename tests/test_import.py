@@ -0,0 +1,69 @@
+"""Regression test for the integration's import cost."""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Modules Home Assistant has loaded before it imports the integration
+HOME_ASSISTANT_MODULES = (
+    "homeassistant.config_entries",
+    "homeassistant.components.climate",
+    "homeassistant.components.sensor",
+    "homeassistant.helpers.aiohttp_client",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.event",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+    "custom_components.heater_cooler",
+)
+INTEGRATION_MODULES = (
+    "custom_components.kumo",
+    "custom_components.kumo.climate",
+    "custom_components.kumo.config_flow",
+    "custom_components.kumo.diagnostics",
+    "custom_components.kumo.heater_cooler",
+    "custom_components.kumo.sensor",
+)
+# Bounds on what importing the integration adds to a running Home Assistant
+MAX_IMPORT_SECONDS = 0.5
+MAX_OTHER_MODULES = 20
+
+IMPORT_SCRIPT = """
+import importlib, json, sys, time
+sys.path.insert(0, {root!r})
+for module in {home_assistant!r}:
+    importlib.import_module(module)
+before = set(sys.modules)
+start = time.perf_counter()
+for module in {integration!r}:
+    importlib.import_module(module)
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "modules": sorted(set(sys.modules) - before),
+}}))
+"""
+
+
+def test_cold_import_cost(record_property):
+    """Importing the integration and its platforms stays cheap and leaves pykumo unloaded.
+
+    requests is already loaded by Home Assistant's update coordinator.
+    """
+    root = str(Path(__file__).resolve().parents[1])
+    script = IMPORT_SCRIPT.format(
+        root=root, home_assistant=HOME_ASSISTANT_MODULES, integration=INTEGRATION_MODULES
+    )
+    result = json.loads(
+        subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, check=True, cwd=root, text=True
+        ).stdout
+    )
+    modules = result["modules"]
+    others = [module for module in modules if not module.startswith("custom_components.kumo")]
+    record_property("import_seconds", round(result["seconds"], 3))
+    record_property("imported_modules", len(modules))
+
+    assert not [module for module in modules if module.split(".")[0] in ("pykumo", "requests")]
+    assert len(others) <= MAX_OTHER_MODULES, others
+    assert result["seconds"] < MAX_IMPORT_SECONDS
@@ -0,0 +1,227 @@
+"""Tests for setting up and refreshing a Kumo config entry."""
+import threading
+from time import monotonic
+from unittest.mock import patch
+
+from homeassistant.components.climate.const import ATTR_TARGET_TEMP_HIGH
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.util.json import load_json
+from pykumo import KumoCloudAccount
+
+from custom_components.kumo.const import (
+    CONF_ASYNC_TRANSPORT,
+    CONF_COMMAND_SETTLE_TIME,
+    CONF_CONNECT_TIMEOUT,
+    CONF_ENABLE_POWER_SWITCH,
+    CONF_RESPONSE_TIMEOUT,
+    CONF_STALE_WHILE_REVALIDATE,
+    DOMAIN,
+    KUMO_CONFIG_CACHE,
+    KUMO_DATA_COORDINATORS,
+    KUMO_DATA_EXECUTOR,
+    KUMO_DATA_POLLER,
+    SIGNAL_UNITS_REMOVED,
+)
+
+from .common import join_kumo_threads, make_account_tree, make_raw_unit, make_zone
+
+ENTRY_DATA = {CONF_ENABLE_POWER_SWITCH: True}
+REVALIDATE = {CONF_STALE_WHILE_REVALIDATE: True}
+
+
+def _patch_kumo_cloud(fake_adapters, serials, asked=None, answer=None, without_address=()):
+    """Make KumoCloud answer with the given fake adapters' units.
+
+    Accounts built from the cache are left alone. When `answer` is given,
+    KumoCloud sets `asked` and holds its answer until `answer` is set. Units
+    in `without_address` come back without a local address.
+    """
+
+    def _create_account(username, password, kumo_dict=None):
+        if kumo_dict is None:
+            if answer is not None:
+                asked.set()
+                answer.wait(5)
+            units = [
+                make_raw_unit(serial, address=fake_adapters.adapters[serial].address)
+                for serial in serials
+            ]
+            for unit in units:
+                if unit["serial"] in without_address:
+                    del unit["address"]
+            kumo_dict = make_account_tree(make_zone(units))
+        return KumoCloudAccount(username, password, kumo_dict=kumo_dict)
+
+    return patch("custom_components.kumo._create_account", side_effect=_create_account)
+
+
+async def _async_unload(hass, entry):
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_add_executor_job(join_kumo_threads)
+
+
+async def test_revalidation_applies_unit_changes(hass, fake_adapters, setup_kumo):
+    """Units added to and removed from KumoCloud come and go without a reload."""
+    for serial in ("0001", "0002", "0003", "0004"):
+        fake_adapters.add_unit(serial)
+
+    with _patch_kumo_cloud(fake_adapters, ("0001", "0003", "0004")):
+        entry = await setup_kumo(ENTRY_DATA, REVALIDATE, cached=("0001", "0002"))
+        await hass.async_block_till_done()
+
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    assert set(entry_data[KUMO_DATA_COORDINATORS]) == {"0001", "0003", "0004"}
+    assert hass.states.get("heater_cooler.unit_0002") is None
+    assert hass.states.get("heater_cooler.unit_0003") is not None
+    # Three units polled at once, plus one thread for writes
+    assert entry_data[KUMO_DATA_EXECUTOR].max_workers == 4
+    await _async_unload(hass, entry)
+
+
+async def test_revalidation_keeps_configured_addresses(hass, fake_adapters, setup_kumo):
+    """Addresses entered during configuration survive a KumoCloud refresh."""
+    adapter = fake_adapters.add_unit("0001")
+
+    with _patch_kumo_cloud(fake_adapters, ("0001",), without_address=("0001",)):
+        entry = await setup_kumo(ENTRY_DATA, REVALIDATE)
+        await hass.async_block_till_done()
+
+    cache = await hass.async_add_executor_job(load_json, hass.config.path(KUMO_CONFIG_CACHE))
+    assert cache[2]["children"][0]["zoneTable"]["0001"]["address"] == adapter.address
+    coordinator = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]["0001"]
+    request_count = adapter.request_count
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert adapter.request_count > request_count
+    await _async_unload(hass, entry)
+
+
+async def test_removal_is_scoped_to_its_entry(hass, fake_adapters, setup_kumo):
+    """Units removed from another entry's account keep their entities."""
+    fake_adapters.add_unit("0001")
+    entry = await setup_kumo(ENTRY_DATA)
+    await hass.async_block_till_done()
+
+    async_dispatcher_send(hass, SIGNAL_UNITS_REMOVED.format("other-entry"), ["0001"])
+    await hass.async_block_till_done()
+    assert hass.states.get("heater_cooler.unit_0001") is not None
+
+    async_dispatcher_send(hass, SIGNAL_UNITS_REMOVED.format(entry.entry_id), ["0001"])
+    await hass.async_block_till_done()
+    assert hass.states.get("heater_cooler.unit_0001") is None
+    await _async_unload(hass, entry)
+
+
+async def test_unload_during_revalidation(hass, fake_adapters, setup_kumo):
+    """A KumoCloud refresh that finishes after the entry is unloaded changes nothing."""
+    fake_adapters.add_unit("0001")
+    added = fake_adapters.add_unit("0002")
+    asked, answer = threading.Event(), threading.Event()
+
+    with _patch_kumo_cloud(fake_adapters, ("0001", "0002"), asked, answer):
+        entry = await setup_kumo(ENTRY_DATA, REVALIDATE, cached=("0001",))
+        entry_data = hass.data[DOMAIN][entry.entry_id]
+        assert await hass.async_add_executor_job(asked.wait, 5)
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        answer.set()
+        await hass.async_block_till_done()
+
+    assert set(entry_data[KUMO_DATA_COORDINATORS]) == {"0001"}
+    assert added.request_count == 0
+    await hass.async_add_executor_job(join_kumo_threads)
+
+
+async def test_setup_polls_new_units_without_ramp(hass, fake_adapters, setup_kumo):
+    """Units with no stored state are polled once before setup returns, unstaggered."""
+    for index in range(20):
+        fake_adapters.add_unit(f"{index:04d}")
+
+    start = monotonic()
+    entry = await setup_kumo(ENTRY_DATA)
+    setup_time = monotonic() - start
+
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    assert all(coordinator.data is not None for coordinator in entry_data[KUMO_DATA_COORDINATORS].values())
+    assert entry_data[KUMO_DATA_POLLER].startup_schedule == {}
+    # Their later polls are spread by serial instead
+    assert len(set(entry_data[KUMO_DATA_POLLER].phase_offsets.values())) == 20
+    # The ramp would have spread these units over ten seconds
+    assert setup_time < 5
+    await _async_unload(hass, entry)
+
+
+async def test_setup_does_not_wait_for_restored_units(hass, fake_adapters, setup_kumo):
+    """Units restored from their last known state are polled after setup returns."""
+    for serial in ("0001", "0002"):
+        fake_adapters.add_unit(serial)
+    entry = await setup_kumo(ENTRY_DATA, {CONF_CONNECT_TIMEOUT: 0.5, CONF_RESPONSE_TIMEOUT: 0.5})
+    await _async_unload(hass, entry)
+    for adapter in fake_adapters.adapters.values():
+        adapter.hang = True
+
+    # Each poll of a hung adapter takes three tries of half a second
+    start = monotonic()
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    assert monotonic() - start < 1
+
+    await hass.async_block_till_done()
+    assert hass.states.get("heater_cooler.unit_0001").state == "cool"
+    assert set(hass.data[DOMAIN][entry.entry_id][KUMO_DATA_POLLER].startup_schedule) == {"0001", "0002"}
+    await _async_unload(hass, entry)
+
+
+async def test_heater_cooler_writes_only_changes(hass, fake_adapters, setup_kumo):
+    """The entity skips unchanged polls and shows a queued setpoint right away."""
+    adapter = fake_adapters.add_unit("0001")
+    entry = await setup_kumo(ENTRY_DATA, {CONF_COMMAND_SETTLE_TIME: 0})
+    await hass.async_block_till_done()
+    entity = hass.data["heater_cooler"].get_entity("heater_cooler.unit_0001")
+    coordinator = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]["0001"]
+    writes = []
+    write_state = entity.async_write_ha_state
+    entity.async_write_ha_state = lambda: writes.append(entity.target_temperature_high) or write_state()
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert writes == []
+
+    await entity.async_set_temperature(**{ATTR_TARGET_TEMP_HIGH: 26})
+    await hass.async_block_till_done()
+    assert writes == [26]
+
+    adapter.status["spCool"] = 27
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert writes == [26, 27]
+    await _async_unload(hass, entry)
+
+
+async def test_sensors_skipped_before_first_poll_are_added(hass, fake_adapters, setup_kumo):
+    """A unit unreachable at setup gets its humidity sensor once a poll succeeds."""
+    adapter = fake_adapters.add_unit("0001", loss=1.0)
+    entry = await setup_kumo(ENTRY_DATA)
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.unit_0001_humidity") is None
+
+    adapter.loss = 0.0
+    coordinator = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]["0001"]
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.unit_0001_humidity").state == "40"
+    await _async_unload(hass, entry)
+
+
+async def test_unload_sends_settling_setpoint(hass, fake_adapters, setup_kumo):
+    """A setpoint queued just before unload reaches the unit through the executor."""
+    adapter = fake_adapters.add_unit("0001")
+    entry = await setup_kumo(ENTRY_DATA, {CONF_ASYNC_TRANSPORT: False})
+    await hass.async_block_till_done()
+    entity = hass.data["heater_cooler"].get_entity("heater_cooler.unit_0001")
+
+    await entity.async_set_temperature(**{ATTR_TARGET_TEMP_HIGH: 26})
+    assert adapter.write_count == 0
+    await _async_unload(hass, entry)
+
+    assert adapter.write_count == 1
+    assert adapter.status["spCool"] == 26
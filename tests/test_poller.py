@@ -0,0 +1,128 @@
+"""Tests for the account-wide poller."""
+import asyncio
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.kumo.const import STARTUP_POLL_RAMP, STARTUP_POLL_SPACING
+from custom_components.kumo.coordinator import KumoDataUpdateCoordinator
+from custom_components.kumo.poller import KumoAccountPoller, serial_phase
+
+from .common import FakeTransport, make_indoor_unit
+
+
+async def _async_run_pending_tasks():
+    """Let tasks run until they block, without waiting for them to finish."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def _make_poller(hass, transport, serials, max_concurrency=4):
+    """Create a poller with a coordinator per serial, wired the way setup wires them."""
+    coordinators = {}
+    poller = KumoAccountPoller(hass, coordinators, max_concurrency)
+    for serial in serials:
+        coordinators[serial] = KumoDataUpdateCoordinator(
+            hass,
+            make_indoor_unit(serial, f"Unit {serial}"),
+            transport,
+            settle_time=0,
+            request_poll=poller.async_poll,
+        )
+    return poller, coordinators
+
+
+async def test_write_refresh_does_not_overlap_scheduled_poll(hass):
+    """The refresh after a write goes through the poller, not around it."""
+    transport = FakeTransport()
+    poller, coordinators = _make_poller(hass, transport, ["0001"])
+    coordinator = coordinators["0001"]
+    await poller.async_poll()
+
+    transport.poll_gate = asyncio.Event()
+    scheduled_poll = hass.async_create_task(poller.async_poll())
+    await _async_run_pending_tasks()
+    assert transport.polls_in_flight == 1
+
+    await coordinator.async_set_status({"spCool": 25.0})
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=10))
+    await _async_run_pending_tasks()
+
+    transport.poll_gate.set()
+    await scheduled_poll
+    await hass.async_block_till_done()
+    assert transport.max_polls_in_flight == 1
+
+
+async def test_write_refresh_polls_the_unit(hass):
+    """A write is followed by a poll of just that unit."""
+    transport = FakeTransport()
+    poller, coordinators = _make_poller(hass, transport, ["0001", "0002"])
+    await poller.async_poll()
+    polls_before = transport.poll_count
+    cycles_before = poller.cycle_count
+
+    await coordinators["0001"].async_set_status({"spCool": 25.0})
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=10))
+    await hass.async_block_till_done()
+
+    assert transport.poll_count == polls_before + 1
+    assert poller.cycle_count == cycles_before + 1
+
+
+def test_startup_schedule_spreads_units(hass):
+    """Startup delays are stable per serial and spread over the ramp."""
+    serials = [f"{index:04d}" for index in range(20)]
+    poller, _ = _make_poller(hass, FakeTransport(), serials)
+
+    schedule = poller.compute_startup_schedule(serials)
+
+    assert schedule == _make_poller(hass, FakeTransport(), serials)[0].compute_startup_schedule(serials)
+    assert poller.startup_schedule == schedule
+    span = min(STARTUP_POLL_RAMP, STARTUP_POLL_SPACING * len(serials)).total_seconds()
+    assert all(0 <= delay < span for delay in schedule.values())
+    assert len(set(schedule.values())) == len(serials)
+    # No quarter of the span gets more than half of the units
+    quarters = [int(delay * 4 // span) for delay in schedule.values()]
+    assert max(quarters.count(quarter) for quarter in range(4)) <= len(serials) // 2
+
+
+def test_startup_schedule_is_capped_by_ramp(hass):
+    """A large account is spread over the ramp, not over the unit spacing."""
+    serials = [f"{index:04d}" for index in range(500)]
+    poller, _ = _make_poller(hass, FakeTransport(), serials)
+
+    schedule = poller.compute_startup_schedule(serials)
+
+    assert max(schedule.values()) < STARTUP_POLL_RAMP.total_seconds()
+    assert max(schedule.values()) > STARTUP_POLL_RAMP.total_seconds() * 0.9
+
+
+async def test_ramp_is_dropped_when_stopped(hass):
+    """Units waiting for their place in the ramp are not polled after a stop."""
+    transport = FakeTransport()
+    poller, _ = _make_poller(hass, transport, ["0001", "0002"])
+
+    poller.async_start_ramp(["0001", "0002"])
+    await _async_run_pending_tasks()
+    poller.async_stop()
+    await hass.async_block_till_done()
+
+    assert transport.poll_count == 0
+
+
+async def test_units_polled_together_are_phased_apart(hass):
+    """After a joint poll, each unit's next poll is shifted by its serial phase."""
+    serials = [f"{index:04d}" for index in range(20)]
+    poller, coordinators = _make_poller(hass, FakeTransport(), serials)
+    await poller.async_poll()
+    due_before = {serial: coordinator.next_poll for serial, coordinator in coordinators.items()}
+
+    offsets = poller.async_offset_next_polls(serials)
+
+    assert poller.phase_offsets == offsets
+    for serial, coordinator in coordinators.items():
+        assert offsets[serial] == serial_phase(serial) * coordinator.get_poll_interval()
+        assert coordinator.next_poll == due_before[serial] + offsets[serial]
+    assert len(set(offsets.values())) == len(serials)
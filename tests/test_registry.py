@@ -0,0 +1,132 @@
+"""Tests for the unit registry over the KumoCloud account tree."""
+import copy
+
+from pykumo import PyKumo, PyKumoStation
+
+from custom_components.kumo.registry import KumoUnitRegistry
+
+from .common import make_account_tree, make_raw_unit, make_zone
+
+
+def _make_tree():
+    """Return a tree with units three zones deep and a Kumo Station."""
+    return make_account_tree(
+        make_zone(
+            [make_raw_unit("0001", "Living Room", "192.0.2.1")],
+            [
+                make_zone(
+                    [make_raw_unit("0002", "Bedroom", "192.0.2.2")],
+                    [make_zone([make_raw_unit("0003", "Attic", "192.0.2.3")])],
+                ),
+            ],
+        ),
+        make_zone([make_raw_unit("0100", "Station", "192.0.2.100", unit_type="headless")]),
+    )
+
+
+def test_units_found_at_any_depth():
+    """Units in nested zones are indexed, in tree order."""
+    registry = KumoUnitRegistry(_make_tree())
+
+    assert registry.serials() == ["0001", "0002", "0003", "0100"]
+    assert registry.indoor_unit_serials() == ["0001", "0002", "0003"]
+    assert registry.kumo_station_serials() == ["0100"]
+
+
+def test_lookups():
+    """Units can be found by serial, label, MAC and address."""
+    registry = KumoUnitRegistry(_make_tree())
+
+    assert registry.get_by_serial("0003")["label"] == "Attic"
+    assert registry.get_by_label("Bedroom")["serial"] == "0002"
+    assert registry.get_by_mac("mac-0100")["serial"] == "0100"
+    assert registry.get_by_address("192.0.2.1")["serial"] == "0001"
+    assert registry.get_by_serial("9999") is None
+
+
+def test_set_address_updates_tree_and_index():
+    """A new address is written to the raw tree and re-indexed."""
+    tree = _make_tree()
+    registry = KumoUnitRegistry(tree)
+
+    assert registry.set_address("Attic", "192.0.2.33")
+    assert not registry.set_address("Garage", "192.0.2.44")
+
+    assert registry.get_by_address("192.0.2.3") is None
+    assert registry.get_by_address("192.0.2.33")["serial"] == "0003"
+    assert tree[2]["children"][0]["children"][0]["children"][0]["zoneTable"]["0003"]["address"] == "192.0.2.33"
+
+
+def test_malformed_tree_has_no_units():
+    """A tree without children yields an empty registry."""
+    assert KumoUnitRegistry([{}, {}]).serials() == []
+    assert KumoUnitRegistry(None).serials() == []
+
+
+def test_diff_added_removed_changed():
+    """Units are compared by serial; only configuration fields count as changes."""
+    old_tree = _make_tree()
+    new_tree = copy.deepcopy(old_tree)
+    living_room_zone = new_tree[2]["children"][0]
+    living_room_zone["zoneTable"]["0001"]["address"] = "192.0.2.11"
+    living_room_zone["zoneTable"]["0001"]["lastUpdate"] = "later"
+    del living_room_zone["children"][0]["children"][0]["zoneTable"]["0003"]
+    new_tree[2]["children"].append(make_zone([make_raw_unit("0004", "Office")]))
+    # A field the integration does not use
+    new_tree[2]["children"][1]["zoneTable"]["0100"]["firmware"] = "2.0"
+
+    added, removed, changed = KumoUnitRegistry(old_tree).diff(KumoUnitRegistry(new_tree))
+
+    assert added == ["0004"]
+    assert removed == ["0003"]
+    assert changed == ["0001"]
+
+
+def test_fresh_tree_keeps_configured_addresses():
+    """Units KumoCloud returns without an address keep the cached one."""
+    cached = KumoUnitRegistry(_make_tree())
+    fresh_tree = _make_tree()
+    del fresh_tree[2]["children"][0]["zoneTable"]["0001"]["address"]
+    fresh_tree[2]["children"][0]["children"][0]["zoneTable"]["0002"]["address"] = ""
+    fresh = KumoUnitRegistry(fresh_tree)
+
+    assert fresh.keep_addresses(cached) == ["0001", "0002"]
+    assert fresh_tree[2]["children"][0]["zoneTable"]["0001"]["address"] == "192.0.2.1"
+    assert fresh.get_by_address("192.0.2.2")["serial"] == "0002"
+    assert cached.diff(fresh) == ([], [], [])
+
+
+def test_label_change_is_not_a_config_change():
+    """Renaming a unit in KumoCloud does not touch its connection."""
+    new_tree = _make_tree()
+    new_tree[2]["children"][0]["zoneTable"]["0001"]["label"] = "Den"
+
+    assert KumoUnitRegistry(_make_tree()).diff(KumoUnitRegistry(new_tree)) == ([], [], [])
+
+
+def test_diff_identical_trees():
+    """Identical trees have no differences."""
+    registry = KumoUnitRegistry(_make_tree())
+
+    assert registry.diff(KumoUnitRegistry(_make_tree())) == ([], [], [])
+
+
+def test_make_pykumos():
+    """Every unit with credentials becomes a pykumo object of its type, with unique names."""
+    tree = make_account_tree(
+        make_zone([
+            make_raw_unit("0001", "Hall"),
+            make_raw_unit("0002", "Hall"),
+            make_raw_unit("0100", "Station", unit_type="headless"),
+        ]),
+    )
+    no_credentials = make_raw_unit("0003", "Garage")
+    del no_credentials["password"]
+    tree[2]["children"][0]["zoneTable"]["0003"] = no_credentials
+
+    pykumos = KumoUnitRegistry(tree).make_pykumos((1.2, 8.0))
+
+    assert set(pykumos) == {"0001", "0002", "0100"}
+    assert isinstance(pykumos["0001"], PyKumo)
+    assert isinstance(pykumos["0100"], PyKumoStation)
+    assert {pykumos["0001"].get_name(), pykumos["0002"].get_name()} == {"Hall (1)", "Hall (2)"}
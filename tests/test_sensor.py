@@ -0,0 +1,50 @@
+"""Tests for the Kumo sensors."""
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.helpers import entity_registry
+
+from custom_components.kumo.const import (
+    CONF_ENABLE_POWER_SWITCH,
+    DOMAIN,
+    KUMO_DATA_COORDINATORS,
+)
+from custom_components.kumo.coordinator import MAX_AVAILABILITY_TRIES
+
+from .common import join_kumo_threads
+
+MEDIAN = "sensor.unit_0001_poll_latency_median"
+FAILURES = "sensor.unit_0001_consecutive_poll_failures"
+
+
+def _enable_poll_stats_sensors(hass):
+    """Register the poll statistics sensors, which are disabled by default, as enabled."""
+    registry = entity_registry.async_get(hass)
+    for key, entity_id in (("latency-p50", MEDIAN), ("consecutive-failures", FAILURES)):
+        registry.async_get_or_create(
+            "sensor", DOMAIN, f"0001-{key}", suggested_object_id=entity_id.split(".")[1]
+        )
+
+
+async def test_poll_stats_sensors_follow_polls(hass, fake_adapters, setup_kumo):
+    """Poll statistics are written after every poll, failed ones included."""
+    adapter = fake_adapters.add_unit("0001")
+    _enable_poll_stats_sensors(hass)
+    entry = await setup_kumo({CONF_ENABLE_POWER_SWITCH: True})
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]["0001"]
+
+    assert float(hass.states.get(MEDIAN).state) >= 0
+    assert hass.states.get(FAILURES).state == "0"
+
+    adapter.loss = 1.0
+    for _ in range(MAX_AVAILABILITY_TRIES):
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get(FAILURES).state == str(MAX_AVAILABILITY_TRIES)
+    # The statistics stay available while the unit is not
+    assert hass.states.get("heater_cooler.unit_0001").state == STATE_UNAVAILABLE
+    assert hass.states.get(MEDIAN).state == str(round(coordinator.poll_stats.latency_p50 * 1000))
+
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_add_executor_job(join_kumo_threads)
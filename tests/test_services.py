@@ -0,0 +1,60 @@
+"""Tests for the Kumo services."""
+import asyncio
+import glob
+import os
+
+from custom_components.kumo.const import (
+    CONF_ENABLE_POWER_SWITCH,
+    DATA_PROFILING,
+    DOMAIN,
+    KUMO_DATA_POLLER,
+    SERVICE_PROFILE,
+)
+
+from .common import join_kumo_threads
+
+NOTIFICATION = "persistent_notification.kumo_profile"
+
+
+async def _async_unload(hass, entry):
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_add_executor_job(join_kumo_threads)
+
+
+async def test_profile_writes_stats_and_notifies(hass, fake_adapters, setup_kumo):
+    """Profiling a poll cycle writes a pstats file and reports its top functions."""
+    fake_adapters.add_unit("0001")
+    entry = await setup_kumo({CONF_ENABLE_POWER_SWITCH: True})
+    poller = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_POLLER]
+
+    call = hass.async_create_task(
+        hass.services.async_call(DOMAIN, SERVICE_PROFILE, {"cycles": 1}, blocking=True)
+    )
+    await asyncio.sleep(0)
+    await poller.async_poll()
+    await call
+
+    paths = glob.glob(hass.config.path("kumo_profile_*.prof"))
+    assert len(paths) == 1 and os.path.getsize(paths[0]) > 0
+    message = hass.states.get(NOTIFICATION).attributes["message"]
+    assert "Profile of 1 poll cycles" in message
+    assert "cumulative" in message
+    assert not hass.data[DATA_PROFILING]
+    await _async_unload(hass, entry)
+
+
+async def test_profile_stops_when_entry_unloads(hass, fake_adapters, setup_kumo):
+    """An unload ends a running profile instead of leaving it to the timeout."""
+    fake_adapters.add_unit("0001")
+    entry = await setup_kumo({CONF_ENABLE_POWER_SWITCH: True})
+
+    call = hass.async_create_task(
+        hass.services.async_call(DOMAIN, SERVICE_PROFILE, {"cycles": 5}, blocking=True)
+    )
+    await asyncio.sleep(0)
+    await _async_unload(hass, entry)
+    await asyncio.wait_for(call, 5)
+
+    assert not hass.data[DATA_PROFILING]
+    assert "Profile of 0 poll cycles" in hass.states.get(NOTIFICATION).attributes["message"]
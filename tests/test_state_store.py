@@ -0,0 +1,36 @@
+"""Tests for persisting the last known state of the Kumo units."""
+import asyncio
+
+from custom_components.kumo.const import STATE_SAVE_DELAY, STATE_STORAGE_KEY
+from custom_components.kumo.coordinator import KumoDataUpdateCoordinator
+from custom_components.kumo.state_store import KumoStateStore
+
+from .common import FakeTransport, make_indoor_unit
+
+
+async def test_save_is_not_postponed_by_changes(hass, hass_storage, monkeypatch):
+    """A unit that changes more often than the save delay is still written."""
+    loop_time = hass.loop.time
+    elapsed = 0.0
+    monkeypatch.setattr(hass.loop, "time", lambda: loop_time() + elapsed)
+    coordinators = {}
+    store = KumoStateStore(hass, "entry", coordinators)
+    transport = FakeTransport()
+    coordinator = coordinators["0001"] = KumoDataUpdateCoordinator(
+        hass, make_indoor_unit(), transport, state_store=store
+    )
+    await coordinator.async_refresh()
+    key = STATE_STORAGE_KEY.format("entry")
+
+    # A change every half delay, for three delays
+    for step in range(6):
+        transport.adapter_status["0001"]["spCool"] = 20 + step
+        await coordinator.async_refresh()
+        elapsed += STATE_SAVE_DELAY.total_seconds() / 2
+        # Let the loop run the timers that are now due
+        await asyncio.sleep(0)
+        await hass.async_block_till_done()
+        if step == 1:
+            assert hass_storage[key]["data"]["units"]["0001"]["status"]["spCool"] == 21
+
+    assert hass_storage[key]["data"]["units"]["0001"]["status"]["spCool"] == 25
@@ -0,0 +1,67 @@
+"""Tests for the rolling poll statistics."""
+import pytest
+
+from custom_components.kumo.stats import KumoPollStats
+
+
+@pytest.mark.parametrize("count", [1, 2, 5, 9, 20, 21])
+def test_median_is_nearest_rank(count):
+    """The median is the middle sample for odd counts, the lower middle for even ones."""
+    stats = KumoPollStats(window=100, history_size=10)
+    for latency in range(count, 0, -1):
+        stats.record(float(latency), True)
+
+    assert stats.latency_p50 == float((count + 1) // 2)
+
+
+def test_percentiles_of_twenty_polls():
+    """p95 of twenty samples is the nineteenth; max is the largest."""
+    stats = KumoPollStats(window=100, history_size=10)
+    for latency in range(1, 21):
+        stats.record(float(latency), True)
+
+    assert stats.latency_p95 == 19.0
+    assert stats.latency_max == 20.0
+    assert stats.percentile(0) == 1.0
+    assert stats.percentile(1) == 20.0
+
+
+def test_no_polls_have_no_latency():
+    """Latency figures are unknown before the first poll."""
+    stats = KumoPollStats(window=10, history_size=10)
+
+    assert stats.latency_p50 is None
+    assert stats.latency_p95 is None
+    assert stats.latency_max is None
+
+
+def test_window_and_history_are_bounded():
+    """Only the latest polls are kept, while the counters keep counting."""
+    stats = KumoPollStats(window=3, history_size=2)
+    for latency in (9.0, 1.0, 2.0, 3.0):
+        stats.record(latency, True)
+
+    assert stats.latency_max == 3.0
+    assert [poll["latency"] for poll in stats.as_history()] == [2.0, 3.0]
+    assert stats.polls == 4
+
+
+def test_failures_and_timeouts_are_counted():
+    """Consecutive failures reset on success; totals do not."""
+    stats = KumoPollStats(window=10, history_size=10)
+    stats.record(0.1, False, timeouts=1, error="timeout")
+    stats.record(0.1, False, timeouts=2, error="timeout")
+    assert stats.consecutive_failures == 2
+    stats.record(0.1, True, nbytes=512)
+
+    assert stats.as_dict() == {
+        "polls": 3,
+        "failures": 2,
+        "consecutive_failures": 0,
+        "timeouts": 3,
+        "last_bytes": 512,
+        "latency_p50": 0.1,
+        "latency_p95": 0.1,
+        "latency_max": 0.1,
+    }
+    assert stats.as_history()[0]["error"] == "timeout"
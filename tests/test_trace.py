@@ -0,0 +1,79 @@
+"""Tests for recording adapter traffic and replaying it."""
+import os
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+
+from custom_components.kumo.const import (
+    CONF_ENABLE_POWER_SWITCH,
+    CONF_TRACE_MODE,
+    CONF_TRACE_SPEED,
+    DOMAIN,
+    KUMO_DATA_COORDINATORS,
+    KUMO_TRACE_FILE,
+    TRACE_MODE_RECORD,
+    TRACE_MODE_REPLAY,
+)
+from custom_components.kumo.trace import load_trace
+
+from .common import join_kumo_threads
+
+ENTRY_DATA = {CONF_ENABLE_POWER_SWITCH: True}
+RECORD = {CONF_TRACE_MODE: TRACE_MODE_RECORD}
+REPLAY = {CONF_TRACE_MODE: TRACE_MODE_REPLAY, CONF_TRACE_SPEED: 0}
+
+
+async def _async_unload(hass, entry):
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_add_executor_job(join_kumo_threads)
+
+
+async def test_recorded_traffic_replays_without_adapters(hass, fake_adapters, setup_kumo):
+    """A trace recorded from the adapters answers the next setup's polls on its own."""
+    adapter = fake_adapters.add_unit("0001")
+    entry = await setup_kumo(ENTRY_DATA, RECORD)
+    await _async_unload(hass, entry)
+    records = await hass.async_add_executor_job(load_trace, hass.config.path(KUMO_TRACE_FILE))
+    assert len(records) == adapter.request_count
+
+    hass.config_entries.async_update_entry(entry, options=REPLAY)
+    request_count = adapter.request_count
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    coordinator = hass.data[DOMAIN][entry.entry_id][KUMO_DATA_COORDINATORS]["0001"]
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.get_available()
+    assert coordinator.data.sp_cool == adapter.status["spCool"]
+    assert adapter.request_count == request_count
+    await _async_unload(hass, entry)
+
+
+async def test_recording_is_flushed_on_stop(hass, fake_adapters, setup_kumo):
+    """Records still buffered when Home Assistant stops reach the trace file."""
+    fake_adapters.add_unit("0001")
+    entry = await setup_kumo(ENTRY_DATA, RECORD)
+    trace_path = hass.config.path(KUMO_TRACE_FILE)
+    assert not os.path.exists(trace_path)
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+    await hass.async_block_till_done()
+
+    assert await hass.async_add_executor_job(load_trace, trace_path)
+    await _async_unload(hass, entry)
+
+
+async def test_replay_without_trace_never_polls_adapters(hass, fake_adapters, setup_kumo):
+    """A replay whose trace cannot be read is retried instead of going live."""
+    adapter = fake_adapters.add_unit("0001")
+    entry = await setup_kumo(ENTRY_DATA)
+    await _async_unload(hass, entry)
+    hass.config_entries.async_update_entry(entry, options=REPLAY)
+    request_count = adapter.request_count
+
+    assert not await hass.config_entries.async_setup(entry.entry_id)
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert entry.entry_id not in hass.data[DOMAIN]
+    assert adapter.request_count == request_count
+    await hass.async_add_executor_job(join_kumo_threads)
@@ -0,0 +1,117 @@
+"""Tests for the async local transport."""
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from custom_components.kumo.snapshot import build_snapshot
+from custom_components.kumo.transport import FIELD_GROUP_FAST, KumoLocalTransport
+
+from .common import UNIT_TIMEOUTS, join_kumo_threads, make_indoor_unit, make_kumo_station
+
+
+async def test_unload_leaves_shared_session_open(hass, fake_adapters, setup_kumo, caplog):
+    """Unloading the entry neither closes nor tries to close Home Assistant's session."""
+    fake_adapters.add_unit("0001")
+    entry = await setup_kumo()
+    await hass.async_block_till_done()
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_add_executor_job(join_kumo_threads)
+
+    assert not async_get_clientsession(hass).closed
+    assert "closes the Home Assistant aiohttp session" not in caplog.text
+
+
+async def _async_start_unit(fake_adapters, make_device=make_indoor_unit, **behaviour):
+    """Start a fake adapter and return a pykumo object for it with nothing read yet."""
+    if make_device is make_kumo_station:
+        adapter = fake_adapters.add_station("0100", **behaviour)
+    else:
+        adapter = fake_adapters.add_unit("0001", **behaviour)
+    await fake_adapters.async_start()
+    device = make_device(address=adapter.address)
+    # pylint: disable=protected-access
+    device._status, device._profile, device._sensors = {}, {}, []
+    return adapter, device
+
+
+async def test_poll_indoor_unit(hass, fake_adapters, client_session):
+    """A full poll reads status, sensors, profile and adapter status."""
+    adapter, device = await _async_start_unit(fake_adapters)
+    transport = KumoLocalTransport(client_session, UNIT_TIMEOUTS)
+
+    assert await transport.async_update_status(device)
+
+    data = build_snapshot(device)
+    assert data.mode == "cool"
+    assert data.sp_cool == 24.0
+    assert data.humidity == 40
+    assert data.battery == 90
+    assert data.rssi == -50
+    assert data.run_state == "normal"
+    assert data.has_auto_mode
+    bytes_received, timeouts = transport.get_counters("0001")
+    assert bytes_received > 0
+    assert timeouts == 0
+
+
+async def test_fast_poll_reads_status_only(hass, fake_adapters, client_session):
+    """Polling only the fast field group is a single request."""
+    adapter, device = await _async_start_unit(fake_adapters)
+    transport = KumoLocalTransport(client_session, UNIT_TIMEOUTS)
+
+    assert await transport.async_update_status(device, {FIELD_GROUP_FAST})
+
+    assert adapter.request_count == 1
+    assert device.get_mode() == "cool"
+
+
+async def test_poll_kumo_station(hass, fake_adapters, client_session):
+    """A Kumo Station reports its outdoor temperature and WiFi signal."""
+    adapter, device = await _async_start_unit(fake_adapters, make_kumo_station)
+    transport = KumoLocalTransport(client_session, UNIT_TIMEOUTS)
+
+    assert await transport.async_update_status(device)
+
+    data = build_snapshot(device)
+    assert data.outdoor_temp == 5.0
+    assert data.rssi == -55
+
+
+async def test_set_status_is_one_request(hass, fake_adapters, client_session):
+    """All fields of a write go to the adapter in one request."""
+    adapter, device = await _async_start_unit(fake_adapters)
+    transport = KumoLocalTransport(client_session, UNIT_TIMEOUTS)
+    await transport.async_update_status(device, {FIELD_GROUP_FAST})
+
+    response = await transport.async_set_status(
+        device, {"mode": "heat", "spHeat": 21.04, "fanSpeed": "quiet"}
+    )
+
+    assert "_api_error" not in response
+    assert adapter.request_count == 2
+    assert adapter.write_count == 1
+    assert adapter.status["mode"] == "heat"
+    assert adapter.status["spHeat"] == 21.0
+    assert device.get_heat_setpoint() == 21.0
+
+
+async def test_hung_adapter_times_out(hass, fake_adapters, client_session):
+    """A hung adapter fails the poll and is counted as a timeout."""
+    adapter, device = await _async_start_unit(fake_adapters, hang=True)
+    transport = KumoLocalTransport(client_session, (0.1, 0.1))
+
+    assert not await transport.async_update_status(device, {FIELD_GROUP_FAST})
+
+    assert transport.get_counters("0001")[1] >= 1
+    assert transport.pop_last_error("0001") == "timeout"
+    assert transport.pop_last_error("0001") is None
+
+
+async def test_dropped_connection_fails_poll(hass, fake_adapters, client_session):
+    """A connection closed without an answer fails the poll with the client error."""
+    adapter, device = await _async_start_unit(fake_adapters, loss=1.0)
+    transport = KumoLocalTransport(client_session, UNIT_TIMEOUTS)
+
+    assert not await transport.async_update_status(device, {FIELD_GROUP_FAST})
+
+    assert transport.get_counters("0001")[1] == 0
+    assert transport.pop_last_error("0001").startswith("Server")